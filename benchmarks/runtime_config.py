@@ -0,0 +1,133 @@
+"""Compare per request settings work with the precomputed app runtime.
+
+Each pair times the work a request used to do against settings with what it
+does now against `runtime.Runtime`, inside a request context like a view:
+rendering the callback template, building the authorization redirect,
+checking requested scopes and classifying the User-Agent.
+
+    uv run python benchmarks/runtime_config.py --iterations 20000
+"""
+
+import argparse
+import re
+import timeit
+from collections.abc import Callable
+
+import flask
+from pydantic import SecretStr
+
+from oauthclientbridge import create_app, runtime, traffic
+from oauthclientbridge.settings import (
+    DatabaseSettings,
+    OAuthSettings,
+    Settings,
+    TrafficClass,
+    current_settings,
+)
+from oauthclientbridge.utils import uri as uri_utils
+
+_USER_AGENT = "Mopidy-Spotify/4.1.1 Mopidy/3.4.2 CPython/3.11.2"
+_VARIABLES = {"client_id": "client", "client_secret": "s3cret", "state": "abc"}
+
+
+def _settings() -> Settings:
+    return Settings(
+        database=DatabaseSettings(database=":memory:"),
+        oauth=OAuthSettings(
+            client_id="client",
+            client_secret=SecretStr("s3cret"),
+            scopes={"playlist-read", "user-library-read"},
+            allowed_scopes={"playlist-read", "user-library-read", "streaming"},
+            authorization_uri="https://provider.example.com/auth?show_dialog=true",
+            token_uri="https://provider.example.com/token",
+        ),
+        traffic_classes=[
+            TrafficClass(name="legacy", user_agents=r"^OldApp/1\."),
+            TrafficClass(name="broken", user_agents=r"Broken"),
+        ],
+        revoked_grant_workaround_user_agents=r"^Mopidy-Spotify/4\.1\.1\b",
+    )
+
+
+def _render_from_settings() -> str:
+    return flask.render_template_string(
+        current_settings.callback_template, variables=_VARIABLES, **_VARIABLES
+    )
+
+
+def _render_from_runtime() -> str:
+    context = {"variables": _VARIABLES, **_VARIABLES}
+    flask.current_app.update_template_context(context)
+    return runtime.get().callback_template.render(context)
+
+
+def _redirect_from_settings() -> str:
+    return uri_utils.rewrite_uri(
+        current_settings.oauth.authorization_uri,
+        {"client_id": "client", "scope": " ".join(current_settings.oauth.scopes)},
+    )
+
+
+def _redirect_from_runtime() -> str:
+    app_runtime = runtime.get()
+    return uri_utils.rewrite_uri(
+        app_runtime.authorization_uri,
+        {"client_id": "client", "scope": app_runtime.default_scope},
+    )
+
+
+def _scope_from_settings() -> bool:
+    allowed = current_settings.oauth.allowed_scopes
+    return allowed is None or set(" ".join(current_settings.oauth.scopes).split()) <= (
+        allowed
+    )
+
+
+def _scope_from_runtime() -> bool:
+    app_runtime = runtime.get()
+    allowed = app_runtime.allowed_scopes
+    return allowed is None or set(app_runtime.default_scope.split()) <= allowed
+
+
+def _classify_from_settings() -> bool:
+    # As before, with the workaround pattern looked up and matched per request.
+    pattern = current_settings.revoked_grant_workaround_user_agents
+    return pattern is not None and re.search(pattern, _USER_AGENT) is not None
+
+
+def _classify_from_runtime() -> bool:
+    traffic_class = traffic.classify(_USER_AGENT)
+    return traffic_class is not None and traffic_class.revoked_grant_workaround
+
+
+_CASES: list[tuple[str, Callable[[], object], Callable[[], object]]] = [
+    ("render", _render_from_settings, _render_from_runtime),
+    ("redirect", _redirect_from_settings, _redirect_from_runtime),
+    ("scope", _scope_from_settings, _scope_from_runtime),
+    ("classify", _classify_from_settings, _classify_from_runtime),
+]
+
+
+def _time(fn: Callable[[], object], iterations: int, repeat: int) -> float:
+    return min(timeit.repeat(fn, number=iterations, repeat=repeat)) / iterations
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    _ = parser.add_argument("--iterations", type=int, default=10000)
+    _ = parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app(_settings())
+    with app.test_request_context("/callback"):
+        for name, before, after in _CASES:
+            old = _time(before, args.iterations, args.repeat)
+            new = _time(after, args.iterations, args.repeat)
+            print(
+                f"{name:<8} settings {old * 1e6:8.2f} us  "
+                f"runtime {new * 1e6:8.2f} us  {old / new:5.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Compare refresh throughput of the WSGI and ASGI entry points.
+
+Every request refreshes a token against a local upstream that answers after
+`--delay` seconds, running in its own process so it does not compete for the
+GIL. The WSGI app is driven by a pool of `--threads` worker
+threads, like a threaded WSGI server, while the ASGI app runs `--concurrency`
+requests at once on a single event loop. Both share `--pool-maxsize` upstream
+connections.
+
+    uv run python benchmarks/token_concurrency.py --requests 500 --delay 0.1
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import http.server
+import multiprocessing
+import statistics
+import tempfile
+import time
+import urllib.parse
+from pathlib import Path
+from typing import Any
+
+from flask import Flask
+from pydantic import SecretStr
+
+from oauthclientbridge import create_app, crypto, db, views
+from oauthclientbridge.settings import (
+    DatabaseSettings,
+    FetchSettings,
+    OAuthSettings,
+    Settings,
+)
+from oauthclientbridge.utils.asgi import ASGIBridge, Message
+
+
+class _Upstream(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+    delay: float
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: _Upstream
+
+    def do_POST(self) -> None:
+        _ = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(self.server.delay)
+        body = b'{"access_token": "abc", "token_type": "Bearer", "expires_in": 3600}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        _ = self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+def _serve_upstream(delay: float, ports: "multiprocessing.Queue[int]") -> None:
+    upstream = _Upstream(("127.0.0.1", 0), _Handler)
+    upstream.delay = delay
+    ports.put(upstream.server_address[1])
+    upstream.serve_forever()
+
+
+def _create_app(token_uri: str, database: Path, pool_size: int) -> Flask:
+    return create_app(
+        Settings(
+            database=DatabaseSettings(database=str(database)),
+            fetch=FetchSettings(pool_maxsize=pool_size),
+            oauth=OAuthSettings(
+                client_id="client",
+                client_secret=SecretStr("s3cret"),
+                authorization_uri="http://127.0.0.1/auth",
+                token_uri=token_uri,
+                redirect_uri="http://127.0.0.1/callback",
+            ),
+        )
+    )
+
+
+def _forms(app: Flask, count: int) -> list[dict[str, str]]:
+    forms: list[dict[str, str]] = []
+    with app.app_context():
+        db.initialize()
+        for _ in range(count):
+            client_id, client_secret = db.generate_id(), crypto.generate_key()
+            db.insert(client_id, crypto.dumps(client_secret, {"refresh_token": "r"}))
+            forms.append(
+                {
+                    "client_id": client_id,
+                    "client_secret": client_secret,
+                    "grant_type": "client_credentials",
+                }
+            )
+    return forms
+
+
+def _run_wsgi(app: Flask, forms: list[dict[str, str]], threads: int) -> list[float]:
+    def post(form: dict[str, str]) -> float:
+        start = time.perf_counter()
+        resp = app.test_client().post("/token", data=form)
+        assert resp.status_code == 200, resp.text
+        return time.perf_counter() - start
+
+    with concurrent.futures.ThreadPoolExecutor(threads) as executor:
+        return list(executor.map(post, forms))
+
+
+async def _run_asgi(
+    app: Flask, forms: list[dict[str, str]], concurrency: int
+) -> list[float]:
+    bridge = ASGIBridge(lambda environ: app, {"views.token": views.token_async})
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def post(form: dict[str, str]) -> float:
+        body = urllib.parse.urlencode(form).encode()
+        scope: dict[str, Any] = {
+            "type": "http",
+            "method": "POST",
+            "path": "/token",
+            "headers": [
+                (b"host", b"localhost"),
+                (b"content-type", b"application/x-www-form-urlencoded"),
+            ],
+        }
+        sent: list[Message] = []
+
+        async def receive() -> Message:
+            return {"type": "http.request", "body": body}
+
+        async def send(message: Message) -> None:
+            sent.append(message)
+
+        async with semaphore:
+            start = time.perf_counter()
+            await bridge(scope, receive, send)
+            assert sent[0]["status"] == 200, sent
+            return time.perf_counter() - start
+
+    return list(await asyncio.gather(*(post(form) for form in forms)))
+
+
+def _report(name: str, elapsed: float, latencies: list[float]) -> None:
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{name:<5} {len(latencies) / elapsed:8.1f} req/s  "
+        f"p50 {quantiles[49] * 1000:7.1f} ms  "
+        f"p99 {quantiles[98] * 1000:7.1f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    _ = parser.add_argument("--requests", type=int, default=200)
+    _ = parser.add_argument("--threads", type=int, default=8)
+    _ = parser.add_argument("--concurrency", type=int, default=32)
+    _ = parser.add_argument("--pool-maxsize", type=int, default=10)
+    _ = parser.add_argument("--delay", type=float, default=0.05)
+    args = parser.parse_args()
+
+    ports: "multiprocessing.Queue[int]" = multiprocessing.Queue()
+    upstream = multiprocessing.Process(
+        target=_serve_upstream, args=(args.delay, ports), daemon=True
+    )
+    upstream.start()
+    token_uri = f"http://127.0.0.1:{ports.get()}/token"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("wsgi", "asgi"):
+            app = _create_app(token_uri, Path(tmp) / f"{name}.db", args.pool_maxsize)
+            forms = _forms(app, args.requests)
+
+            start = time.perf_counter()
+            if name == "wsgi":
+                latencies = _run_wsgi(app, forms, args.threads)
+            else:
+                latencies = asyncio.run(_run_asgi(app, forms, args.concurrency))
+            _report(name, time.perf_counter() - start, latencies)
+
+    upstream.terminate()
+
+
+if __name__ == "__main__":
+    main()
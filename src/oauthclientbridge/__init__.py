@@ -1,12 +1,32 @@
 # pyright: reportImportCycles=none
 
+from datetime import timedelta
 from importlib.metadata import version
+from pathlib import Path
+from typing import IO
 
+import click
+import requests
 import structlog
 from flask import Flask
 
-from oauthclientbridge import db, logs, oauth, telemetry, views
+from oauthclientbridge import (
+    admission,
+    backup,
+    bulkhead,
+    db,
+    deadline,
+    logs,
+    oauth,
+    replication,
+    runtime,
+    telemetry,
+    transfer,
+    views,
+)
 from oauthclientbridge.settings import Settings
+from oauthclientbridge.utils import json as json_utils
+from oauthclientbridge.utils import time as time_utils
 
 __version__ = version("oauthclientbridge")
 
@@ -19,8 +39,10 @@ def create_app(settings: Settings | None = None) -> Flask:
         settings = Settings()
 
     app = Flask(__name__)
+    app.json = json_utils.JSONProvider(app)
     app.config["SETTINGS"] = settings
     _ = app.config.from_prefixed_env()
+    runtime.init_app(app, settings)
 
     telemetry.instrument_app(app)
 
@@ -33,15 +55,23 @@ def create_app(settings: Settings | None = None) -> Flask:
     _ = app.register_error_handler(500, oauth.fallback_error_handler)
 
     _ = app.before_request(telemetry.record_request_metrics)
+    _ = app.before_request(admission.admit)
+    _ = app.before_request(telemetry.set_provider)
+    _ = app.before_request(bulkhead.enter)
+    _ = app.teardown_request(bulkhead.leave)
+    _ = app.before_request(deadline.start_request)
     _ = app.after_request(telemetry.finalize_request_metrics)
 
     telemetry.set_build_info(settings.otel)
     telemetry.add_refresher(
         app,
-        lambda: telemetry.set_token_state_counts(db.token_state_counts()),
+        lambda: telemetry.set_token_state_counts(
+            db.token_state_counts(), settings.otel.oauth_provider
+        ),
     )
 
     app.register_blueprint(views.routes)
+    app.register_blueprint(replication.routes)
 
     @app.cli.command("initdb")
     def initdb():  # pyright: ignore[reportUnusedFunction]
@@ -55,9 +85,88 @@ def create_app(settings: Settings | None = None) -> Flask:
 
     @app.cli.command("cleandb")
     def cleandb():  # pyright: ignore[reportUnusedFunction]
+        replication_settings = settings.replication
+        if replication_settings.change_log or replication_settings.primary_url:
+            before = time_utils.utcnow() - timedelta(
+                seconds=replication_settings.retention_seconds
+            )
+            print("Pruned %d changes" % db.prune_changes(before))
         print("Vacuumed %s" % settings.database.database)
         db.vacuum()
 
+    @app.cli.command("backupdb")
+    @click.argument("target", type=click.Path(path_type=Path), required=False)
+    @click.option("--pages", type=click.IntRange(min=1))
+    @click.option("--sleep", type=click.FloatRange(min=0))
+    def backupdb(target: Path | None, pages: int | None, sleep: float | None):  # pyright: ignore[reportUnusedFunction]
+        """Back up the live database to TARGET or the backup directory."""
+        database = settings.database
+        pages = database.backup_pages if pages is None else pages
+        sleep = database.backup_sleep_seconds if sleep is None else sleep
+
+        if target is not None:
+            db.backup(target, pages=pages, sleep=sleep)
+        elif database.backup_directory is not None:
+            target = backup.run(
+                database.backup_directory,
+                keep=database.backup_keep,
+                pages=pages,
+                sleep=sleep,
+            )
+            if target is None:
+                raise click.ClickException("Another backup is already running")
+        else:
+            raise click.UsageError(
+                "TARGET is required unless DB_BACKUP_DIRECTORY is set"
+            )
+        print("Backed up %s to %s" % (database.database, target))
+
+    @app.cli.command("exportdb")
+    @click.option("--output", "-o", type=click.File("w"), default="-")
+    @click.option("--batch-size", type=click.IntRange(min=1), default=1000)
+    def exportdb(output: IO[str], batch_size: int):  # pyright: ignore[reportUnusedFunction]
+        progress = transfer.Progress("Exported", lambda m: click.echo(m, err=True))
+        count = transfer.export_ndjson(output, batch_size, progress)
+        progress.done(count)
+
+    @app.cli.command("importdb")
+    @click.option("--input", "-i", "source", type=click.File("r"), default="-")
+    @click.option("--batch-size", type=click.IntRange(min=1), default=1000)
+    @click.option("--replace", is_flag=True, help="Overwrite existing client_ids.")
+    def importdb(source: IO[str], batch_size: int, replace: bool):  # pyright: ignore[reportUnusedFunction]
+        progress = transfer.Progress("Imported", lambda m: click.echo(m, err=True))
+        try:
+            count = transfer.import_ndjson(source, batch_size, replace, progress)
+        except ValueError as e:
+            raise click.ClickException(str(e)) from e
+        progress.done(count)
+
+    @app.cli.command("followdb")
+    @click.option("--batch-size", type=click.IntRange(min=1))
+    @click.option("--interval", type=click.FloatRange(min=0))
+    @click.option("--once", is_flag=True, help="Apply one batch of changes and exit.")
+    def followdb(batch_size: int | None, interval: float | None, once: bool):  # pyright: ignore[reportUnusedFunction]
+        """Apply changes from the primary to this replica's database."""
+        replication_settings = settings.replication
+        if replication_settings.primary_url is None:
+            raise click.UsageError("REPLICATION_PRIMARY_URL must be set")
+        batch_size = batch_size or replication_settings.batch_size
+        if interval is None:
+            interval = replication_settings.poll_interval_seconds
+
+        progress = transfer.Progress("Applied", lambda m: click.echo(m, err=True))
+        count = 0
+        try:
+            if once:
+                count = replication.follow_once(batch_size)
+            else:
+                count = replication.follow(batch_size, interval, progress)
+        except (replication.ReplicaTooFarBehind, requests.RequestException) as e:
+            raise click.ClickException(str(e)) from e
+        except KeyboardInterrupt:
+            pass
+        progress.done(count)
+
     return app
 
 
@@ -73,9 +182,11 @@ def start_runtime_services(app: Flask) -> None:
 
     telemetry.start_background_refresh(app)
     telemetry.request_refresh(app)
+    backup.start_scheduled_backups(app)
     app.extensions["oauth_runtime_services_started"] = True
 
 
 def stop_runtime_services(app: Flask) -> None:
     telemetry.stop_background_refresh(app)
+    backup.stop_scheduled_backups(app)
     app.extensions.pop("oauth_runtime_services_started", None)
@@ -0,0 +1,117 @@
+"""Load shedding based on how long requests queued before reaching us.
+
+The proxy in front stamps requests with `X-Request-Start`, the difference to
+now is the time spent waiting for a worker. Following CoDel as used for
+server queues, a process is overloaded while even the shortest wait over the
+last `shed_interval_seconds` exceeded `shed_target_seconds`. Overloaded, the
+endpoints in `shed_endpoints` reject requests that already waited more than
+twice the target, whose callers are likely about to time out anyway, so the
+queue drains and the requests that still can succeed get served. Traffic
+classes with a low shed priority are rejected while overloaded regardless of
+their wait, high priority ones never.
+"""
+
+import functools
+import math
+import threading
+import time
+
+import flask
+
+from oauthclientbridge import oauth, telemetry, traffic
+from oauthclientbridge.errors import OAuthError
+from oauthclientbridge.settings import ShedPriority, current_settings
+
+
+class CoDel:
+    """Overload detection from queueing delay, with a sticky overload state."""
+
+    def __init__(self, target: float, interval: float) -> None:
+        self._target = target
+        self._interval = interval
+        self._interval_ends = time.monotonic() + interval
+        self._min_delay = math.inf
+        self._overloaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def overloaded(self) -> bool:
+        return self._overloaded
+
+    def shed(self, delay: float, priority: ShedPriority = ShedPriority.NORMAL) -> bool:
+        """Record a request's queueing `delay`, returning if it should be shed."""
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._interval_ends:
+                self._overloaded = self._min_delay > self._target
+                self._min_delay = math.inf
+                self._interval_ends = now + self._interval
+            self._min_delay = min(self._min_delay, delay)
+            overloaded = self._overloaded
+
+        if priority == ShedPriority.LOW:
+            return overloaded
+        elif priority == ShedPriority.NORMAL:
+            return overloaded and delay > 2 * self._target
+        return False
+
+
+def admit() -> None:
+    """Reject requests to shed endpoints that queued too long under overload."""
+    target = current_settings.shed_target_seconds
+    if target is None:
+        return
+
+    start = parse_request_start(flask.request.headers.get("X-Request-Start"))
+    if start is None:
+        return
+
+    delay = max(0.0, time.time() - start)
+    telemetry.observe_request_queue_time(delay)
+    endpoint = flask.request.endpoint or ""
+    traffic_class = None
+    if endpoint in current_settings.shed_endpoints:
+        traffic_class = traffic.classify()
+        priority = traffic.shed_priority(traffic_class)
+    else:
+        # Still counts towards overload detection, but is never shed.
+        priority = ShedPriority.HIGH
+
+    controller = get_controller(target, current_settings.shed_interval_seconds)
+    if not controller.shed(delay, priority):
+        return
+
+    telemetry.record_load_shed(endpoint, traffic.name(traffic_class))
+    raise oauth.Error(
+        OAuthError.TEMPORARILY_UNAVAILABLE,
+        "Server is overloaded.",
+        retry_after=current_settings.shed_retry_after,
+    )
+
+
+def parse_request_start(value: str | None) -> float | None:
+    """Unix time from `X-Request-Start`, in seconds, milli- or microseconds.
+
+    Accepts a bare number or nginx style `t=` prefix, telling the units apart
+    by magnitude.
+    """
+    if not value:
+        return None
+    try:
+        start = float(value.strip().removeprefix("t="))
+    except ValueError:
+        return None
+    if not math.isfinite(start) or start <= 0:
+        return None
+
+    if start > 1e14:
+        return start / 1e6
+    elif start > 1e11:
+        return start / 1e3
+    return start
+
+
+@functools.lru_cache()
+def get_controller(target: float, interval: float) -> CoDel:
+    """Process-local overload detection, queues are per worker process."""
+    return CoDel(target, interval)
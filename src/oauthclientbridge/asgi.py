@@ -0,0 +1,28 @@
+from flask import Flask
+
+from oauthclientbridge import db, providers, telemetry, views
+from oauthclientbridge.utils.asgi import ASGIBridge, Resolver
+
+# Importing the WSGI entry point configures logging and telemetry, creates the
+# provider apps and starts their runtime services.
+from oauthclientbridge.wsgi import app as wsgi_app
+from oauthclientbridge.wsgi import apps
+
+
+def _single_app(app: Flask) -> Resolver:
+    return lambda environ: app
+
+
+resolve: Resolver
+if isinstance(wsgi_app, providers.ProviderDispatcher):
+    resolve = wsgi_app.resolve
+else:
+    assert isinstance(wsgi_app, Flask)
+    resolve = _single_app(wsgi_app)
+
+for provider_app in apps:
+    db.allow_thread_handoff(provider_app)
+
+app = ASGIBridge(
+    resolve, {"views.token": views.token_async}, record=telemetry.ServerRequest
+)
@@ -0,0 +1,123 @@
+"""Rotating online database backups, on demand or on a schedule."""
+
+import contextlib
+import fcntl
+import logging
+import time
+from collections.abc import Generator
+from pathlib import Path
+from random import uniform
+
+from flask import Flask
+
+from oauthclientbridge import db, telemetry
+from oauthclientbridge.settings import current_settings
+from oauthclientbridge.utils import periodic
+from oauthclientbridge.utils import time as time_utils
+
+logger = logging.getLogger(__name__)
+
+_BACKUP_GLOB = "backup-*.db"
+
+
+def run(
+    directory: Path,
+    keep: int,
+    pages: int,
+    sleep: float,
+    min_age: float = 0.0,
+) -> Path | None:
+    """Take a timestamped backup in `directory` and prune all but `keep`.
+
+    Returns None without backing up when another process is already taking a
+    backup, or when the newest backup is younger than `min_age` seconds.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    with _exclusive(directory) as acquired:
+        if not acquired:
+            return None
+
+        existing = _backups(directory)
+        if existing and time.time() - existing[-1].stat().st_mtime < min_age:
+            return None
+
+        target = directory / f"backup-{time_utils.utcnow():%Y%m%dT%H%M%S%fZ}.db"
+        start_time = time.monotonic()
+        try:
+            db.backup(target, pages=pages, sleep=sleep)
+        except Exception:
+            telemetry.record_database_backup_error()
+            raise
+        telemetry.record_database_backup(
+            time.monotonic() - start_time, target.stat().st_size
+        )
+
+        for stale in _backups(directory)[:-keep]:
+            stale.unlink(missing_ok=True)
+
+        return target
+
+
+def start_scheduled_backups(app: Flask) -> None:
+    """Start periodic backups when the app has a backup directory configured."""
+    if app.extensions.get("oauth_backup_worker") is not None:
+        return
+
+    with app.app_context():
+        settings = current_settings.database
+        if settings.backup_directory is None:
+            return
+        interval = settings.backup_interval_seconds
+
+    worker = periodic.PeriodicWorker(
+        lambda: _scheduled_backup(app),
+        interval=interval,
+        startup_delay=lambda: uniform(0, 60.0),
+        name="oauth-database-backup",
+    )
+    app.extensions["oauth_backup_worker"] = worker
+    worker.start()
+
+
+def stop_scheduled_backups(app: Flask) -> None:
+    worker = app.extensions.pop("oauth_backup_worker", None)
+    if worker is not None:
+        worker.stop(timeout=1.0)
+
+
+def _scheduled_backup(app: Flask) -> None:
+    try:
+        with app.app_context():
+            settings = current_settings.database
+            assert settings.backup_directory is not None
+            # Every worker process runs the schedule, only the first one to
+            # get there in each interval takes a backup.
+            _ = run(
+                settings.backup_directory,
+                keep=settings.backup_keep,
+                pages=settings.backup_pages,
+                sleep=settings.backup_sleep_seconds,
+                min_age=settings.backup_interval_seconds / 2,
+            )
+    except Exception:
+        logger.exception("Scheduled database backup failed")
+
+
+def _backups(directory: Path) -> list[Path]:
+    # Timestamps sort lexically, so the newest backup is last.
+    return sorted(directory.glob(_BACKUP_GLOB))
+
+
+@contextlib.contextmanager
+def _exclusive(directory: Path) -> Generator[bool, None, None]:
+    with open(directory / ".lock", "a") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
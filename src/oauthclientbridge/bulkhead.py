@@ -0,0 +1,81 @@
+"""Per route concurrency partitions, so slow routes can not starve the others.
+
+Every endpoint listed in `bulkheads` may use at most that many of a worker
+process's request threads at once. Requests finding their partition full are
+rejected straight away with temporarily_unavailable and a Retry-After rather
+than waiting for a thread that /token clients might need.
+"""
+
+import functools
+import threading
+
+import flask
+
+from oauthclientbridge import oauth, telemetry
+from oauthclientbridge.errors import OAuthError
+from oauthclientbridge.settings import current_settings
+
+
+class Bulkhead:
+    """Non-blocking limit on concurrent requests to one endpoint."""
+
+    def __init__(self, endpoint: str, limit: int) -> None:
+        self._endpoint = endpoint
+        self._limit = limit
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def try_enter(self) -> bool:
+        with self._lock:
+            if self._in_flight >= self._limit:
+                entered = False
+            else:
+                self._in_flight += 1
+                entered = True
+            in_flight = self._in_flight
+
+        if entered:
+            telemetry.set_bulkhead_in_flight(self._endpoint, in_flight)
+        else:
+            telemetry.record_bulkhead_rejection(self._endpoint)
+        return entered
+
+    def leave(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            in_flight = self._in_flight
+        telemetry.set_bulkhead_in_flight(self._endpoint, in_flight)
+
+
+def enter() -> None:
+    """Take a slot in the request endpoint's partition, rejecting when full."""
+    endpoint = flask.request.endpoint
+    limit = current_settings.bulkheads.get(endpoint or "")
+    if endpoint is None or limit is None:
+        return
+
+    bulkhead = get_bulkhead(endpoint, limit)
+    if not bulkhead.try_enter():
+        raise oauth.Error(
+            OAuthError.TEMPORARILY_UNAVAILABLE,
+            "Too many concurrent requests.",
+            retry_after=current_settings.bulkhead_retry_after,
+        )
+    flask.g.bulkhead = bulkhead
+
+
+def leave(_: BaseException | None = None) -> None:
+    """Give back the slot taken by `enter`, if any."""
+    bulkhead: Bulkhead | None = flask.g.pop("bulkhead", None)
+    if bulkhead is not None:
+        bulkhead.leave()
+
+
+@functools.lru_cache()
+def get_bulkhead(endpoint: str, limit: int) -> Bulkhead:
+    """Process-local partition per endpoint, shared by every provider app."""
+    return Bulkhead(endpoint, limit)
@@ -6,9 +6,14 @@ to its callers.
 """
 
 from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any, cast
 
 from oauthclientbridge import crypto, db, types
 
+# Fernet keys are 32 bytes of urlsafe base64, encrypted grants are far longer.
+_FERNET_KEY_LENGTH = 44
+
 
 @dataclass(frozen=True)
 class ClientCredentials:
@@ -16,6 +21,16 @@ class ClientCredentials:
     client_secret: types.ClientSecret
 
 
+@dataclass(frozen=True)
+class StatelessGrant:
+    """Encrypted grant carried by the client instead of the token table."""
+
+    client_id: types.ClientId
+    generation: int
+    created_at: datetime | None
+    token: dict[str, Any]
+
+
 class CredentialValidationError(ValueError):
     pass
 
@@ -32,6 +47,33 @@ def validate_credentials(
     client_id: str | None,
     client_secret: str | None,
 ) -> ClientCredentials:
+    normalized_client_id, client_secret = _validate_client_id(client_id, client_secret)
+
+    try:
+        validated_client_secret = crypto.validate_key(client_secret)
+    except crypto.InvalidToken as e:
+        raise ClientSecretValidationError("Malformed client_secret.") from e
+
+    return ClientCredentials(
+        client_id=normalized_client_id,
+        client_secret=validated_client_secret,
+    )
+
+
+def validate_grant(
+    client_id: str | None,
+    client_secret: str | None,
+    key: str,
+) -> StatelessGrant:
+    """Validate credentials where the client_secret is an encrypted grant."""
+    normalized_client_id, client_secret = _validate_client_id(client_id, client_secret)
+    return _load_grant(key, normalized_client_id, client_secret)
+
+
+def _validate_client_id(
+    client_id: str | None,
+    client_secret: str | None,
+) -> tuple[types.ClientId, str]:
     if client_id is None or client_id == "":
         raise CredentialValidationError("client_id must be set.")
 
@@ -48,12 +90,65 @@ def validate_credentials(
     if client_secret is None or client_secret == "":
         raise CredentialValidationError("client_secret must be set.")
 
+    return normalized_client_id, client_secret
+
+
+def normalize_client_id(client_id: str) -> str:
+    """Canonical spelling of a possibly malformed client_id, for keying."""
     try:
-        validated_client_secret = crypto.validate_key(client_secret)
-    except crypto.InvalidToken as e:
+        return str(db.validate_client_id(client_id))
+    except ValueError:
+        return client_id
+
+
+def is_stateless_secret(client_secret: str | None) -> bool:
+    return client_secret is not None and len(client_secret) > _FERNET_KEY_LENGTH
+
+
+def dump_grant(key: str, grant: StatelessGrant) -> types.ClientSecret:
+    """Encrypt a stateless grant into the client_secret handed to the client."""
+    payload = {
+        "client_id": str(grant.client_id),
+        "generation": grant.generation,
+        "created_at": None
+        if grant.created_at is None
+        else int(grant.created_at.timestamp()),
+        "token": grant.token,
+    }
+    encrypted = crypto.dumps(crypto.validate_key(key), payload)
+    return types.ClientSecret(encrypted.decode("ascii"))
+
+
+def _load_grant(
+    key: str, client_id: types.ClientId, client_secret: str
+) -> StatelessGrant:
+    """Decrypt and verify a stateless grant presented as client_secret."""
+    try:
+        payload = crypto.loads(
+            crypto.validate_key(key),
+            types.EncryptedToken(client_secret.encode("ascii")),
+        )
+    except (crypto.InvalidToken, TypeError, ValueError) as e:
         raise ClientSecretValidationError("Malformed client_secret.") from e
 
-    return ClientCredentials(
-        client_id=normalized_client_id,
-        client_secret=validated_client_secret,
+    if payload.get("client_id") != str(client_id):
+        raise ClientSecretValidationError("client_secret issued to other client.")
+
+    generation = payload.get("generation")
+    created_at = payload.get("created_at")
+    token = payload.get("token")
+    if (
+        not isinstance(generation, int)
+        or not isinstance(token, dict)
+        or not (created_at is None or isinstance(created_at, int))
+    ):
+        raise ClientSecretValidationError("Malformed client_secret.")
+
+    return StatelessGrant(
+        client_id=client_id,
+        generation=generation,
+        created_at=None
+        if created_at is None
+        else datetime.fromtimestamp(created_at, UTC),
+        token=cast(dict[str, Any], token),
     )
@@ -1,10 +1,10 @@
 import binascii
-import json
 from typing import Any
 
 from cryptography import fernet
 
 from oauthclientbridge import types
+from oauthclientbridge.utils import json as json_utils
 
 InvalidToken = fernet.InvalidToken
 
@@ -31,15 +31,15 @@ def validate_key(key: str) -> types.ClientSecret:
 
 
 def dumps(key: types.ClientSecret, data: dict[str, Any]) -> types.EncryptedToken:
-    """Calls json.dumps on data and encrypts the result with given key."""
+    """Serializes data as JSON and encrypts the result with given key."""
     f = fernet.Fernet(key.encode("ascii"))
-    return types.EncryptedToken(f.encrypt(json.dumps(data).encode("utf-8")))
+    return types.EncryptedToken(f.encrypt(json_utils.dumps(data)))
 
 
 def loads(key: types.ClientSecret, token: types.EncryptedToken) -> dict[str, Any]:
-    """Decrypts and verifies token with given key and calls json.loads."""
+    """Decrypts and verifies token with given key and parses the JSON."""
     try:
         f = fernet.Fernet(_normalize_base64_padding(key).encode("ascii"))
     except (ValueError, binascii.Error) as e:
         raise InvalidToken from e
-    return json.loads(f.decrypt(token).decode("utf-8"))
+    return json_utils.loads(f.decrypt(token))
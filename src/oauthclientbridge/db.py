@@ -1,18 +1,22 @@
 import contextlib
+import itertools
 import re
 import sqlite3
 import time
 import uuid
+from collections.abc import Iterable
 from dataclasses import dataclass
 from datetime import UTC, datetime
-from typing import IO, Generator, cast
+from pathlib import Path
+from typing import IO, Any, Generator, cast
 
-from flask import current_app, g
+from flask import Flask, current_app, g
 from opentelemetry import metrics, trace
 
-from oauthclientbridge import telemetry, types
+from oauthclientbridge import deadline, telemetry, types
 from oauthclientbridge.settings import current_settings
 from oauthclientbridge.utils import time as time_utils
+from oauthclientbridge.utils.cache import TTLCache
 
 Error = sqlite3.Error
 IntegrityError = sqlite3.IntegrityError
@@ -20,6 +24,8 @@ IntegrityError = sqlite3.IntegrityError
 tracer = trace.get_tracer(__name__)
 meter = metrics.get_meter(__name__)
 
+_THREAD_HANDOFF = "oauth_db_thread_handoff"
+
 _db_cursor_total_counter = meter.create_counter(
     name="oauth.db.cursor.total",
     description="Measures the total number of logical database operations.",
@@ -48,15 +54,36 @@ class TokenRecord:
     last_updated_at: datetime | None
 
 
-def initialize() -> None:
+@dataclass(frozen=True)
+class GenerationRecord:
+    client_id: types.ClientId
+    generation: int | None
+    last_updated_at: datetime | None
+
+
+@dataclass(frozen=True)
+class ChangeRecord:
+    seq: int
+    record: TokenRecord
+
+
+def _schema() -> str:
     with cast(IO[str], current_app.open_resource("schema.sql", mode="r")) as f:
-        schema = f.read()
+        return f.read()
+
+
+def initialize() -> None:
+    schema = _schema()
     with get() as c:
         c.executescript(schema)
 
 
 def upgrade() -> None:
+    # Every table in the schema is created with "if not exists", so replaying
+    # it adds any tables introduced after the database was initialized.
+    schema = _schema()
     with get() as c:
+        c.executescript(schema)
         columns = {
             row[1].decode("ascii") if isinstance(row[1], bytes) else row[1]
             for row in c.execute("PRAGMA table_info(tokens)").fetchall()
@@ -85,20 +112,40 @@ def _database_connect_args() -> tuple[str, bool]:
     return (database, False)
 
 
-def _connect() -> sqlite3.Connection:
+class _Connection(sqlite3.Connection):
+    busy_timeout: int
+    """Milliseconds to wait for locks as configured when connecting."""
+
+
+def _connect() -> _Connection:
     database, uri = _database_connect_args()
     connection = sqlite3.connect(
         database,
         timeout=current_settings.database.timeout,
         isolation_level=None,
         uri=uri,
+        check_same_thread=not current_app.extensions.get(_THREAD_HANDOFF, False),
+        factory=_Connection,
     )
     connection.text_factory = _bytes_text_factory
     for pragma in current_settings.database.pragmas:
         connection.execute(pragma)
+    # Read back once as the pragmas may override the connect timeout.
+    connection.busy_timeout = int(
+        connection.execute("PRAGMA busy_timeout").fetchone()[0]
+    )
     return connection
 
 
+def allow_thread_handoff(app: Flask) -> None:
+    """Let a request's connection move from one worker thread to the next.
+
+    For the ASGI entry point, which runs the steps of a request in different
+    threads. The connection is still never used by two threads at once.
+    """
+    app.extensions[_THREAD_HANDOFF] = True
+
+
 def _bytes_text_factory(value: bytes) -> bytes:
     return value
 
@@ -116,6 +163,55 @@ def vacuum() -> None:
         c.execute("VACUUM")
 
 
+def backup(target: Path, pages: int = 256, sleep: float = 0.05) -> None:
+    """Copy the live database to `target` with the SQLite online backup API.
+
+    Copies `pages` pages per step and sleeps `sleep` seconds between steps, so
+    writers never wait for more than a single step. The copy is written next to
+    `target` and only renamed into place once complete.
+    """
+    partial = target.with_name(target.name + ".partial")
+    with tracer.start_as_current_span("DB backup") as span:
+        span.set_attribute("backup.pages_per_step", pages)
+
+        def progress(status: int, remaining: int, total: int) -> None:
+            span.set_attribute("backup.total_pages", total)
+
+        try:
+            with (
+                contextlib.closing(_connect()) as source,
+                contextlib.closing(sqlite3.connect(partial)) as destination,
+            ):
+                source.backup(destination, pages=pages, progress=progress, sleep=sleep)
+        except BaseException:
+            partial.unlink(missing_ok=True)
+            raise
+        _ = partial.replace(target)
+
+
+@contextlib.contextmanager
+def _deadline_busy_timeout(
+    connection: sqlite3.Connection,
+) -> Generator[None, None, None]:
+    """Wait no longer for database locks than the request deadline allows."""
+    left = deadline.remaining()
+    if left is None:
+        yield
+        return
+
+    previous = cast(_Connection, connection).busy_timeout
+    busy_timeout = max(0, int(left * 1000))
+    if busy_timeout >= previous:
+        yield
+        return
+
+    _ = connection.execute("PRAGMA busy_timeout = %d" % busy_timeout)
+    try:
+        yield
+    finally:
+        _ = connection.execute("PRAGMA busy_timeout = %d" % previous)
+
+
 @contextlib.contextmanager
 def cursor(
     name: str,
@@ -135,7 +231,7 @@ def cursor(
     ) as span:
         try:
             source = get() if connection is None else connection
-            with source as connection:
+            with source as connection, _deadline_busy_timeout(connection):
                 c = connection.cursor()
                 with contextlib.closing(c):
                     with telemetry.record_database_latency(name):
@@ -204,6 +300,7 @@ def insert(client_id: types.ClientId, token: types.EncryptedToken) -> None:
                 _prepare_timestamp(now),
             ),
         )
+        _log_changes(c, [client_id])
 
     telemetry.request_refresh()
 
@@ -246,6 +343,8 @@ def update(client_id: types.ClientId, token: types.EncryptedToken | None) -> int
         )
         trace.get_current_span().add_event("Update result", {"rows": c.rowcount})
         rowcount = int(c.rowcount)
+        if rowcount:
+            _log_changes(c, [client_id])
 
     if rowcount:
         telemetry.request_refresh()
@@ -253,6 +352,314 @@ def update(client_id: types.ClientId, token: types.EncryptedToken | None) -> int
     return rowcount
 
 
+def _generation_cache() -> TTLCache[types.ClientId, int | None]:
+    cache = current_app.extensions.get("oauth_grant_generation_cache")
+    if cache is None:
+        cache = TTLCache[types.ClientId, int | None](
+            current_settings.stateless_generation_cache_seconds
+        )
+        current_app.extensions["oauth_grant_generation_cache"] = cache
+    return cache
+
+
+def lookup_generation(client_id: types.ClientId) -> int | None:
+    """Lookup the newest accepted stateless grant generation for a client.
+
+    Returns zero for clients that have never rotated and None if the grant is
+    revoked. Results are cached in-process for a short while.
+    """
+    cache = _generation_cache()
+    found, generation = cache.get(client_id)
+    if found:
+        return generation
+
+    with cursor(name="lookup_generation") as c:
+        c.execute(
+            "SELECT generation FROM grant_generations WHERE client_id = ?",
+            (str(client_id),),
+        )
+        row = c.fetchone()
+
+    if row is None:
+        generation = 0
+    elif row[0] is None:
+        generation = None
+    else:
+        generation = int(row[0])
+
+    cache.set(client_id, generation)
+    return generation
+
+
+def update_generation(client_id: types.ClientId, generation: int | None) -> None:
+    """Advance the accepted stateless grant generation, or revoke it with None.
+
+    Generations only move forward and a revoked grant stays revoked, so
+    concurrent rotations can not resurrect an older grant.
+    """
+
+    now = _prepare_timestamp(time_utils.utcnow())
+    with cursor(name="update_generation", transaction=True) as c:
+        if generation is None:
+            c.execute(
+                (
+                    "INSERT INTO grant_generations "
+                    "(client_id, generation, last_updated_at) VALUES (?, NULL, ?) "
+                    "ON CONFLICT(client_id) DO UPDATE SET "
+                    "generation = NULL, last_updated_at = excluded.last_updated_at"
+                ),
+                (str(client_id), now),
+            )
+        else:
+            c.execute(
+                (
+                    "INSERT INTO grant_generations "
+                    "(client_id, generation, last_updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(client_id) DO UPDATE SET "
+                    "generation = max(generation, excluded.generation), "
+                    "last_updated_at = excluded.last_updated_at "
+                    "WHERE grant_generations.generation IS NOT NULL"
+                ),
+                (str(client_id), generation, now),
+            )
+
+    _generation_cache().discard(client_id)
+
+
+def iter_records(batch_size: int = 1000) -> Generator[TokenRecord, None, None]:
+    """Stream every token record, fetching at most `batch_size` rows at a time.
+
+    The export runs as a single read in WAL mode, so writers are not blocked
+    while it is consumed.
+    """
+    with cursor(name="export_tokens") as c:
+        c.execute("SELECT client_id, token, created_at, last_updated_at FROM tokens")
+        while rows := c.fetchmany(batch_size):
+            for row in rows:
+                yield TokenRecord(
+                    client_id=validate_client_id(_text(row[0])),
+                    encrypted_token=types.EncryptedToken(bytes(row[1]))
+                    if row[1]
+                    else None,
+                    created_at=_parse_datetime(row[2]),
+                    last_updated_at=_parse_datetime(row[3]),
+                )
+
+
+def insert_records(
+    records: Iterable[TokenRecord], replace: bool = False, batch_size: int = 1000
+) -> int:
+    """Insert token records in one transaction per batch.
+
+    Existing client_ids are kept unless `replace` is set. Returns the number of
+    rows written.
+    """
+    conflict = "REPLACE" if replace else "IGNORE"
+    written = 0
+    for batch in itertools.batched(records, batch_size):
+        with cursor(name="import_tokens", transaction=True) as c:
+            c.executemany(
+                (
+                    f"INSERT OR {conflict} INTO tokens "
+                    "(client_id, token, created_at, last_updated_at) VALUES (?, ?, ?, ?)"
+                ),
+                [
+                    (
+                        str(record.client_id),
+                        _prepare_token(record.encrypted_token),
+                        _prepare_timestamp(record.created_at),
+                        _prepare_timestamp(record.last_updated_at),
+                    )
+                    for record in batch
+                ],
+            )
+            written += c.rowcount
+            _log_changes(c, [record.client_id for record in batch])
+
+    if written:
+        telemetry.request_refresh()
+
+    return written
+
+
+def iter_generations(
+    batch_size: int = 1000,
+) -> Generator[GenerationRecord, None, None]:
+    """Stream every stateless grant generation in `batch_size` chunks."""
+    with cursor(name="export_generations") as c:
+        c.execute(
+            "SELECT client_id, generation, last_updated_at FROM grant_generations"
+        )
+        while rows := c.fetchmany(batch_size):
+            for row in rows:
+                yield GenerationRecord(
+                    client_id=validate_client_id(_text(row[0])),
+                    generation=None if row[1] is None else int(row[1]),
+                    last_updated_at=_parse_datetime(row[2]),
+                )
+
+
+def insert_generations(
+    records: Iterable[GenerationRecord], batch_size: int = 1000
+) -> int:
+    """Merge stateless grant generations in one transaction per batch.
+
+    Merging follows `update_generation`: newer generations and revocations win.
+    """
+    written = 0
+    for batch in itertools.batched(records, batch_size):
+        with cursor(name="import_generations", transaction=True) as c:
+            c.executemany(
+                (
+                    "INSERT INTO grant_generations "
+                    "(client_id, generation, last_updated_at) VALUES (?, ?, ?) "
+                    "ON CONFLICT(client_id) DO UPDATE SET "
+                    "generation = CASE WHEN excluded.generation IS NULL THEN NULL "
+                    "ELSE max(generation, excluded.generation) END, "
+                    "last_updated_at = excluded.last_updated_at "
+                    "WHERE grant_generations.generation IS NOT NULL"
+                ),
+                [
+                    (
+                        str(record.client_id),
+                        record.generation,
+                        _prepare_timestamp(record.last_updated_at),
+                    )
+                    for record in batch
+                ],
+            )
+            written += c.rowcount
+
+    _generation_cache().clear()
+    return written
+
+
+def _log_changes(c: sqlite3.Cursor, client_ids: Iterable[types.ClientId]) -> None:
+    """Append the current rows for `client_ids` to the change log, if enabled.
+
+    Must be called in the transaction that wrote the rows, so replicas never
+    see a write that was rolled back.
+    """
+    if not current_settings.replication.change_log:
+        return
+
+    now = _prepare_timestamp(time_utils.utcnow())
+    c.executemany(
+        (
+            "INSERT INTO changes "
+            "(client_id, token, created_at, last_updated_at, changed_at) "
+            "SELECT client_id, token, created_at, last_updated_at, ? "
+            "FROM tokens WHERE client_id = ?"
+        ),
+        [(now, str(client_id)) for client_id in client_ids],
+    )
+
+
+def iter_changes(after: int, limit: int = 1000) -> list[ChangeRecord]:
+    """Return at most `limit` changes with a sequence number above `after`.
+
+    Raises a LookupError if changes after `after` have already been pruned.
+    """
+    with cursor(name="lookup_changes") as c:
+        c.execute("SELECT min(seq) FROM changes")
+        first = c.fetchone()[0]
+        if first is None:
+            c.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'")
+            row = c.fetchone()
+            first = 1 if row is None else int(row[0]) + 1
+        if after < first - 1:
+            raise LookupError("Changes have been pruned.")
+
+        c.execute(
+            "SELECT seq, client_id, token, created_at, last_updated_at "
+            "FROM changes WHERE seq > ? ORDER BY seq LIMIT ?",
+            (after, limit),
+        )
+        rows = c.fetchall()
+
+    return [
+        ChangeRecord(
+            seq=int(row[0]),
+            record=TokenRecord(
+                client_id=validate_client_id(_text(row[1])),
+                encrypted_token=types.EncryptedToken(bytes(row[2])) if row[2] else None,
+                created_at=_parse_datetime(row[3]),
+                last_updated_at=_parse_datetime(row[4]),
+            ),
+        )
+        for row in rows
+    ]
+
+
+def last_change_seq() -> int:
+    """Return the sequence number of the newest change, or zero."""
+    with cursor(name="lookup_last_change") as c:
+        c.execute("SELECT max(seq) FROM changes")
+        return int(c.fetchone()[0] or 0)
+
+
+def apply_changes(changes: Iterable[ChangeRecord]) -> int:
+    """Write changes shipped from a primary in a single transaction.
+
+    Changes overwrite the local rows in order and are kept in the local change
+    log, which is what tracks how far a replica has come.
+    """
+    changes = list(changes)
+    now = _prepare_timestamp(time_utils.utcnow())
+    with cursor(name="apply_changes", transaction=True) as c:
+        for change in changes:
+            record = change.record
+            values = (
+                str(record.client_id),
+                _prepare_token(record.encrypted_token),
+                _prepare_timestamp(record.created_at),
+                _prepare_timestamp(record.last_updated_at),
+            )
+            c.execute(
+                (
+                    "INSERT INTO tokens "
+                    "(client_id, token, created_at, last_updated_at) "
+                    "VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(client_id) DO UPDATE SET "
+                    "token = excluded.token, "
+                    "created_at = excluded.created_at, "
+                    "last_updated_at = excluded.last_updated_at "
+                    # Don't let a lagging change undo a newer forwarded write.
+                    "WHERE excluded.last_updated_at >= tokens.last_updated_at "
+                    "OR tokens.last_updated_at IS NULL"
+                ),
+                values,
+            )
+            c.execute(
+                (
+                    "INSERT OR IGNORE INTO changes "
+                    "(seq, client_id, token, created_at, last_updated_at, changed_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)"
+                ),
+                (change.seq, *values, now),
+            )
+
+    if changes:
+        telemetry.request_refresh()
+
+    return len(changes)
+
+
+def prune_changes(before: datetime) -> int:
+    """Delete changes older than `before`, always keeping the newest one."""
+    with cursor(name="prune_changes", transaction=True) as c:
+        c.execute(
+            "DELETE FROM changes WHERE changed_at < ? "
+            "AND seq < (SELECT max(seq) FROM changes)",
+            (_prepare_timestamp(before),),
+        )
+        return int(c.rowcount)
+
+
+def _text(value: Any) -> str:
+    return value.decode("ascii") if isinstance(value, bytes) else str(value)
+
+
 def token_state_counts() -> dict[str, int]:
     """Count stored token records by coarse database state."""
 
@@ -0,0 +1,81 @@
+"""Request deadlines carried in context to bound upstream and database waits.
+
+Callers can send an absolute Unix time in `X-Request-Deadline` or a gRPC
+style relative `grpc-timeout`, both capped by `request_budget_seconds`. Work
+for a request checks `remaining` and gives up once the caller can no longer
+use the answer.
+"""
+
+import contextvars
+import math
+import re
+import time
+
+import flask
+from opentelemetry import trace
+from werkzeug.datastructures import Headers
+
+from oauthclientbridge.settings import current_settings
+
+_expires_at: contextvars.ContextVar[float | None] = contextvars.ContextVar(
+    "oauth_request_deadline", default=None
+)
+
+_GRPC_TIMEOUT_RE = re.compile(r"^([0-9]{1,8})([HMSmun])$")
+_GRPC_TIMEOUT_UNITS = {
+    "H": 3600.0,
+    "M": 60.0,
+    "S": 1.0,
+    "m": 1e-3,
+    "u": 1e-6,
+    "n": 1e-9,
+}
+
+
+def remaining() -> float | None:
+    """Seconds left before the current request's deadline, None without one."""
+    expires_at = _expires_at.get()
+    if expires_at is None:
+        return None
+    return expires_at - time.monotonic()
+
+
+def set_remaining(seconds: float | None) -> None:
+    """Give the current context a deadline `seconds` from now, or none."""
+    _expires_at.set(None if seconds is None else time.monotonic() + seconds)
+
+
+def start_request() -> None:
+    """Set the deadline for the current request from its headers and budget."""
+    budgets = [
+        current_settings.request_budget_seconds,
+        from_headers(flask.request.headers),
+    ]
+    seconds = min((b for b in budgets if b is not None), default=None)
+    set_remaining(seconds)
+    if seconds is not None:
+        trace.get_current_span().set_attribute("request.deadline", seconds)
+
+
+def from_headers(headers: Headers) -> float | None:
+    """Seconds until the earliest deadline the request headers ask for."""
+    found: list[float] = []
+    if value := headers.get("X-Request-Deadline"):
+        try:
+            deadline = float(value)
+        except ValueError:
+            deadline = math.nan
+        if math.isfinite(deadline):
+            found.append(deadline - time.time())
+    if (value := headers.get("grpc-timeout")) and (
+        timeout := parse_grpc_timeout(value)
+    ) is not None:
+        found.append(timeout)
+    return min(found, default=None)
+
+
+def parse_grpc_timeout(value: str) -> float | None:
+    match = _GRPC_TIMEOUT_RE.match(value.strip())
+    if match is None:
+        return None
+    return int(match.group(1)) * _GRPC_TIMEOUT_UNITS[match.group(2)]
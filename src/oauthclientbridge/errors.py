@@ -1,5 +1,7 @@
 from enum import StrEnum
 
+from oauthclientbridge.utils import json as json_utils
+
 
 class OAuthError(StrEnum):
     ACCESS_DENIED = "access_denied"
@@ -25,6 +27,13 @@ class OAuthError(StrEnum):
             "error_description": description or self.description,
         }
 
+    def body(self, description: str | None = None) -> bytes:
+        """Serialized `json`, with the default description pre-serialized."""
+        if description is None or description == _DESCRIPTIONS.get(self):
+            if (body := _BODIES.get(self)) is not None:
+                return body
+        return _serialize(self.json(description))
+
 
 _DESCRIPTIONS: dict[OAuthError, str] = {
     OAuthError.INVALID_REQUEST: (
@@ -65,3 +74,13 @@ _DESCRIPTIONS: dict[OAuthError, str] = {
         "temporary overloading or maintenance of the server."
     ),
 }
+
+
+def _serialize(result: dict[str, str]) -> bytes:
+    # Sorted and newline terminated, like Flask's jsonify.
+    return json_utils.dumps(result, sort_keys=True) + b"\n"
+
+
+_BODIES: dict[OAuthError, bytes] = {
+    error: _serialize(error.json()) for error in _DESCRIPTIONS
+}
@@ -0,0 +1,159 @@
+"""Clients and User-Agents sending the most /token requests.
+
+Each process counts requests in a `SpaceSaving` sketch per kind, halving the
+counts every `heavy_hitters_decay_seconds` so rankings follow recent traffic.
+With `heavy_hitters_directory` set, processes publish their sketches there
+every few seconds and readers merge them, giving a view across workers. The
+ranking is exported by rank only to keep metric cardinality bounded, the
+keys themselves are only served by the admin endpoint.
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+import structlog
+
+from oauthclientbridge import client, telemetry
+from oauthclientbridge.settings import current_settings
+from oauthclientbridge.utils.sketch import SpaceSaving
+
+logger: structlog.BoundLogger = structlog.get_logger()
+
+KINDS = ("client_id", "user_agent")
+_PUBLISH_SECONDS = 5.0
+
+
+class HeavyHitters:
+    """Decaying request counts of each kind in this process."""
+
+    def __init__(
+        self, capacity: int, decay_seconds: float, directory: Path | None = None
+    ) -> None:
+        self._capacity = capacity
+        self._decay_seconds = decay_seconds
+        self._directory = directory
+        self._sketches = {kind: SpaceSaving(capacity) for kind in KINDS}
+        self._decayed_at = time.monotonic()
+        self._published_at = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, client_id: str, user_agent: str) -> None:
+        now = time.monotonic()
+        data: str | None = None
+        with self._lock:
+            self._decay(now)
+            self._sketches["client_id"].add(client_id)
+            self._sketches["user_agent"].add(user_agent)
+            if (
+                self._directory is not None
+                and now - self._published_at >= _PUBLISH_SECONDS
+            ):
+                self._published_at = now
+                data = json.dumps({k: s.dump() for k, s in self._sketches.items()})
+
+        if data is not None:
+            self._publish(data)
+
+    def merged(self) -> dict[str, SpaceSaving]:
+        """Sketches of this process merged with those other workers published."""
+        with self._lock:
+            self._decay(time.monotonic())
+            merged = {k: SpaceSaving(self._capacity) for k in KINDS}
+            for kind, sketch in self._sketches.items():
+                merged[kind].merge(sketch)
+
+        for path in self._published():
+            try:
+                published = json.loads(path.read_text())
+                for kind in KINDS:
+                    sketch = SpaceSaving.load(self._capacity, published[kind])
+                    merged[kind].merge(sketch)
+            except (OSError, ValueError, KeyError, TypeError):
+                logger.warning("Skipping unreadable heavy hitters", path=str(path))
+        return merged
+
+    def _decay(self, now: float) -> None:
+        periods = int((now - self._decayed_at) / self._decay_seconds)
+        if periods:
+            for sketch in self._sketches.values():
+                sketch.scale(0.5**periods)
+            self._decayed_at += periods * self._decay_seconds
+
+    def _path(self) -> Path:
+        assert self._directory is not None
+        return self._directory / f"heavy-hitters-{os.getpid()}.json"
+
+    def _publish(self, data: str) -> None:
+        path = self._path()
+        tmp = path.with_suffix(".tmp")
+        try:
+            _ = tmp.write_text(data)
+            _ = tmp.replace(path)
+        except OSError:
+            logger.warning("Publishing heavy hitters failed", path=str(path))
+
+    def _published(self) -> list[Path]:
+        """Fresh files from other processes, ones from dead workers age out."""
+        if self._directory is None:
+            return []
+        own = self._path()
+        oldest = time.time() - self._decay_seconds
+        found: list[Path] = []
+        for path in self._directory.glob("heavy-hitters-*.json"):
+            try:
+                if path != own and path.stat().st_mtime >= oldest:
+                    found.append(path)
+            except OSError:
+                continue
+        return found
+
+
+def record(client_id: str | None, user_agent: str) -> None:
+    """Count a /token request."""
+    if (tracker := _get_current()) is None:
+        return
+    tracker.record(client.normalize_client_id(client_id or ""), user_agent)
+
+
+def top() -> dict[str, list[tuple[str, float, float]]]:
+    """Top keys of each kind across workers with counts and possible overcount."""
+    if (tracker := _get_current()) is None:
+        return {kind: [] for kind in KINDS}
+
+    result: dict[str, list[tuple[str, float, float]]] = {}
+    for kind, sketch in tracker.merged().items():
+        ranked = sketch.top(current_settings.heavy_hitters_top)
+        result[kind] = [(key, count, sketch.error(key)) for key, count in ranked]
+    return result
+
+
+def update_metrics() -> None:
+    """Export the current ranking, by rank, as gauges."""
+    if _get_current() is None:
+        return
+    for kind, ranked in top().items():
+        telemetry.set_top_requests(
+            kind, [count for _, count, _ in ranked], current_settings.heavy_hitters_top
+        )
+
+
+def _get_current() -> HeavyHitters | None:
+    if not current_settings.heavy_hitters_capacity:
+        return None
+    return get_heavy_hitters(
+        current_settings.heavy_hitters_capacity,
+        current_settings.heavy_hitters_decay_seconds,
+        current_settings.heavy_hitters_directory,
+    )
+
+
+@functools.lru_cache()
+def get_heavy_hitters(
+    capacity: int, decay_seconds: float, directory: Path | None = None
+) -> HeavyHitters:
+    """Process-local heavy hitters, published to `directory` when set."""
+    return HeavyHitters(capacity, decay_seconds, directory)
@@ -3,6 +3,8 @@ from ._core import (
     error_handler,
     fallback_error_handler,
     fetch,
+    fetch_async,
+    fetch_queued,
     nocache,
     redirect,
     sanitize_for_logging,
@@ -15,6 +17,7 @@ from ._outcome import (
     token_endpoint_outcome,
     validate_token,
 )
+from ._transport import user_agent
 
 __all__ = [
     "Error",
@@ -23,11 +26,14 @@ __all__ = [
     "error_handler",
     "fallback_error_handler",
     "fetch",
+    "fetch_async",
+    "fetch_queued",
     "normalize_error",
     "nocache",
     "redirect",
     "sanitize_for_logging",
     "scrub_refresh_token",
     "token_endpoint_outcome",
+    "user_agent",
     "validate_token",
 ]
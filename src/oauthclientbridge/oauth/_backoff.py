@@ -0,0 +1,89 @@
+import functools
+import math
+import re
+import threading
+import time
+from collections.abc import Mapping
+from pathlib import Path
+
+import structlog
+
+from oauthclientbridge.utils.shared import SharedValue
+
+logger: structlog.BoundLogger = structlog.get_logger()
+
+_RATE_LIMIT_HEADERS = (
+    ("ratelimit-remaining", "ratelimit-reset"),
+    ("x-ratelimit-remaining", "x-ratelimit-reset"),
+)
+# Reset values above this are epoch timestamps rather than delays in seconds.
+_EPOCH_THRESHOLD = 10**9
+
+
+class UpstreamBackoff:
+    """Time until which the provider asked us not to send it requests.
+
+    Process-local unless given a `path`, in which case the deadline is kept in
+    a `SharedValue` that every worker process maps. Wall clock time is stored
+    so the deadline means the same thing in every process.
+    """
+
+    def __init__(self, maximum: float, path: Path | None = None) -> None:
+        self._maximum = maximum
+        self._shared = SharedValue(path, 0) if path is not None else None
+        self._until = 0.0
+        self._lock = threading.Lock()
+
+    def block(self, seconds: float) -> None:
+        """Hold off upstream requests for `seconds`, capped at the maximum."""
+        if seconds <= 0:
+            return
+
+        until = time.time() + min(seconds, self._maximum)
+        if self._shared is None:
+            with self._lock:
+                extended = until > self._until
+                self._until = max(self._until, until)
+        else:
+            with self._shared.locked():
+                extended = until > self._shared.value
+                self._shared.value = max(self._shared.value, until)
+
+        if extended:
+            logger.info("Upstream asked us to back off", seconds=seconds)
+
+    def remaining(self) -> int:
+        """Whole seconds left before requests may be sent, zero when unblocked."""
+        until = self._until if self._shared is None else self._shared.value
+        return max(0, math.ceil(until - time.time()))
+
+
+def parse_rate_limit_reset(headers: Mapping[str, str]) -> int:
+    """Seconds until an exhausted rate limit resets, zero if not exhausted.
+
+    Understands both the `RateLimit-*` draft headers and the common
+    `X-RateLimit-*` ones, where the reset is either a delay or a timestamp.
+    """
+    for remaining_header, reset_header in _RATE_LIMIT_HEADERS:
+        remaining = headers.get(remaining_header, "").strip()
+        reset = headers.get(reset_header, "").strip()
+        if remaining != "0" or not re.match(r"^[0-9]+$", reset):
+            continue
+
+        seconds = int(reset)
+        if seconds > _EPOCH_THRESHOLD:
+            seconds = math.ceil(seconds - time.time())
+        return max(0, seconds)
+    return 0
+
+
+@functools.lru_cache()
+def get_upstream_backoff(
+    maximum: float, provider: str | None = None, directory: Path | None = None
+) -> UpstreamBackoff:
+    """Upstream backoff per provider, process-local unless `directory` is set."""
+    if directory is None:
+        return UpstreamBackoff(maximum)
+
+    name = re.sub(r"[^\w.-]", "_", provider or "default")
+    return UpstreamBackoff(maximum, directory / f"upstream-backoff-{name}")
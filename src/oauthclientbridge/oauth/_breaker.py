@@ -0,0 +1,178 @@
+import collections
+import functools
+import math
+import random
+import threading
+import time
+from enum import StrEnum
+
+import structlog
+from opentelemetry import trace
+
+from oauthclientbridge import telemetry
+
+from ._outcome import UpstreamResult
+
+logger: structlog.BoundLogger = structlog.get_logger()
+
+_FAILURES = frozenset(
+    {UpstreamResult.SERVER_ERROR, UpstreamResult.RATE_LIMITED, UpstreamResult.TIMEOUT}
+)
+_RAMP_START = 0.1
+
+
+class BreakerState(StrEnum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Stop sending attempts to an upstream endpoint that keeps failing.
+
+    Opens once `failure_rate` of the last `window` attempts failed, with at
+    least `minimum_requests` seen. After `open_seconds` up to `probes` attempts
+    are let through, closing the breaker if all succeed and reopening it on
+    the first failure. Once closed, the share of attempts let through ramps up
+    linearly over `ramp_seconds` so recovering providers are not flooded.
+    """
+
+    def __init__(
+        self,
+        window: int,
+        failure_rate: float,
+        minimum_requests: int,
+        open_seconds: float,
+        probes: int,
+        ramp_seconds: float,
+        provider: str | None = None,
+        endpoint: str = "",
+    ) -> None:
+        self._results: collections.deque[bool] = collections.deque(maxlen=window)
+        self._failure_rate = failure_rate
+        self._minimum_requests = minimum_requests
+        self._open_seconds = open_seconds
+        self._probes = probes
+        self._ramp_seconds = ramp_seconds
+        self._provider = provider
+        self._endpoint = endpoint
+
+        self._state = BreakerState.CLOSED
+        self._changed_at = -math.inf
+        self._probes_sent = 0
+        self._probes_succeeded = 0
+        self._lock = threading.Lock()
+        telemetry.record_client_breaker_state(provider, endpoint, self._state)
+
+    @property
+    def state(self) -> BreakerState:
+        return self._state
+
+    def allow(self) -> BreakerState | None:
+        """Admit an attempt, returning the state to pass to `record`.
+
+        None means the attempt must not be sent, see `retry_after`.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if (
+                self._state == BreakerState.OPEN
+                and now - self._changed_at >= self._open_seconds
+            ):
+                self._transition(BreakerState.HALF_OPEN, now)
+
+            if self._state == BreakerState.OPEN:
+                return None
+            elif self._state == BreakerState.HALF_OPEN:
+                if self._probes_sent >= self._probes:
+                    return None
+                self._probes_sent += 1
+            elif random.random() >= self._admitted_share(now):
+                return None
+            return self._state
+
+    def record(self, admitted: BreakerState, result: UpstreamResult) -> None:
+        """Record how an attempt admitted in `admitted` went."""
+        with self._lock:
+            now = time.monotonic()
+            failed = result in _FAILURES
+            if admitted == BreakerState.HALF_OPEN:
+                if self._state != BreakerState.HALF_OPEN:
+                    return
+                if failed:
+                    self._transition(BreakerState.OPEN, now)
+                elif result != UpstreamResult.REJECTED:
+                    self._probes_succeeded += 1
+                    if self._probes_succeeded >= self._probes:
+                        self._transition(BreakerState.CLOSED, now)
+                else:
+                    self._probes_sent -= 1
+            elif (
+                self._state == BreakerState.CLOSED and result != UpstreamResult.REJECTED
+            ):
+                self._results.append(failed)
+                failures = sum(self._results)
+                if len(
+                    self._results
+                ) >= self._minimum_requests and failures >= self._failure_rate * len(
+                    self._results
+                ):
+                    self._transition(BreakerState.OPEN, now)
+
+    def retry_after(self) -> int:
+        """Seconds until the breaker may admit attempts again."""
+        with self._lock:
+            if self._state != BreakerState.OPEN:
+                return 1
+            remaining = self._changed_at + self._open_seconds - time.monotonic()
+            return max(1, math.ceil(remaining))
+
+    def _admitted_share(self, now: float) -> float:
+        if self._ramp_seconds <= 0:
+            return 1.0
+        elapsed = (now - self._changed_at) / self._ramp_seconds
+        return min(1.0, max(_RAMP_START, elapsed))
+
+    def _transition(self, state: BreakerState, now: float) -> None:
+        previous, self._state, self._changed_at = self._state, state, now
+        self._probes_sent = self._probes_succeeded = 0
+        self._results.clear()
+
+        trace.get_current_span().add_event(
+            "Circuit breaker state change",
+            {"from": previous.value, "to": state.value, "endpoint": self._endpoint},
+        )
+        log = logger.warning if state == BreakerState.OPEN else logger.info
+        log(
+            "Circuit breaker state change",
+            endpoint=self._endpoint,
+            previous=previous.value,
+            state=state.value,
+        )
+        telemetry.record_client_breaker_state(
+            self._provider, self._endpoint, state, previous
+        )
+
+
+@functools.lru_cache()
+def get_circuit_breaker(
+    window: int,
+    failure_rate: float,
+    minimum_requests: int,
+    open_seconds: float,
+    probes: int,
+    ramp_seconds: float,
+    provider: str | None = None,
+    endpoint: str = "",
+) -> CircuitBreaker:
+    """Process-local breaker per provider and upstream endpoint."""
+    return CircuitBreaker(
+        window,
+        failure_rate,
+        minimum_requests,
+        open_seconds,
+        probes,
+        ramp_seconds,
+        provider,
+        endpoint,
+    )
@@ -1,22 +1,39 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import copy
+import dataclasses
 import email.utils
 import functools
-import importlib.metadata
+import hashlib
+import math
 import random
 import re
+import threading
 import time
+from collections.abc import Callable, Generator
 from http import HTTPStatus
-from typing import Any, override
+from typing import Any, cast, override
 
 import flask
 import requests
 import structlog
 from opentelemetry import metrics, trace
 
-from oauthclientbridge import telemetry
+from oauthclientbridge import deadline as request_deadline
+from oauthclientbridge import runtime, telemetry
 from oauthclientbridge.errors import OAuthError
 from oauthclientbridge.settings import current_settings
+from oauthclientbridge.utils import json as json_utils
 from oauthclientbridge.utils import uri as uri_utils
-
+from oauthclientbridge.utils.asgi import Finished, ThreadedSteps
+from oauthclientbridge.utils.bucket import Bucket, SharedBucket
+
+from ._backoff import UpstreamBackoff, get_upstream_backoff, parse_rate_limit_reset
+from ._breaker import BreakerState, CircuitBreaker, get_circuit_breaker
+from ._executor import Expired, QueueFull, get_refresh_executor
+from ._latency import LatencyTracker, get_latency_tracker
+from ._limit import ConcurrencyLimit, LimitExceeded, get_concurrency_limit
 from ._outcome import (
     OAuthResponse,
     UpstreamResult,
@@ -24,12 +41,14 @@ from ._outcome import (
     upstream_result_for_status,
 )
 from ._retry import (
+    HedgeOutcome,
     RetryAttemptKind,
     RetryDecision,
     RetryDecisionAction,
     RetryReason,
     get_retry_limiter,
 )
+from ._transport import get_async_transport, get_transport
 
 logger: structlog.BoundLogger = structlog.get_logger()
 _otel_scope = __package__ or __name__
@@ -60,15 +79,6 @@ _oauth_client_retries_histogram = meter.create_histogram(
 URIParam = dict[str, str]
 
 
-@functools.lru_cache()
-def get_session():
-    session = requests.Session()
-    session.headers["User-Agent"] = "oauthclientbridge %s" % importlib.metadata.version(
-        "oauthclientbridge"
-    )
-    return session
-
-
 class Error(Exception):
     def __init__(
         self,
@@ -90,20 +100,19 @@ class Error(Exception):
 
 def error_handler(e: Error) -> flask.Response:
     """Create a well formed JSON response with status and auth headers."""
-    result: dict[str, str] = {
-        "error": e.error.value,
-        "error_description": e.description,
-    }
-
-    if e.uri is not None:
-        result["error_uri"] = e.uri
-
-    response = flask.jsonify(result)
+    if e.uri is None:
+        response = _json_response(e.error.body(e.description))
+    else:
+        response = flask.jsonify(
+            {
+                "error": e.error.value,
+                "error_description": e.description,
+                "error_uri": e.uri,
+            }
+        )
     if e.error == OAuthError.INVALID_CLIENT:
         response.status_code = HTTPStatus.UNAUTHORIZED
-        response.headers["WWW-Authenticate"] = (
-            f'Basic realm="{current_settings.auth_realm}"'
-        )
+        response.headers["WWW-Authenticate"] = runtime.get().www_authenticate
     elif e.error == OAuthError.TEMPORARILY_UNAVAILABLE:
         response.status_code = HTTPStatus.SERVICE_UNAVAILABLE
         if e.retry_after is not None:
@@ -133,11 +142,15 @@ def fallback_error_handler(e: Exception) -> flask.Response:
     current_span.record_exception(e)
     current_span.set_status(trace.Status(trace.StatusCode.ERROR, str(e)))
 
-    response = flask.jsonify(OAuthError.SERVER_ERROR.json())
+    response = _json_response(OAuthError.SERVER_ERROR.body())
     response.status_code = HTTPStatus.INTERNAL_SERVER_ERROR
     return response
 
 
+def _json_response(body: bytes) -> flask.Response:
+    return flask.current_app.response_class(body, mimetype="application/json")
+
+
 def nocache(response: flask.Response) -> flask.Response:
     """Turns off caching in case there is sensitive content in responses."""
     if "Cache-Control" not in response.headers:
@@ -166,10 +179,178 @@ def _record_retry_decision(endpoint: str, decision: RetryDecision) -> None:
     telemetry.record_retry_decision(endpoint, decision.action, decision.reason)
 
 
+@dataclasses.dataclass(frozen=True)
+class _Hedge:
+    """Second copy of a send to race against the first once `delay` passed."""
+
+    delay: float
+    budget: Bucket | SharedBucket
+    endpoint: str
+
+    def start(self, span: trace.Span) -> bool:
+        if not self.budget.consume():
+            telemetry.record_client_hedge(self.endpoint, HedgeOutcome.SKIPPED)
+            return False
+        span.add_event("Hedging", {"delay": self.delay})
+        return True
+
+    def finish(self, won: bool) -> None:
+        outcome = HedgeOutcome.WON if won else HedgeOutcome.LOST
+        telemetry.record_client_hedge(self.endpoint, outcome)
+
+
+@dataclasses.dataclass(frozen=True)
+class _Send:
+    span: trace.Span
+    prepared: requests.PreparedRequest
+    timeout: float
+    endpoint: str
+    hedge: _Hedge | None = None
+
+
+@dataclasses.dataclass(frozen=True)
+class _Sleep:
+    seconds: float
+
+
+_FetchResult = tuple[OAuthResponse, HTTPStatus | None, int]
+_FetchSteps = Generator[_Send | _Sleep, _FetchResult | None, OAuthResponse]
+
+
+class _HedgePool:
+    """
+    Threads racing hedged sends. Each send reserves a thread up front, so work
+    never queues behind busy threads and callers can fall back to sending
+    inline instead.
+    """
+
+    def __init__(self, workers: int) -> None:
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            workers, thread_name_prefix="oauth-hedge"
+        )
+        self._threads = threading.BoundedSemaphore(workers)
+
+    def reserve(self) -> bool:
+        return self._threads.acquire(blocking=False)
+
+    def release(self) -> None:
+        self._threads.release()
+
+    def submit(
+        self, fn: Callable[..., _FetchResult], *args: Any
+    ) -> concurrent.futures.Future[_FetchResult]:
+        """Run `fn` on a thread reserved with `reserve`, in a copied context."""
+        future = self._executor.submit(contextvars.copy_context().run, fn, *args)
+        future.add_done_callback(lambda _: self.release())
+        return future
+
+
 def fetch(
     uri: str, endpoint: str, auth: str | None = None, **data: str | None
 ) -> OAuthResponse:
     """Perform post given URI with auth and provided data."""
+    steps = _fetch_steps(uri, endpoint, auth, data)
+    try:
+        step = next(steps)
+        while True:
+            try:
+                if isinstance(step, _Sleep):
+                    time.sleep(step.seconds)
+                    reply = None
+                else:
+                    reply = _send(step)
+            except Exception as e:
+                step = steps.throw(e)
+            else:
+                step = steps.send(reply)
+    except StopIteration as stop:
+        return stop.value
+
+
+async def fetch_async(
+    uri: str, endpoint: str, auth: str | None = None, **data: str | None
+) -> OAuthResponse:
+    """Async `fetch`, backoff and upstream requests do not block the loop.
+
+    The steps in between, retry budget and breaker bookkeeping that may take
+    file locks, run in worker threads.
+    """
+    steps = ThreadedSteps(_fetch_steps(uri, endpoint, auth, data))
+    try:
+        step = await steps.send(None)
+        while True:
+            try:
+                if isinstance(step, _Sleep):
+                    await asyncio.sleep(step.seconds)
+                    reply = None
+                else:
+                    reply = await _send_async(step)
+            except Exception as e:
+                step = await steps.throw(e)
+            else:
+                step = await steps.send(reply)
+    except Finished as done:
+        return cast(OAuthResponse, done.value)
+
+
+def fetch_queued(
+    uri: str, endpoint: str, auth: str | None = None, **data: str | None
+) -> OAuthResponse:
+    """`fetch` on the refresh executor, waiting at most until the deadline.
+
+    Identical requests in flight share one upstream fetch. A full queue or a
+    result that does not arrive in time gives temporarily_unavailable. Runs
+    on the calling thread when no refresh workers are configured.
+    """
+    settings = current_settings.fetch
+    if not settings.refresh_workers:
+        return fetch(uri, endpoint, auth, **data)
+
+    provider = current_settings.otel.oauth_provider
+    executor = get_refresh_executor(
+        settings.refresh_workers, settings.refresh_queue_size, provider
+    )
+    wait = settings.total_timeout
+    if (left := request_deadline.remaining()) is not None:
+        wait = max(0.0, min(wait, left))
+
+    # Carries the trace context over to the worker, with the waiter's expiry
+    # as its deadline so the fetch never outlives the waiter.
+    context = contextvars.copy_context()
+    context.run(request_deadline.set_remaining, wait)
+    work = functools.partial(context.run, fetch, uri, endpoint, auth, **data)
+    try:
+        future = executor.submit(
+            _request_key(uri, endpoint, auth, data), work, time.monotonic() + wait
+        )
+    except QueueFull:
+        return _queue_rejected("Too many refreshes waiting for provider.")
+
+    try:
+        # Waiters sharing a fetch each get their own result to modify.
+        return copy.deepcopy(future.result(timeout=wait))
+    except Expired:
+        # Already counted as expired by the executor.
+        return _queue_rejected("Refresh did not complete in time.")
+    except TimeoutError:
+        telemetry.record_refresh_queue_rejection(provider, "timeout")
+        return _queue_rejected("Refresh did not complete in time.")
+
+
+def _queue_rejected(description: str) -> OAuthResponse:
+    result = OAuthError.TEMPORARILY_UNAVAILABLE.json(description=description)
+    result["retry_after"] = current_settings.fetch.refresh_retry_after
+    return result
+
+
+def _fetch_steps(
+    uri: str, endpoint: str, auth: str | None, data: dict[str, str | None]
+) -> _FetchSteps:
+    """Retry loop shared by `fetch` and `fetch_async`.
+
+    Yields the sends and sleeps to perform, the caller does the I/O and sends
+    back `_fetch` results, keeping retries and telemetry identical for both.
+    """
     start_time = time.monotonic()
     with tracer.start_as_current_span(f"OAUTH {endpoint}") as span:
         req = requests.Request("POST", uri, data=data, auth=auth)
@@ -177,13 +358,20 @@ def fetch(
         retry_budget = _get_retry_limiter(
             current_settings.fetch.retry_budget_capacity,
             current_settings.fetch.retry_budget_refill_per_initial,
+            current_settings.otel.oauth_provider,
+            current_settings.fetch.retry_budget_directory,
         )
         retry_budget.add(current_settings.fetch.retry_budget_refill_per_initial)
+        breaker = _get_circuit_breaker(endpoint)
+        upstream_backoff = _get_upstream_backoff()
 
         deadline = time.monotonic() + current_settings.fetch.total_timeout
+        if (left := request_deadline.remaining()) is not None:
+            deadline = min(deadline, time.monotonic() + left)
         retry = 0
         completed_retries = 0
         status: HTTPStatus | None = None
+        rejected = False
         pending_retry_decision: RetryDecision | None = None
 
         result: OAuthResponse = OAuthError.SERVER_ERROR.json(
@@ -196,6 +384,8 @@ def fetch(
             remaining_timeout = deadline - time.monotonic()
 
             if pending_retry_decision is not None:
+                if upstream_backoff is not None:
+                    retry = max(retry, upstream_backoff.remaining())
                 if (retry or backoff) > remaining_timeout:
                     _record_retry_decision(
                         endpoint,
@@ -208,6 +398,25 @@ def fetch(
                     logger.debug("Abort %s no timeout remaining.", prefix)
                     break
                 elif (retry or backoff) > 0:
+                    if _defer(endpoint, retry or backoff):
+                        delay = jitter_delay(retry or backoff, preserve_floor=retry > 0)
+                        if retry:
+                            delay = max(retry, delay)
+                        _record_retry_decision(
+                            endpoint,
+                            RetryDecision(
+                                RetryDecisionAction.SKIP,
+                                RetryReason.DEFERRED,
+                            ),
+                        )
+                        span.add_event("Deferring retry", {"delay": delay})
+                        logger.debug("Defer %s [retry after %.3f]", prefix, delay)
+                        result = OAuthError.TEMPORARILY_UNAVAILABLE.json(
+                            description=result.get("error_description")
+                        )
+                        retry = math.ceil(delay)
+                        break
+
                     if not retry_budget.consume():
                         _record_retry_decision(
                             endpoint,
@@ -239,7 +448,7 @@ def fetch(
                     _record_retry_decision(endpoint, pending_retry_decision)
                     span.add_event("Sleeping", {"duration": sleep_for})
                     logger.debug("Retry %s [sleep %.3f]", prefix, sleep_for)
-                    time.sleep(sleep_for)
+                    _ = yield _Sleep(sleep_for)
                     remaining_timeout = deadline - time.monotonic()
                     if remaining_timeout <= 0:
                         _record_retry_decision(
@@ -257,6 +466,32 @@ def fetch(
 
                 pending_retry_decision = None
 
+            if (
+                i == 0
+                and upstream_backoff is not None
+                and (blocked := upstream_backoff.remaining()) > 0
+            ):
+                span.add_event("Upstream backoff")
+                logger.debug("Abort %s provider asked us to back off.", prefix)
+                telemetry.record_client_backoff_rejection(
+                    current_settings.otel.oauth_provider
+                )
+                result = OAuthError.TEMPORARILY_UNAVAILABLE.json(
+                    description="Provider is rate limiting requests."
+                )
+                status, retry, rejected = None, blocked, True
+                break
+
+            admitted: BreakerState | None = None
+            if breaker is not None and (admitted := breaker.allow()) is None:
+                span.add_event("Circuit breaker open")
+                logger.debug("Abort %s circuit breaker open.", prefix)
+                result = OAuthError.TEMPORARILY_UNAVAILABLE.json(
+                    description="Provider is unavailable."
+                )
+                status, retry, rejected = None, breaker.retry_after(), True
+                break
+
             _record_attempt(
                 endpoint,
                 RetryAttemptKind.RETRY
@@ -274,14 +509,40 @@ def fetch(
                 )
                 span.add_event("No timeout remaining")
                 logger.debug("Abort %s no timeout remaining.", prefix)
+                left = request_deadline.remaining()
+                if i == 0 and left is not None and left <= 0:
+                    # The caller gave up already, nothing failed upstream.
+                    result = OAuthError.TEMPORARILY_UNAVAILABLE.json(
+                        description="Request deadline passed before calling provider."
+                    )
+                    retry = current_settings.request_deadline_retry_after
+                    status, rejected = None, True
                 break
 
-            result, status, retry = _fetch(
-                span,
-                prepared,
-                remaining_timeout,
-                endpoint,
-            )
+            attempt_result = UpstreamResult.REJECTED
+            try:
+                hedge = _get_hedge(endpoint, retry_budget, remaining_timeout)
+                fetched = yield _Send(
+                    span, prepared, remaining_timeout, endpoint, hedge
+                )
+                assert fetched is not None
+                result, status, retry = fetched
+                attempt_result = (
+                    UpstreamResult.TIMEOUT
+                    if status is None
+                    else upstream_result_for_status(status)
+                )
+            except LimitExceeded as e:
+                span.add_event("Concurrency limit exceeded")
+                logger.debug("Abort %s concurrency limit exceeded.", prefix)
+                result = OAuthError.TEMPORARILY_UNAVAILABLE.json(
+                    description="Too many concurrent requests to provider."
+                )
+                status, retry, rejected = None, e.retry_after, True
+                break
+            finally:
+                if breaker is not None and admitted is not None:
+                    breaker.record(admitted, attempt_result)
 
             outcome = token_endpoint_outcome(
                 status,
@@ -339,11 +600,12 @@ def fetch(
                     ),
                 )
 
-        final_result = (
-            UpstreamResult.TIMEOUT
-            if status is None
-            else upstream_result_for_status(status)
-        )
+        if rejected:
+            final_result = UpstreamResult.REJECTED
+        elif status is None:
+            final_result = UpstreamResult.TIMEOUT
+        else:
+            final_result = upstream_result_for_status(status)
 
         attributes: dict[str, Any] = {
             "operation": endpoint,
@@ -373,76 +635,340 @@ def fetch(
         return result
 
 
+def _send(step: _Send) -> _FetchResult:
+    """Send a step with `_fetch`, racing a hedge against it if it is slow."""
+    if step.hedge is None:
+        return _fetch(step.span, step.prepared, step.timeout, step.endpoint)
+
+    pool = _get_hedge_pool(current_settings.fetch.hedge_max_concurrency * 2)
+    if not pool.reserve():
+        return _fetch(step.span, step.prepared, step.timeout, step.endpoint)
+
+    primary = pool.submit(_fetch, step.span, step.prepared, step.timeout, step.endpoint)
+    done, _ = concurrent.futures.wait([primary], timeout=step.hedge.delay)
+    if done or not pool.reserve():
+        return primary.result()
+    if not step.hedge.start(step.span):
+        pool.release()
+        return primary.result()
+
+    secondary = pool.submit(
+        _fetch,
+        step.span,
+        step.prepared.copy(),
+        step.timeout - step.hedge.delay,
+        step.endpoint,
+    )
+    pending = {primary, secondary}
+    while pending:
+        done, pending = concurrent.futures.wait(
+            pending, return_when=concurrent.futures.FIRST_COMPLETED
+        )
+        for future in done:
+            if future.exception() is None:
+                # Blocking sends can not be interrupted, so the loser runs
+                # to completion in the background and its result is dropped.
+                step.hedge.finish(won=future is secondary)
+                return future.result()
+    return primary.result()
+
+
+async def _send_async(step: _Send) -> _FetchResult:
+    """Async `_send`, the losing attempt is cancelled."""
+    if step.hedge is None:
+        return await _fetch_async(step.span, step.prepared, step.timeout, step.endpoint)
+
+    primary = asyncio.ensure_future(
+        _fetch_async(step.span, step.prepared, step.timeout, step.endpoint)
+    )
+    tasks = {primary}
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=step.hedge.delay)
+        if done or not step.hedge.start(step.span):
+            return await primary
+
+        secondary = asyncio.ensure_future(
+            _fetch_async(
+                step.span,
+                step.prepared.copy(),
+                step.timeout - step.hedge.delay,
+                step.endpoint,
+            )
+        )
+        tasks.add(secondary)
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                if task.exception() is None:
+                    step.hedge.finish(won=task is secondary)
+                    return task.result()
+        return primary.result()
+    finally:
+        for task in tasks:
+            _ = task.cancel()
+
+
 def _fetch(
     span: trace.Span,
     prepared: requests.PreparedRequest,
     timeout: float,
     endpoint: str,
-) -> tuple[OAuthResponse, HTTPStatus | None, int]:
-    timeout = min(current_settings.fetch.timeout, timeout)
+) -> _FetchResult:
+    limit = _get_concurrency_limit()
+    if limit is not None and not limit.acquire(
+        current_settings.fetch.concurrency_limit_max_wait
+    ):
+        raise _limit_exceeded()
+
+    timeout = min(_attempt_timeout(endpoint), timeout)
     start_time = time.time()
 
-    session = get_session()
-    status = None
+    try:
+        resp = get_transport().send(span, prepared, timeout)
+    except requests.exceptions.RequestException as e:
+        if limit is not None:
+            limit.release(time.time() - start_time, _overloaded(e))
+        return _failed(span, prepared, endpoint, start_time, e)
+    except BaseException:
+        if limit is not None:
+            limit.release()
+        raise
+    if limit is not None:
+        limit.release(time.time() - start_time, _overloaded(resp))
+    return _received(span, endpoint, start_time, resp)
+
+
+async def _fetch_async(
+    span: trace.Span,
+    prepared: requests.PreparedRequest,
+    timeout: float,
+    endpoint: str,
+) -> _FetchResult:
+    limit = _get_concurrency_limit()
+    max_wait = current_settings.fetch.concurrency_limit_max_wait
+    if limit is not None and not await limit.acquire_async(max_wait):
+        raise _limit_exceeded()
+
+    timeout = min(_attempt_timeout(endpoint), timeout)
+    start_time = time.time()
 
     try:
-        resp = session.send(prepared, timeout=timeout)
+        resp = await get_async_transport().send(span, prepared, timeout)
     except requests.exceptions.RequestException as e:
-        request_latency = time.time() - start_time
-        span.record_exception(e)
-        span.add_event("Closing session to get new server")
-        session.close()
-
-        status_label = "unknown_exception"
-        description = "An unknown error occurred while talking to provider."
-        if isinstance(e, requests.exceptions.Timeout):
-            description = "Request timed out while connecting to provider."
-            if isinstance(e, requests.exceptions.ConnectTimeout):
-                status_label = "connection_timeout"
-            elif isinstance(e, requests.exceptions.ReadTimeout):
-                status_label = "read_timeout"
-        elif isinstance(e, requests.exceptions.ConnectionError):
-            description = "An error occurred while connecting to the provider."
-            if isinstance(e, requests.exceptions.SSLError):
-                status_label = "ssl_error"
-            elif isinstance(e, requests.exceptions.ProxyError):
-                status_label = "proxy_error"
-            else:
-                status_label = "connection_error"
+        if limit is not None:
+            limit.release(time.time() - start_time, _overloaded(e))
+        return _failed(span, prepared, endpoint, start_time, e)
+    except BaseException:
+        if limit is not None:
+            limit.release()
+        raise
+    if limit is not None:
+        limit.release(time.time() - start_time, _overloaded(resp))
+    return _received(span, endpoint, start_time, resp)
+
+
+def _get_concurrency_limit() -> ConcurrencyLimit | None:
+    settings = current_settings.fetch
+    if not settings.concurrency_limit_enabled:
+        return None
+    return get_concurrency_limit(
+        settings.concurrency_limit_initial,
+        settings.concurrency_limit_max,
+        settings.concurrency_limit_backoff_ratio,
+        settings.concurrency_limit_latency_tolerance,
+        current_settings.otel.oauth_provider,
+    )
+
+
+def _get_latency_tracker(endpoint: str) -> LatencyTracker:
+    return get_latency_tracker(current_settings.otel.oauth_provider, endpoint)
 
-        if e.response:
-            status = HTTPStatus(e.response.status_code)
 
-        logger.warning("Fetching %r failed: %s", prepared.url, e)
-        result = OAuthError.SERVER_ERROR.json(description=description)
+def _attempt_timeout(endpoint: str) -> float:
+    """Timeout for a single attempt, adapted to recent latency when enabled."""
+    settings = current_settings.fetch
+    if not settings.adaptive_timeout:
+        return settings.timeout
+
+    adapted = _get_latency_tracker(endpoint).timeout(
+        settings.adaptive_timeout_multiplier
+    )
+    if adapted is None:
+        return settings.timeout
+
+    timeout = min(settings.timeout, max(settings.adaptive_timeout_min, adapted))
+    telemetry.set_client_latency_estimate(
+        current_settings.otel.oauth_provider, endpoint, "timeout", timeout
+    )
+    return timeout
 
-        if isinstance(e, requests.exceptions.HTTPError):
-            length = len(e.response.content)
-            retry_after = parse_retry(e.response.headers.get("retry-after"))
+
+def _get_hedge(
+    endpoint: str, budget: Bucket | SharedBucket, timeout: float
+) -> _Hedge | None:
+    """Hedge to send with an attempt, delayed by recent upstream latency."""
+    settings = current_settings.fetch
+    if endpoint not in settings.hedge_endpoints:
+        return None
+
+    latency = _get_latency_tracker(endpoint).quantile(settings.hedge_quantile)
+    if latency is None:
+        return None
+
+    delay = max(settings.hedge_min_delay, latency)
+    if delay >= min(_attempt_timeout(endpoint), timeout):
+        return None
+    return _Hedge(delay, budget, endpoint)
+
+
+@functools.lru_cache()
+def _get_hedge_pool(workers: int) -> _HedgePool:
+    return _HedgePool(workers)
+
+
+def _get_circuit_breaker(endpoint: str) -> CircuitBreaker | None:
+    settings = current_settings.fetch
+    if not settings.breaker_enabled:
+        return None
+    return get_circuit_breaker(
+        settings.breaker_window,
+        settings.breaker_failure_rate,
+        settings.breaker_minimum_requests,
+        settings.breaker_open_seconds,
+        settings.breaker_probes,
+        settings.breaker_ramp_seconds,
+        current_settings.otel.oauth_provider,
+        endpoint,
+    )
+
+
+def _get_upstream_backoff() -> UpstreamBackoff | None:
+    settings = current_settings.fetch
+    if not settings.upstream_backoff_enabled:
+        return None
+    return get_upstream_backoff(
+        settings.upstream_backoff_max,
+        current_settings.otel.oauth_provider,
+        settings.retry_budget_directory,
+    )
+
+
+def _back_off(resp: requests.Response, retry_after: int) -> None:
+    """Hold off every request to the provider while it asks us to."""
+    upstream_backoff = _get_upstream_backoff()
+    if upstream_backoff is None:
+        return
+
+    seconds = parse_rate_limit_reset(resp.headers)
+    if resp.status_code in current_settings.fetch.retry_status_codes:
+        seconds = max(seconds, retry_after)
+    upstream_backoff.block(seconds)
+
+
+def _defer(endpoint: str, delay: float) -> bool:
+    """Whether a retry delay is too long to sleep through in the request."""
+    settings = current_settings.fetch
+    return (
+        settings.deferred_retry_delay is not None
+        and endpoint in settings.deferred_retry_endpoints
+        and delay > settings.deferred_retry_delay
+    )
+
+
+def _request_key(
+    uri: str, endpoint: str, auth: str | None, data: dict[str, str | None]
+) -> str:
+    request = repr((uri, endpoint, auth, sorted(data.items())))
+    return hashlib.sha256(request.encode()).hexdigest()
+
+
+def _limit_exceeded() -> LimitExceeded:
+    telemetry.record_client_concurrency_rejection(current_settings.otel.oauth_provider)
+    return LimitExceeded(current_settings.fetch.concurrency_limit_retry_after)
+
+
+def _overloaded(
+    outcome: requests.Response | requests.exceptions.RequestException,
+) -> bool:
+    """Whether upstream signalled overload, which shrinks the concurrency limit."""
+    if isinstance(outcome, requests.exceptions.RequestException):
+        return isinstance(outcome, requests.exceptions.Timeout)
+    return outcome.status_code in current_settings.fetch.retry_status_codes
+
+
+def _failed(
+    span: trace.Span,
+    prepared: requests.PreparedRequest,
+    endpoint: str,
+    start_time: float,
+    e: requests.exceptions.RequestException,
+) -> _FetchResult:
+    request_latency = time.time() - start_time
+    span.record_exception(e)
+
+    status = None
+    status_label = "unknown_exception"
+    description = "An unknown error occurred while talking to provider."
+    if isinstance(e, requests.exceptions.Timeout):
+        description = "Request timed out while connecting to provider."
+        # Count timeouts as latency, otherwise a provider that slowed down
+        # would keep timing out against a timeout adapted to it being fast.
+        _get_latency_tracker(endpoint).observe(request_latency)
+        if isinstance(e, requests.exceptions.ConnectTimeout):
+            status_label = "connection_timeout"
+        elif isinstance(e, requests.exceptions.ReadTimeout):
+            status_label = "read_timeout"
+    elif isinstance(e, requests.exceptions.ConnectionError):
+        description = "An error occurred while connecting to the provider."
+        if isinstance(e, requests.exceptions.SSLError):
+            status_label = "ssl_error"
+        elif isinstance(e, requests.exceptions.ProxyError):
+            status_label = "proxy_error"
         else:
-            length = None
-            retry_after = 0
-    else:
-        request_latency = time.time() - start_time
+            status_label = "connection_error"
+
+    if e.response:
+        status = HTTPStatus(e.response.status_code)
 
-        result = _decode(span, resp)
-        status = HTTPStatus(resp.status_code)
-        status_label = status
-        length = len(resp.content)
-        retry_after = parse_retry(resp.headers.get("retry-after"))
+    logger.warning("Fetching %r failed: %s", prepared.url, e)
+    result = OAuthError.SERVER_ERROR.json(description=description)
 
-        if status in current_settings.fetch.retry_status_codes:
-            span.add_event("Closing session to get new server")
-            session.close()
+    if isinstance(e, requests.exceptions.HTTPError):
+        length = len(e.response.content)
+        retry_after = parse_retry(e.response.headers.get("retry-after"))
+        _back_off(e.response, retry_after)
+    else:
+        length = None
+        retry_after = 0
 
     telemetry.record_client_response(endpoint, status_label, request_latency, length)
 
     return result, status, retry_after
 
 
+def _received(
+    span: trace.Span, endpoint: str, start_time: float, resp: requests.Response
+) -> _FetchResult:
+    request_latency = time.time() - start_time
+
+    result = _decode(span, resp)
+    status = HTTPStatus(resp.status_code)
+    length = len(resp.content)
+    retry_after = parse_retry(resp.headers.get("retry-after"))
+    _back_off(resp, retry_after)
+    _get_latency_tracker(endpoint).observe(request_latency)
+
+    telemetry.record_client_response(endpoint, status, request_latency, length)
+
+    return result, status, retry_after
+
+
 def _decode(span: trace.Span, resp: requests.Response) -> OAuthResponse:
     try:
-        return resp.json()
+        return json_utils.loads(resp.content)
     except ValueError as e:
         span.record_exception(e)
 
@@ -494,7 +1020,7 @@ def jitter_delay(delay: float, preserve_floor: bool = False) -> float:
     )
 
 
-def redirect(uri: str, **params: str) -> flask.Response:
+def redirect(uri: str | uri_utils.ParsedURI, **params: str) -> flask.Response:
     return flask.Response(
         status=HTTPStatus.FOUND,
         headers={"Location": uri_utils.rewrite_uri(uri, params)},
@@ -0,0 +1,127 @@
+import collections
+import concurrent.futures
+import dataclasses
+import functools
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from oauthclientbridge import telemetry
+
+
+class QueueFull(Exception):
+    """The refresh queue has no room for more work."""
+
+
+class Expired(TimeoutError):
+    """Queued work passed its deadline before it could run."""
+
+
+@dataclasses.dataclass(frozen=True)
+class _Item:
+    key: str
+    fn: Callable[[], Any]
+    future: "concurrent.futures.Future[Any]"
+    queued_at: float
+    expires_at: float
+
+
+class RefreshExecutor:
+    """Bounded pool of threads running upstream refreshes.
+
+    At most `queue_size` items wait for one of the `workers` threads, items
+    whose deadline passes while queued are dropped without running. Work
+    submitted under the key of queued or running work shares its future, so
+    concurrent refreshes of one grant reach upstream once.
+    """
+
+    def __init__(
+        self, workers: int, queue_size: int, provider: str | None = None
+    ) -> None:
+        self._workers = workers
+        self._queue_size = queue_size
+        self._provider = provider
+        self._queue: collections.deque[_Item] = collections.deque()
+        self._pending: dict[str, concurrent.futures.Future[Any]] = {}
+        self._threads: list[threading.Thread] = []
+        self._idle = 0
+        self._condition = threading.Condition()
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def submit(
+        self, key: str, fn: Callable[[], Any], expires_at: float
+    ) -> "concurrent.futures.Future[Any]":
+        """Queue `fn` unless work for `key` is pending, raising QueueFull if full."""
+        with self._condition:
+            if (future := self._pending.get(key)) is not None:
+                return future
+            if len(self._queue) >= self._queue_size:
+                telemetry.record_refresh_queue_rejection(self._provider, "full")
+                raise QueueFull()
+
+            future = concurrent.futures.Future[Any]()
+            self._pending[key] = future
+            self._queue.append(_Item(key, fn, future, time.monotonic(), expires_at))
+            if self._idle < len(self._queue) and len(self._threads) < self._workers:
+                self._start_worker()
+            self._condition.notify()
+            queued = len(self._queue)
+
+        telemetry.set_refresh_queue_depth(self._provider, queued)
+        return future
+
+    def _start_worker(self) -> None:
+        thread = threading.Thread(
+            target=self._work,
+            name=f"oauth-refresh-{len(self._threads)}",
+            daemon=True,
+        )
+        self._threads.append(thread)
+        thread.start()
+
+    def _work(self) -> None:
+        while True:
+            with self._condition:
+                self._idle += 1
+                while not self._queue:
+                    _ = self._condition.wait()
+                self._idle -= 1
+                item = self._queue.popleft()
+                queued = len(self._queue)
+
+            now = time.monotonic()
+            telemetry.set_refresh_queue_depth(self._provider, queued)
+            telemetry.record_refresh_queue_wait(self._provider, now - item.queued_at)
+
+            if now >= item.expires_at:
+                telemetry.record_refresh_queue_rejection(self._provider, "expired")
+                self._done(item)
+                item.future.set_exception(Expired())
+            elif item.future.set_running_or_notify_cancel():
+                try:
+                    result = item.fn()
+                except BaseException as e:
+                    self._done(item)
+                    item.future.set_exception(e)
+                else:
+                    self._done(item)
+                    item.future.set_result(result)
+            else:
+                self._done(item)
+
+    def _done(self, item: _Item) -> None:
+        # Forget the key before completing, later submits start fresh work.
+        with self._condition:
+            _ = self._pending.pop(item.key, None)
+
+
+@functools.lru_cache()
+def get_refresh_executor(
+    workers: int, queue_size: int, provider: str | None = None
+) -> RefreshExecutor:
+    """Process-local refresh executor per provider."""
+    return RefreshExecutor(workers, queue_size, provider)
@@ -0,0 +1,134 @@
+"""httpx based transports, HTTP/2 multiplexing and asyncio support.
+
+Requires the optional `httpx[http2]` dependency, see `_transport.get_transport`.
+"""
+
+import io
+import ssl
+
+import httpx
+import requests
+import requests.structures
+from opentelemetry import propagate, trace
+
+from ._transport import user_agent
+
+
+def _limits(max_connections: int) -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+    )
+
+
+class HTTP2Transport:
+    """Transport sharing up to `max_connections` HTTP/2 connections.
+
+    Retryable responses do not evict anything here, a connection carries other
+    requests in flight and the server tells us when to go away.
+    """
+
+    def __init__(self, max_connections: int) -> None:
+        self._client = httpx.Client(
+            http2=True,
+            limits=_limits(max_connections),
+            headers={"User-Agent": user_agent()},
+        )
+
+    def send(
+        self, span: trace.Span, prepared: requests.PreparedRequest, timeout: float
+    ) -> requests.Response:
+        try:
+            resp = self._client.request(
+                prepared.method or "GET",
+                prepared.url or "",
+                headers=_headers(prepared),
+                content=prepared.body,
+                timeout=timeout,
+            )
+        except httpx.HTTPError as e:
+            raise _requests_error(e, prepared) from e
+
+        return _requests_response(span, resp, prepared)
+
+
+class AsyncHTTPXTransport:
+    """Async transport for one event loop, HTTP/1.1 or HTTP/2."""
+
+    def __init__(self, http2: bool, max_connections: int) -> None:
+        self._client = httpx.AsyncClient(
+            http2=http2,
+            limits=_limits(max_connections),
+            headers={"User-Agent": user_agent()},
+        )
+
+    async def send(
+        self, span: trace.Span, prepared: requests.PreparedRequest, timeout: float
+    ) -> requests.Response:
+        try:
+            resp = await self._client.request(
+                prepared.method or "GET",
+                prepared.url or "",
+                headers=_headers(prepared),
+                content=prepared.body,
+                timeout=timeout,
+            )
+        except httpx.HTTPError as e:
+            raise _requests_error(e, prepared) from e
+
+        return _requests_response(span, resp, prepared)
+
+
+def _headers(prepared: requests.PreparedRequest) -> dict[str, str]:
+    # The requests instrumentation injects trace context, httpx is not
+    # instrumented so do it here.
+    headers = dict(prepared.headers)
+    propagate.inject(headers)
+    return headers
+
+
+def _requests_response(
+    span: trace.Span, resp: httpx.Response, prepared: requests.PreparedRequest
+) -> requests.Response:
+    span.set_attribute(
+        "network.protocol.version", resp.http_version.removeprefix("HTTP/")
+    )
+
+    response = requests.Response()
+    response.status_code = resp.status_code
+    response.reason = resp.reason_phrase
+    response.headers = requests.structures.CaseInsensitiveDict(resp.headers)
+    response.encoding = resp.charset_encoding
+    response.url = str(resp.url)
+    response.raw = io.BytesIO(resp.content)
+    response.request = prepared
+    return response
+
+
+def _requests_error(
+    e: httpx.HTTPError, prepared: requests.PreparedRequest
+) -> requests.exceptions.RequestException:
+    error: type[requests.exceptions.RequestException]
+    match e:
+        case httpx.ConnectTimeout() | httpx.PoolTimeout():
+            error = requests.exceptions.ConnectTimeout
+        case httpx.TimeoutException():
+            error = requests.exceptions.ReadTimeout
+        case httpx.ProxyError():
+            error = requests.exceptions.ProxyError
+        case httpx.ConnectError() if _caused_by_ssl_error(e):
+            error = requests.exceptions.SSLError
+        case httpx.TransportError():
+            error = requests.exceptions.ConnectionError
+        case _:
+            error = requests.exceptions.RequestException
+    return error(str(e), request=prepared)
+
+
+def _caused_by_ssl_error(e: BaseException) -> bool:
+    cause: BaseException | None = e
+    while cause is not None:
+        if isinstance(cause, ssl.SSLError):
+            return True
+        cause = cause.__cause__ or cause.__context__
+    return False
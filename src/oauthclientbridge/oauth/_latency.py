@@ -0,0 +1,93 @@
+import collections
+import functools
+import math
+import threading
+
+from oauthclientbridge import telemetry
+
+_WINDOW = 200
+_MINIMUM_SAMPLES = 20
+# Smoothing for the mean and mean deviation, as TCP uses for round trip times.
+_SMOOTHING = 0.125
+_DEVIATION_SMOOTHING = 0.25
+_PUBLISHED_QUANTILES = {"p50": 0.5, "p95": 0.95, "p99": 0.99}
+
+
+class LatencyTracker:
+    """Upstream response times of an endpoint.
+
+    Keeps an exponentially weighted mean and mean deviation, and the last
+    `window` responses for quantiles. Estimates are published as gauges.
+    """
+
+    def __init__(
+        self,
+        window: int = _WINDOW,
+        minimum_samples: int = _MINIMUM_SAMPLES,
+        provider: str | None = None,
+        endpoint: str = "",
+    ):
+        self._samples: collections.deque[float] = collections.deque(maxlen=window)
+        self._sorted: list[float] | None = None
+        self._minimum_samples = minimum_samples
+        self._provider = provider
+        self._endpoint = endpoint
+        self._mean = 0.0
+        self._deviation = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, latency: float) -> None:
+        with self._lock:
+            if not self._samples:
+                self._mean, self._deviation = latency, latency / 2
+            else:
+                error = latency - self._mean
+                self._mean += _SMOOTHING * error
+                self._deviation += _DEVIATION_SMOOTHING * (abs(error) - self._deviation)
+            self._samples.append(latency)
+            self._sorted = None
+        self._publish()
+
+    def quantile(self, q: float) -> float | None:
+        """Latency below which `q` of recent responses arrived.
+
+        None until enough responses have been seen to say anything useful.
+        """
+        with self._lock:
+            if len(self._samples) < self._minimum_samples:
+                return None
+            if self._sorted is None:
+                self._sorted = sorted(self._samples)
+            samples = self._sorted
+        return samples[min(len(samples) - 1, math.ceil(q * len(samples)) - 1)]
+
+    def timeout(self, multiplier: float) -> float | None:
+        """Attempt timeout `multiplier` times past the slow end of recent latency.
+
+        The slow end is the larger of the 99th percentile and the mean plus
+        four mean deviations, so both outliers and a shifting mean count.
+        """
+        slowest = self.quantile(0.99)
+        if slowest is None:
+            return None
+        with self._lock:
+            slowest = max(slowest, self._mean + 4 * self._deviation)
+        return multiplier * slowest
+
+    def _publish(self) -> None:
+        estimates = {"mean": self._mean, "deviation": self._deviation}
+        for name, q in _PUBLISHED_QUANTILES.items():
+            if (value := self.quantile(q)) is not None:
+                estimates[name] = value
+        for name, value in estimates.items():
+            telemetry.set_client_latency_estimate(
+                self._provider, self._endpoint, name, value
+            )
+
+
+@functools.lru_cache()
+def get_latency_tracker(
+    provider: str | None = None, endpoint: str = ""
+) -> LatencyTracker:
+    """Process-local latency tracker per provider and upstream endpoint."""
+    return LatencyTracker(provider=provider, endpoint=endpoint)
@@ -0,0 +1,155 @@
+import asyncio
+import collections
+import functools
+import threading
+import time
+from collections.abc import Callable
+
+from oauthclientbridge import telemetry
+
+_BASELINE_SMOOTHING = 0.05
+
+
+class LimitExceeded(Exception):
+    """No upstream slot became free within the allowed wait."""
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__()
+        self.retry_after: int = retry_after
+
+
+class ConcurrencyLimit:
+    """Adaptive (AIMD) limit on concurrent upstream requests.
+
+    Every success grows the limit by about one per round trip while it is in
+    use, an overloaded response or a latency spike over `latency_tolerance`
+    times the smoothed baseline cuts it by `backoff_ratio`, at most once per
+    baseline round trip so a burst of failures counts once. Callers over the
+    limit wait in FIFO order for a slot handed over by `release`, sync callers
+    on an event and async callers on a future, so both share one limit.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        maximum: int,
+        backoff_ratio: float,
+        latency_tolerance: float,
+        provider: str | None = None,
+    ) -> None:
+        self._limit = float(min(initial, maximum))
+        self._maximum = maximum
+        self._backoff_ratio = backoff_ratio
+        self._latency_tolerance = latency_tolerance
+        self._provider = provider
+        self._baseline: float | None = None
+        self._last_decrease: float | None = None
+        self._in_flight = 0
+        self._waiters: collections.deque[Callable[[], object]] = collections.deque()
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def acquire(self, timeout: float) -> bool:
+        """Take a slot, waiting up to `timeout` seconds for one."""
+        event = threading.Event()
+        wake = event.set
+        if self._try_acquire(wake):
+            return True
+        return event.wait(timeout) or not self._abandon(wake)
+
+    async def acquire_async(self, timeout: float) -> bool:
+        """Take a slot without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[None] = loop.create_future()
+
+        def wake() -> None:
+            _ = loop.call_soon_threadsafe(_set_result, future)
+
+        if self._try_acquire(wake):
+            return True
+        try:
+            await asyncio.wait_for(future, timeout)
+        except TimeoutError:
+            return not self._abandon(wake)
+        except BaseException:
+            if not self._abandon(wake):
+                self.release()
+            raise
+        return True
+
+    def release(self, latency: float | None = None, overloaded: bool = False) -> None:
+        """Free a slot, adapting the limit to how the request went if sent."""
+        with self._lock:
+            self._in_flight -= 1
+            if latency is not None:
+                self._adapt(latency, overloaded)
+
+            while self._waiters and self._in_flight < self.limit:
+                self._in_flight += 1
+                _ = self._waiters.popleft()()
+            self._publish()
+
+    def _try_acquire(self, wake: Callable[[], object]) -> bool:
+        with self._lock:
+            if not self._waiters and self._in_flight < self.limit:
+                self._in_flight += 1
+                acquired = True
+            else:
+                self._waiters.append(wake)
+                acquired = False
+            self._publish()
+        return acquired
+
+    def _abandon(self, wake: Callable[[], object]) -> bool:
+        """Stop waiting, False if `release` handed us a slot meanwhile."""
+        with self._lock:
+            try:
+                self._waiters.remove(wake)
+            except ValueError:
+                return False
+            self._publish()
+            return True
+
+    def _adapt(self, latency: float, overloaded: bool) -> None:
+        if self._baseline is None:
+            self._baseline = latency
+        spike = latency > self._baseline * self._latency_tolerance
+        self._baseline += (latency - self._baseline) * _BASELINE_SMOOTHING
+
+        if overloaded or spike:
+            now = time.monotonic()
+            last = self._last_decrease
+            if last is None or now - last >= self._baseline:
+                self._limit = max(1.0, self._limit * self._backoff_ratio)
+                self._last_decrease = now
+        elif self._in_flight * 2 >= self.limit:
+            self._limit = min(self._maximum, self._limit + 1 / self._limit)
+
+    def _publish(self) -> None:
+        telemetry.set_client_concurrency(self._provider, self.limit, self.queued)
+
+
+def _set_result(future: "asyncio.Future[None]") -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+@functools.lru_cache()
+def get_concurrency_limit(
+    initial: int,
+    maximum: int,
+    backoff_ratio: float,
+    latency_tolerance: float,
+    provider: str | None = None,
+) -> ConcurrencyLimit:
+    """Process-local limit, providers sharing a process each get their own."""
+    return ConcurrencyLimit(
+        initial, maximum, backoff_ratio, latency_tolerance, provider
+    )
@@ -52,6 +52,7 @@ class UpstreamResult(StrEnum):
     SERVER_ERROR = "server_error"
     RATE_LIMITED = "rate_limited"
     TIMEOUT = "timeout"
+    REJECTED = "rejected"
     UNKNOWN = "unknown"
 
 
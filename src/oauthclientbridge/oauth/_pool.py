@@ -0,0 +1,279 @@
+"""Upstream connection pooling with per-connection bookkeeping.
+
+requests keeps one urllib3 pool per upstream host. This adapter sizes those
+pools per host, shares one TLS context with the CA bundle loaded once, resumes
+TLS sessions for new connections, and lets callers evict the one connection a
+bad response came from instead of closing every pooled connection.
+"""
+
+import ssl
+import threading
+import time
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Any, cast, override
+
+import flask
+import requests
+import requests.adapters
+import requests.utils
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import (
+    ConnectionPool,
+    HTTPConnectionPool,
+    HTTPSConnectionPool,
+)
+from urllib3.poolmanager import PoolManager
+
+from oauthclientbridge import telemetry
+from oauthclientbridge.settings import current_settings
+
+
+class _SessionResumingContext(ssl.SSLContext):
+    """TLS context that offers the last session seen for a host on connect."""
+
+    def __init__(self, protocol: int = ssl.PROTOCOL_TLS_CLIENT) -> None:
+        self._sessions: dict[str, ssl.SSLSession] = {}
+        self._sessions_lock = threading.Lock()
+
+    def remember(self, server_hostname: str, session: ssl.SSLSession) -> None:
+        with self._sessions_lock:
+            self._sessions[server_hostname] = session
+
+    @override
+    def wrap_socket(  # pyright: ignore[reportIncompatibleMethodOverride]
+        self,
+        sock: Any,
+        server_side: bool = False,
+        do_handshake_on_connect: bool = True,
+        suppress_ragged_eofs: bool = True,
+        server_hostname: str | bytes | None = None,
+        session: ssl.SSLSession | None = None,
+    ) -> ssl.SSLSocket:
+        if session is None and isinstance(server_hostname, str):
+            with self._sessions_lock:
+                session = self._sessions.get(server_hostname)
+        return super().wrap_socket(
+            sock,
+            server_side=server_side,
+            do_handshake_on_connect=do_handshake_on_connect,
+            suppress_ragged_eofs=suppress_ragged_eofs,
+            server_hostname=server_hostname,
+            session=session,
+        )
+
+
+def _create_ssl_context() -> _SessionResumingContext:
+    context = _SessionResumingContext(ssl.PROTOCOL_TLS_CLIENT)
+    context.minimum_version = ssl.TLSVersion.TLSv1_2
+    context.options |= ssl.OP_NO_COMPRESSION
+    context.load_verify_locations(requests.utils.DEFAULT_CA_BUNDLE_PATH)
+    return context
+
+
+class _TrackedConnectionMixin:
+    """Track when a connection was established and how often it was used."""
+
+    connected_at: float | None = None
+    requests: int = 0
+
+    if TYPE_CHECKING:
+
+        def close(self) -> None: ...
+
+    @property
+    def age(self) -> float:
+        return (
+            0.0 if self.connected_at is None else time.monotonic() - self.connected_at
+        )
+
+    def _record_connect(self, host: str, tls: str) -> None:
+        # Connections are established lazily for the request that checked
+        # them out, so that request is the first one.
+        self.connected_at = time.monotonic()
+        self.requests = 1
+        telemetry.record_client_connect(host, tls)
+
+
+class _TrackedHTTPConnection(_TrackedConnectionMixin, HTTPConnection):
+    @override
+    def connect(self) -> None:
+        super().connect()
+        self._record_connect(self.host, "none")
+
+
+class _TrackedHTTPSConnection(_TrackedConnectionMixin, HTTPSConnection):
+    @override
+    def connect(self) -> None:
+        super().connect()
+        reused = isinstance(self.sock, ssl.SSLSocket) and self.sock.session_reused
+        self._record_connect(self.host, "resumed" if reused else "full")
+
+
+class _TrackedPoolMixin:
+    """Measure pool waits and utilisation and retire old connections."""
+
+    host: str
+    max_age: float | None = None
+
+    def _get_conn(self, timeout: float | None = None) -> Any:
+        start_time = time.monotonic()
+        conn = cast(Any, super())._get_conn(timeout)
+        telemetry.record_client_pool_checkout(self.host, time.monotonic() - start_time)
+
+        if (
+            self.max_age is not None
+            and isinstance(conn, _TrackedConnectionMixin)
+            and conn.connected_at is not None
+            and conn.age > self.max_age
+        ):
+            conn.close()
+            conn.connected_at = None
+            telemetry.record_client_connection_eviction(self.host, "max_age")
+
+        if isinstance(conn, _TrackedConnectionMixin) and conn.connected_at:
+            conn.requests += 1
+        return conn
+
+    def _put_conn(self, conn: Any) -> None:
+        telemetry.record_client_pool_checkin(self.host)
+
+        sock = getattr(conn, "sock", None)
+        context = getattr(conn, "ssl_context", None)
+        if isinstance(sock, ssl.SSLSocket) and isinstance(
+            context, _SessionResumingContext
+        ):
+            session = sock.session
+            if session is not None:
+                context.remember(self.host, session)
+
+        pool = getattr(self, "pool", None)
+        if conn is not None and pool is not None and pool.full():
+            telemetry.record_client_pool_discard(self.host)
+        cast(Any, super())._put_conn(conn)
+
+    def discard_conn(self, conn: Any) -> None:
+        """Close a checked out connection and free its slot in the pool."""
+        conn.close()
+        telemetry.record_client_pool_checkin(self.host)
+
+        pool = getattr(self, "pool", None)
+        if pool is None:
+            return
+        # The pool hands out connections LIFO, so the empty slot goes to the
+        # bottom to keep the next request on a warm connection.
+        with pool.mutex:
+            pool.queue.insert(0, None)
+            pool.not_empty.notify()
+
+
+class _TrackedHTTPConnectionPool(_TrackedPoolMixin, HTTPConnectionPool):
+    ConnectionCls = _TrackedHTTPConnection  # pyright: ignore[reportAssignmentType]
+
+
+class _TrackedHTTPSConnectionPool(_TrackedPoolMixin, HTTPSConnectionPool):
+    ConnectionCls = _TrackedHTTPSConnection  # pyright: ignore[reportAssignmentType]
+
+
+class PooledAdapter(requests.adapters.HTTPAdapter):
+    """HTTP adapter with per-host pool sizes and targeted connection eviction."""
+
+    def __init__(self) -> None:
+        self._ssl_context = _create_ssl_context()
+        super().__init__()
+
+    @override
+    def init_poolmanager(
+        self,
+        connections: int,
+        maxsize: int,
+        block: bool = False,
+        **pool_kwargs: Any,
+    ) -> None:
+        super().init_poolmanager(connections, maxsize, block, **pool_kwargs)
+        manager: PoolManager = self.poolmanager
+        manager.pool_classes_by_scheme = {  # pyright: ignore[reportAttributeAccessIssue]
+            "http": _TrackedHTTPConnectionPool,
+            "https": _TrackedHTTPSConnectionPool,
+        }
+
+    @override
+    def build_connection_pool_key_attributes(
+        self,
+        request: requests.PreparedRequest,
+        verify: bool | str,
+        cert: str | tuple[str, str] | None = None,
+    ):
+        host_params, pool_kwargs = super().build_connection_pool_key_attributes(
+            request, verify, cert
+        )
+        if flask.has_app_context():
+            settings = current_settings.fetch
+            pool_kwargs["maxsize"] = settings.pool_maxsize_per_host.get(  # pyright: ignore[reportGeneralTypeIssues]
+                host_params["host"], settings.pool_maxsize
+            )
+        if verify is True and host_params["scheme"] == "https":
+            pool_kwargs["ssl_context"] = self._ssl_context
+        return host_params, pool_kwargs
+
+    @override
+    def get_connection_with_tls_context(
+        self,
+        request: requests.PreparedRequest,
+        verify: bool | str | None,
+        proxies: Mapping[str, str] | None = None,
+        cert: tuple[str, str] | str | None = None,
+    ) -> ConnectionPool:
+        pool = super().get_connection_with_tls_context(request, verify, proxies, cert)
+        if isinstance(pool, _TrackedPoolMixin) and flask.has_app_context():
+            pool.max_age = current_settings.fetch.connection_max_age_seconds
+        return pool
+
+    @override
+    def cert_verify(
+        self,
+        conn: Any,
+        url: str,
+        verify: bool | str,
+        cert: str | tuple[str, str] | None,
+    ) -> None:
+        super().cert_verify(conn, url, verify, cert)  # pyright: ignore[reportUnknownMemberType]
+        # The shared context already holds the CA bundle, loading it again
+        # for every new connection is what we are avoiding.
+        if getattr(conn, "conn_kw", {}).get("ssl_context") is self._ssl_context:
+            conn.ca_certs = None
+
+
+def connection_info(resp: requests.Response) -> tuple[float, int] | None:
+    """Return the age and request count of the connection behind `resp`.
+
+    Only available for streamed responses that have not been read yet.
+    """
+    conn = getattr(getattr(resp, "raw", None), "connection", None)
+    if not isinstance(conn, _TrackedConnectionMixin):
+        return None
+    return conn.age, conn.requests
+
+
+def evict(resp: requests.Response, reason: str) -> bool:
+    """Drop the connection a streamed response came from once it is read.
+
+    Other pooled connections to the same host are left alone, so concurrent
+    requests keep their warm connections. Returns whether a connection was
+    evicted.
+    """
+    raw = getattr(resp, "raw", None)
+    conn = getattr(raw, "connection", None)
+    pool = getattr(raw, "_pool", None)
+    if conn is None or not isinstance(pool, _TrackedPoolMixin):
+        return False
+
+    # Detach the pool so reading the body does not hand the connection back
+    # for another thread to pick up before we close it.
+    raw._pool = None  # pyright: ignore[reportOptionalMemberAccess]
+    try:
+        _ = resp.content
+    finally:
+        raw._connection = None  # pyright: ignore[reportOptionalMemberAccess]
+        pool.discard_conn(conn)
+    telemetry.record_client_connection_eviction(pool.host, reason)
+    return True
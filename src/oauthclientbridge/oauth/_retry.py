@@ -1,9 +1,11 @@
 import functools
+import re
 from dataclasses import dataclass
 from enum import StrEnum
 from http import HTTPStatus
+from pathlib import Path
 
-from oauthclientbridge.utils.bucket import Bucket
+from oauthclientbridge.utils.bucket import Bucket, SharedBucket
 
 
 class RetryAttemptKind(StrEnum):
@@ -16,10 +18,17 @@ class RetryDecisionAction(StrEnum):
     SKIP = "skip"
 
 
+class HedgeOutcome(StrEnum):
+    WON = "won"
+    LOST = "lost"
+    SKIPPED = "skipped"
+
+
 class RetryReason(StrEnum):
     UNAVAILABLE = "unavailable"
     RESOURCE_EXHAUSTED = "resource_exhausted"
     DEADLINE_EXCEEDED = "deadline_exceeded"
+    DEFERRED = "deferred"
     UNKNOWN = "unknown"
 
 
@@ -30,15 +39,27 @@ class RetryDecision:
 
 
 @functools.lru_cache()
-def get_retry_limiter(capacity: int, refill_per_initial: float) -> Bucket:
-    """Process-local retry budget.
+def get_retry_limiter(
+    capacity: int,
+    refill_per_initial: float,
+    provider: str | None = None,
+    directory: Path | None = None,
+) -> Bucket | SharedBucket:
+    """Retry budget, process-local unless `directory` is set.
 
     We model this as a bounded bucket of retry tokens. First attempts replenish
     the bucket by a configured fraction, while each admitted retry consumes one
-    whole token. This keeps the implementation local and simple, but it means
-    the budget is per-process and only approximates fleet-wide retry volume.
+    whole token. With a `directory` the bucket lives in a file there that every
+    worker process maps, so the budget covers all of them instead of each one
+    getting its own. Providers each get their own budget.
     """
-    return Bucket(capacity, refill_per_initial)
+    if directory is None:
+        return Bucket(capacity, refill_per_initial)
+
+    name = re.sub(r"[^\w.-]", "_", provider or "default")
+    return SharedBucket(
+        directory / f"retry-budget-{name}", capacity, refill_per_initial
+    )
 
 
 def retry_reason_for_status(status: HTTPStatus) -> RetryReason:
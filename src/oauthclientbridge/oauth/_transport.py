@@ -0,0 +1,144 @@
+"""Transports that carry token endpoint requests upstream.
+
+Every transport returns a `requests.Response` and raises `requests` exceptions,
+so the retry loop and outcome classification do not depend on which one sent
+the request.
+"""
+
+import asyncio
+import functools
+import importlib.metadata
+import importlib.util
+import weakref
+from typing import Protocol
+
+import requests
+import structlog
+from opentelemetry import trace
+
+from oauthclientbridge.settings import FetchTransport, current_settings
+
+from . import _pool
+
+logger: structlog.BoundLogger = structlog.get_logger()
+
+
+class Transport(Protocol):
+    def send(
+        self, span: trace.Span, prepared: requests.PreparedRequest, timeout: float
+    ) -> requests.Response:
+        """Send `prepared` and return the response with its body read."""
+        ...
+
+
+class AsyncTransport(Protocol):
+    async def send(
+        self, span: trace.Span, prepared: requests.PreparedRequest, timeout: float
+    ) -> requests.Response:
+        """Send `prepared` and return the response with its body read."""
+        ...
+
+
+def user_agent() -> str:
+    return "oauthclientbridge %s" % importlib.metadata.version("oauthclientbridge")
+
+
+@functools.lru_cache()
+def get_session():
+    session = requests.Session()
+    adapter = _pool.PooledAdapter()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = user_agent()
+    return session
+
+
+class RequestsTransport:
+    """HTTP/1.1 transport using the shared pooled `requests` session."""
+
+    def send(
+        self, span: trace.Span, prepared: requests.PreparedRequest, timeout: float
+    ) -> requests.Response:
+        # Streamed so a connection that returned a retryable status can be
+        # evicted before the body is read and it goes back to the pool.
+        resp = get_session().send(prepared, timeout=timeout, stream=True)
+        if info := _pool.connection_info(resp):
+            span.set_attribute("oauth.connection.age", info[0])
+            span.set_attribute("oauth.connection.requests", info[1])
+        if resp.status_code in current_settings.fetch.retry_status_codes:
+            span.add_event("Evicting connection to get new server")
+            _ = _pool.evict(resp, "retryable_status")
+        _ = resp.content
+        return resp
+
+
+class ThreadedTransport:
+    """Async transport running the blocking transport in the default executor.
+
+    Used when httpx is not installed, backoff sleeps still do not hold a thread.
+    """
+
+    async def send(
+        self, span: trace.Span, prepared: requests.PreparedRequest, timeout: float
+    ) -> requests.Response:
+        return await asyncio.to_thread(
+            lambda: get_transport().send(span, prepared, timeout)
+        )
+
+
+def get_transport() -> Transport:
+    settings = current_settings.fetch
+    if settings.transport == FetchTransport.HTTP2:
+        return _get_http2_transport(settings.http2_max_connections)
+    return _requests_transport
+
+
+def get_async_transport() -> AsyncTransport:
+    """Return the async transport for the running event loop.
+
+    httpx clients are bound to the loop they were first used on, so every loop
+    gets its own.
+    """
+    settings = current_settings.fetch
+    if settings.transport == FetchTransport.HTTP2:
+        key = (True, settings.http2_max_connections)
+    else:
+        key = (False, settings.pool_maxsize)
+
+    transports = _async_transports.setdefault(asyncio.get_running_loop(), {})
+    if key not in transports:
+        transports[key] = _create_async_transport(*key)
+    return transports[key]
+
+
+_requests_transport = RequestsTransport()
+_async_transports: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[tuple[bool, int], AsyncTransport]
+] = weakref.WeakKeyDictionary()
+
+
+def _httpx_available() -> bool:
+    return bool(importlib.util.find_spec("httpx") and importlib.util.find_spec("h2"))
+
+
+@functools.lru_cache()
+def _get_http2_transport(max_connections: int) -> Transport:
+    if not _httpx_available():
+        logger.error(
+            "HTTP/2 transport is enabled, but 'httpx[http2]' is not installed. "
+            "Falling back to the requests transport."
+        )
+        return _requests_transport
+
+    from ._httpx import HTTP2Transport
+
+    return HTTP2Transport(max_connections)
+
+
+def _create_async_transport(http2: bool, max_connections: int) -> AsyncTransport:
+    if not _httpx_available():
+        return ThreadedTransport()
+
+    from ._httpx import AsyncHTTPXTransport
+
+    return AsyncHTTPXTransport(http2, max_connections)
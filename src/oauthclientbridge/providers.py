@@ -0,0 +1,102 @@
+"""Serve several OAuth providers from one process.
+
+Every provider is a regular app created from its own env file, so it keeps its
+own settings, token database, retry budget and telemetry labels. The apps share
+the process and with it the worker pool, the HTTP session and the telemetry
+pipeline.
+"""
+
+import contextlib
+import os
+from collections.abc import Generator, Iterable, Mapping
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from dotenv import dotenv_values
+from flask import Flask
+from werkzeug.exceptions import NotFound
+
+from oauthclientbridge.settings import Settings
+
+if TYPE_CHECKING:
+    from _typeshed.wsgi import StartResponse, WSGIEnvironment
+
+
+class ProviderDispatcher:
+    """Route requests to provider apps by host name, then by path prefix."""
+
+    def __init__(self, apps: Mapping[str, Flask]) -> None:
+        self.apps = dict(apps)
+        self._hosts = {
+            mount.lower(): app
+            for mount, app in apps.items()
+            if not mount.startswith("/")
+        }
+        self._paths = {
+            mount: app for mount, app in apps.items() if mount.startswith("/")
+        }
+
+    def __call__(
+        self, environ: "WSGIEnvironment", start_response: "StartResponse"
+    ) -> Iterable[bytes]:
+        app = self.resolve(environ)
+        if app is None:
+            return NotFound()(environ, start_response)
+        return app(environ, start_response)
+
+    def resolve(self, environ: "WSGIEnvironment") -> Flask | None:
+        """Return the app for `environ`, moving a path mount to SCRIPT_NAME."""
+        host = environ.get("HTTP_HOST") or environ.get("SERVER_NAME", "")
+        app = self._hosts.get(host.rsplit(":", 1)[0].lower())
+        if app is not None:
+            return app
+
+        script, path_info = environ.get("PATH_INFO", ""), ""
+        while "/" in script and script not in self._paths:
+            script, last_item = script.rsplit("/", 1)
+            path_info = f"/{last_item}{path_info}"
+
+        app = self._paths.get(script)
+        if app is not None:
+            environ["SCRIPT_NAME"] = environ.get("SCRIPT_NAME", "") + script
+            environ["PATH_INFO"] = path_info
+        return app
+
+
+def create_apps(mounts: Mapping[str, Path]) -> dict[str, Flask]:
+    """Create one app per mount from the settings in its env file."""
+    # Imported here as the package imports this module for its CLI.
+    from oauthclientbridge import create_app
+
+    apps: dict[str, Flask] = {}
+    for mount, env_file in mounts.items():
+        with _environ(_provider_environ(mount, env_file)):
+            apps[mount] = create_app(Settings())
+    return apps
+
+
+def _provider_environ(mount: str, env_file: Path) -> dict[str, str]:
+    if not env_file.is_file():
+        raise FileNotFoundError(f"Provider env file {env_file} does not exist")
+
+    values = {
+        key: value
+        for key, value in dotenv_values(env_file).items()
+        if value is not None
+    }
+    # Without its own label every provider would share one retry budget and
+    # report metrics under the same name.
+    values.setdefault("TELEMETRY_OAUTH_PROVIDER", mount.strip("/"))
+    return values
+
+
+@contextlib.contextmanager
+def _environ(values: Mapping[str, str]) -> Generator[None, None, None]:
+    """Overlay `values` on the process environment while settings are read."""
+    original = os.environ.copy()
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        os.environ.clear()
+        os.environ.update(original)
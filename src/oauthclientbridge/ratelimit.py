@@ -0,0 +1,62 @@
+"""Per client rate limiting of /token, checked before any database or crypto.
+
+Clients stuck in refresh loops can send hundreds of requests a minute. Each
+client_id gets a token bucket, shared by every worker process when
+`client_rate_limit_directory` is set, and requests over it are turned away
+with a Retry-After. Traffic classes can set their own limit, their clients
+get buckets separate from everyone else's.
+"""
+
+import functools
+import math
+import re
+from pathlib import Path
+
+from oauthclientbridge import client, telemetry, traffic
+from oauthclientbridge.settings import TrafficClass, current_settings
+from oauthclientbridge.utils.bucket import BucketTable
+
+
+def retry_after(client_id: str | None, traffic_class: TrafficClass | None) -> int:
+    """Seconds the client has to wait before its request is allowed, or zero."""
+    rate = current_settings.client_rate_limit_per_second
+    burst = current_settings.client_rate_limit_burst
+    buckets = "default"
+    if traffic_class is not None and traffic_class.rate_limit_per_second:
+        rate = traffic_class.rate_limit_per_second
+        burst = traffic_class.rate_limit_burst or burst
+        buckets = traffic_class.name
+    if rate is None or not client_id:
+        return 0
+
+    table = get_client_buckets(
+        burst,
+        rate,
+        current_settings.client_rate_limit_clients,
+        current_settings.client_rate_limit_directory,
+        buckets,
+    )
+    wait = table.consume(client.normalize_client_id(client_id))
+    if not wait:
+        return 0
+
+    telemetry.record_token_rate_limit_rejection(traffic.name(traffic_class))
+    return math.ceil(wait)
+
+
+@functools.lru_cache()
+def get_client_buckets(
+    burst: int,
+    rate: float,
+    clients: int,
+    directory: Path | None = None,
+    name: str = "default",
+) -> BucketTable:
+    """Client buckets per traffic class, process-local unless `directory` is set."""
+    path = None
+    if directory is not None:
+        filename = "client-rate-limit"
+        if name != "default":
+            filename += "-" + re.sub(r"[^\w.-]", "_", name)
+        path = directory / filename
+    return BucketTable(burst, rate, clients, path)
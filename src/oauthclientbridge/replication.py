@@ -0,0 +1,238 @@
+"""Log-shipping replication of the token database to read replicas.
+
+A primary with the change log enabled records the full row after every token
+write and serves the log under /replication. Replicas follow the log into their
+own database with `flask followdb`, serve reads from it and forward writes to
+the primary, applying the result locally so the next read sees it.
+"""
+
+import functools
+import hmac
+import threading
+from collections.abc import Callable
+from http import HTTPStatus
+from typing import Any
+
+import flask
+import requests
+import structlog
+from flask import Blueprint
+
+from oauthclientbridge import db, oauth, transfer, types
+from oauthclientbridge.errors import OAuthError
+from oauthclientbridge.settings import current_settings
+
+logger: structlog.BoundLogger = structlog.get_logger()
+
+routes = Blueprint("replication", __name__, url_prefix="/replication")
+
+_MAX_CHANGES_PER_REQUEST = 10000
+
+
+class ReplicaTooFarBehind(Exception):
+    """The primary has pruned changes the replica has not applied yet."""
+
+
+def insert(client_id: types.ClientId, token: types.EncryptedToken) -> None:
+    """Store a new token, on the primary when this instance is a replica."""
+    if current_settings.replication.primary_url is None:
+        return db.insert(client_id, token)
+
+    resp = _forward(client_id, token, create=True)
+    if resp.status_code == HTTPStatus.CONFLICT:
+        raise db.IntegrityError("Client already exists on primary.")
+    _apply_forwarded(resp)
+
+
+def update(client_id: types.ClientId, token: types.EncryptedToken | None) -> int:
+    """Update a token, on the primary when this instance is a replica."""
+    if current_settings.replication.primary_url is None:
+        return db.update(client_id, token)
+
+    resp = _forward(client_id, token, create=False)
+    if resp.status_code == HTTPStatus.NOT_FOUND:
+        return 0
+    _apply_forwarded(resp)
+    return 1
+
+
+def follow_once(batch_size: int) -> int:
+    """Fetch and apply the next batch of changes, returning how many there were."""
+    resp = _request(
+        "GET",
+        "changes",
+        params={"after": db.last_change_seq(), "limit": batch_size},
+    )
+    if resp.status_code == HTTPStatus.GONE:
+        raise ReplicaTooFarBehind(
+            "Primary has pruned changes this replica needs, "
+            "re-seed it from a backup of the primary."
+        )
+    resp.raise_for_status()
+
+    changes = [
+        db.ChangeRecord(seq=int(item["seq"]), record=_parse_record(item))
+        for item in resp.json()["changes"]
+    ]
+    return db.apply_changes(changes)
+
+
+def follow(
+    batch_size: int,
+    interval: float,
+    progress: Callable[[int], None] | None = None,
+    stopped: threading.Event | None = None,
+) -> int:
+    """Keep applying changes until `stopped` is set, returning the total.
+
+    Full batches are followed by another fetch straight away, so a replica that
+    is behind catches up at full speed. Connection problems are logged and
+    retried after `interval`.
+    """
+    stopped = threading.Event() if stopped is None else stopped
+    count = 0
+    while not stopped.is_set():
+        try:
+            applied = follow_once(batch_size)
+        except requests.exceptions.RequestException:
+            logger.exception("Fetching changes from primary failed")
+            applied = 0
+
+        count += applied
+        if applied and progress is not None:
+            progress(count)
+        if applied < batch_size:
+            _ = stopped.wait(interval)
+    return count
+
+
+@routes.before_request
+def _authorize() -> flask.Response | None:  # pyright: ignore[reportUnusedFunction]
+    settings = current_settings.replication
+    if not settings.change_log or settings.token is None:
+        return flask.Response(status=HTTPStatus.NOT_FOUND)
+
+    authorization = flask.request.headers.get("Authorization", "")
+    expected = f"Bearer {settings.token.get_secret_value()}"
+    if not hmac.compare_digest(authorization, expected):
+        return flask.Response(
+            status=HTTPStatus.UNAUTHORIZED,
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return None
+
+
+@routes.route("/changes", methods=["GET"])
+def changes() -> flask.Response:
+    after = flask.request.args.get("after", default=0, type=int)
+    limit = flask.request.args.get(
+        "limit", default=current_settings.replication.batch_size, type=int
+    )
+    limit = max(1, min(limit, _MAX_CHANGES_PER_REQUEST))
+
+    try:
+        records = db.iter_changes(after, limit)
+    except LookupError as e:
+        return _json_error(HTTPStatus.GONE, str(e))
+
+    return flask.jsonify(
+        {
+            "changes": [
+                {"seq": change.seq, **transfer.token_line(change.record)}
+                for change in records
+            ]
+        }
+    )
+
+
+@routes.route("/tokens/<client_id_value>", methods=["PUT"])
+def write_token(client_id_value: str) -> flask.Response:
+    data: Any = flask.request.get_json(silent=True)
+    try:
+        client_id = db.validate_client_id(client_id_value)
+        token_value = data["token"]
+        create = bool(data.get("create", False))
+        token = (
+            None
+            if token_value is None
+            else types.EncryptedToken(token_value.encode("ascii"))
+        )
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return _json_error(HTTPStatus.BAD_REQUEST, "Invalid token write.")
+
+    if create and token is not None:
+        try:
+            db.insert(client_id, token)
+        except db.IntegrityError:
+            return _json_error(HTTPStatus.CONFLICT, "Client already exists.")
+    elif create:
+        return _json_error(HTTPStatus.BAD_REQUEST, "Can not create a revoked token.")
+    elif not db.update(client_id, token):
+        return _json_error(HTTPStatus.NOT_FOUND, "Client not found.")
+
+    return flask.jsonify(transfer.token_line(db.lookup(client_id)))
+
+
+def _forward(
+    client_id: types.ClientId, token: types.EncryptedToken | None, create: bool
+) -> requests.Response:
+    try:
+        return _request(
+            "PUT",
+            f"tokens/{client_id}",
+            json={
+                "token": None if token is None else token.decode("ascii"),
+                "create": create,
+            },
+        )
+    except requests.exceptions.RequestException:
+        logger.exception("Forwarding token write to primary failed")
+        raise oauth.Error(
+            OAuthError.TEMPORARILY_UNAVAILABLE, "Primary database is unavailable."
+        )
+
+
+def _apply_forwarded(resp: requests.Response) -> None:
+    if not resp.ok:
+        logger.error("Primary rejected token write", status=resp.status_code)
+        raise oauth.Error(
+            OAuthError.TEMPORARILY_UNAVAILABLE, "Primary database is unavailable."
+        )
+
+    # Write through so the next read on this replica sees the change even if
+    # the follower has not caught up yet, the follower will overwrite it with
+    # the same row once it does.
+    _ = db.insert_records([_parse_record(resp.json())], replace=True)
+
+
+def _parse_record(data: dict[str, Any]) -> db.TokenRecord:
+    record = transfer.parse_line(data)
+    if not isinstance(record, db.TokenRecord):
+        raise ValueError(f"Expected a token change, got {data['type']!r}")
+    return record
+
+
+def _request(method: str, path: str, **kwargs: Any) -> requests.Response:
+    settings = current_settings.replication
+    assert settings.primary_url is not None and settings.token is not None
+    return get_session().request(
+        method,
+        f"{settings.primary_url.rstrip('/')}/replication/{path}",
+        headers={"Authorization": f"Bearer {settings.token.get_secret_value()}"},
+        timeout=settings.timeout,
+        **kwargs,
+    )
+
+
+def _json_error(status: HTTPStatus, description: str) -> flask.Response:
+    response = flask.jsonify({"error": status.phrase, "error_description": description})
+    response.status_code = status
+    return response
+
+
+@functools.lru_cache()
+def get_session() -> requests.Session:
+    # Kept apart from the upstream connection pool and its metrics.
+    session = requests.Session()
+    session.headers["User-Agent"] = oauth.user_agent()
+    return session
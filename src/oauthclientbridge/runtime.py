@@ -0,0 +1,68 @@
+"""Per app values derived from settings once, when the app is created.
+
+Compiling the callback template, parsing the authorization URI or building
+the User-Agent classifier on every request is wasted work as settings do not
+change after `create_app`. `Runtime` holds the results, frozen so request
+handlers can not drift from the settings they were built from.
+"""
+
+import dataclasses
+from typing import cast
+
+import flask
+import jinja2
+from flask import Flask
+
+from oauthclientbridge import traffic
+from oauthclientbridge.settings import Settings
+from oauthclientbridge.utils import uri as uri_utils
+
+_EXTENSION = "oauthclientbridge.runtime"
+
+
+@dataclasses.dataclass(frozen=True)
+class Runtime:
+    callback_template: jinja2.Template
+    """Compiled `callback_template`."""
+
+    authorization_uri: uri_utils.ParsedURI
+    """Parsed upstream authorization URI to add the request parameters to."""
+
+    default_scope: str
+    """Space separated default `scopes`, as requested from upstream."""
+
+    allowed_scopes: frozenset[str] | None
+    """Allowed requested scopes. None permits dynamic requested scopes."""
+
+    www_authenticate: str
+    """`WWW-Authenticate` header for invalid_client responses."""
+
+    classifier: traffic.Classifier
+    """User-Agent classifier for `traffic_classes` and the workaround agents."""
+
+    @classmethod
+    def from_settings(cls, app: Flask, settings: Settings) -> "Runtime":
+        allowed_scopes = settings.oauth.allowed_scopes
+        return cls(
+            callback_template=app.jinja_env.from_string(settings.callback_template),
+            authorization_uri=uri_utils.parse_uri(settings.oauth.authorization_uri),
+            default_scope=" ".join(settings.oauth.scopes),
+            allowed_scopes=frozenset(allowed_scopes)
+            if allowed_scopes is not None
+            else None,
+            www_authenticate=f'Basic realm="{settings.auth_realm}"',
+            classifier=traffic.get_classifier(
+                tuple(settings.traffic_classes),
+                settings.revoked_grant_workaround_user_agents,
+            ),
+        )
+
+
+def init_app(app: Flask, settings: Settings) -> None:
+    """Build the app's runtime from `settings`, replacing any earlier one."""
+    app.extensions[_EXTENSION] = Runtime.from_settings(app, settings)
+
+
+def get() -> Runtime:
+    """Runtime of the current app."""
+    return cast(Runtime, flask.current_app.extensions[_EXTENSION])
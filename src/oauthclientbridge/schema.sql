@@ -7,3 +7,22 @@ create table if not exists tokens(
   last_updated_at integer
 );
 -- TODO: Consider WITHOUT ROWID;?
+
+-- Stateless grants live with the client, this only tracks the newest accepted
+-- generation per client. Missing rows mean generation zero, NULL is revoked.
+create table if not exists grant_generations(
+  client_id text primary key,
+  generation integer,
+  last_updated_at integer
+);
+
+-- Append-only log of token writes for replicas, only written when the change
+-- log is enabled. Each change holds the full row as it was after the write.
+create table if not exists changes(
+  seq integer primary key autoincrement,
+  client_id text,
+  token blob,
+  created_at integer,
+  last_updated_at integer,
+  changed_at integer
+);
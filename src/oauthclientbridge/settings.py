@@ -1,4 +1,6 @@
+import binascii
 import logging
+import re
 import sys
 from enum import IntEnum, StrEnum
 from http import HTTPStatus
@@ -6,8 +8,16 @@ from importlib.metadata import PackageNotFoundError, metadata, version
 from pathlib import Path
 from typing import Callable, cast
 
+from cryptography import fernet
 from flask import current_app
-from pydantic import Field, SecretStr, model_validator
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    SecretStr,
+    field_validator,
+    model_validator,
+)
 from pydantic_settings import (
     BaseSettings,
     SettingsConfigDict,
@@ -58,6 +68,60 @@ class OAuthSettings(BaseSettings):
     """
 
 
+class ShedPriority(StrEnum):
+    LOW = "low"
+    """Shed every request while overloaded."""
+
+    NORMAL = "normal"
+    """Shed requests that already queued well past the target."""
+
+    HIGH = "high"
+    """Never shed."""
+
+
+class TrafficClass(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    name: str
+    """Name used for metrics labels."""
+
+    user_agents: str
+    """Regular expression searched for in the User-Agent."""
+
+    rate_limit_per_second: float | None = Field(default=None, gt=0)
+    """Per client_id rate limit for the class, overriding the global one."""
+
+    rate_limit_burst: int | None = Field(default=None, ge=1)
+    """Per client_id burst for the class, overriding the global one."""
+
+    shed_priority: ShedPriority = ShedPriority.NORMAL
+    """How readily requests of the class are shed under overload."""
+
+    revoked_grant_workaround: bool = False
+    """Serve the revoked-grant workaround token to the class."""
+
+    workaround_expires_in: int | None = Field(default=None, ge=1)
+    """
+    Expiry of the workaround token for the class, overriding
+    `revoked_grant_workaround_expires_in`. This is how long the client caches
+    it before asking again.
+    """
+
+    @field_validator("user_agents")
+    @classmethod
+    def check_user_agents(cls, value: str) -> str:
+        try:
+            _ = re.compile(value)
+        except re.error as e:
+            raise ValueError(f"Invalid User-Agent pattern: {e}") from e
+        return value
+
+
+class FetchTransport(StrEnum):
+    REQUESTS = "requests"
+    HTTP2 = "http2"
+
+
 class FetchSettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="FETCH_")
 
@@ -70,6 +134,18 @@ class FetchSettings(BaseSettings):
     upstream OAuth endpoint for a single fetch attempt.
     """
 
+    adaptive_timeout: bool = False
+    """
+    Shorten the attempt timeout to a multiple of recently observed upstream
+    latency, so stuck attempts are retried sooner. `timeout` stays the limit.
+    """
+
+    adaptive_timeout_multiplier: float = Field(3.0, ge=1)
+    """How far past the slow end of recent latency an attempt may run."""
+
+    adaptive_timeout_min: float = Field(1.0, gt=0)
+    """Shortest attempt timeout adaptive timeouts can pick."""
+
     total_retries: int = 3
     """Maximum number of retries for fetching oauth data."""
 
@@ -79,6 +155,117 @@ class FetchSettings(BaseSettings):
     retry_budget_refill_per_initial: float = 0.25
     """How much retry budget each initial outgoing request replenishes."""
 
+    retry_budget_directory: Path | None = None
+    """
+    Directory to keep the retry budget and upstream backoff in, shared by every
+    worker process using it. Unset keeps separate state in each process.
+    """
+
+    deferred_retry_delay: float | None = Field(None, ge=0)
+    """
+    Retry delays longer than this are not slept in the request for endpoints
+    in `deferred_retry_endpoints`, callers get temporarily_unavailable with a
+    matching Retry-After instead. Unset always sleeps.
+    """
+
+    deferred_retry_endpoints: set[str] = Field(default_factory=lambda: {"refresh"})
+    """Upstream endpoints whose long retries may be handed back to the caller."""
+
+    refresh_workers: int = Field(0, ge=0)
+    """
+    Threads per process running upstream refreshes for /token, request
+    threads wait for their result. Zero refreshes on the request thread.
+    """
+
+    refresh_queue_size: int = Field(64, ge=1)
+    """Refreshes that may wait for a worker before new ones are rejected."""
+
+    refresh_retry_after: int = Field(1, ge=0)
+    """Retry-After seconds returned to clients rejected by the refresh queue."""
+
+    pool_maxsize: int = Field(10, ge=1)
+    """Pooled keep-alive connections kept per upstream host."""
+
+    pool_maxsize_per_host: dict[str, int] = Field(default_factory=dict)
+    """Per host overrides of `pool_maxsize`, keyed by upstream host name."""
+
+    connection_max_age_seconds: float | None = Field(None, gt=0)
+    """Retire pooled upstream connections older than this, unset keeps them."""
+
+    transport: FetchTransport = FetchTransport.REQUESTS
+    """Upstream transport, `http2` needs the optional `httpx[http2]` dependency."""
+
+    http2_max_connections: int = Field(2, ge=1)
+    """HTTP/2 connections kept open upstream, each multiplexes requests."""
+
+    concurrency_limit_enabled: bool = False
+    """Cap concurrent upstream requests with an adaptive per-process limit."""
+
+    concurrency_limit_initial: int = Field(20, ge=1)
+    """Starting limit on concurrent upstream requests per process."""
+
+    concurrency_limit_max: int = Field(200, ge=1)
+    """Upper bound the adaptive concurrency limit can grow to."""
+
+    concurrency_limit_backoff_ratio: float = Field(0.9, gt=0, lt=1)
+    """Multiplier applied to the limit on overload or latency spikes."""
+
+    concurrency_limit_latency_tolerance: float = Field(2.0, gt=1)
+    """Latency above this multiple of the baseline counts as overload."""
+
+    concurrency_limit_max_wait: float = Field(0.1, ge=0)
+    """Seconds a request may wait for the limit before it is rejected."""
+
+    concurrency_limit_retry_after: int = Field(1, ge=0)
+    """Retry-After seconds returned to clients rejected by the limit."""
+
+    breaker_enabled: bool = False
+    """Stop calling an upstream endpoint while most attempts to it fail."""
+
+    breaker_window: int = Field(20, ge=1)
+    """Recent attempts per endpoint the breaker failure rate is taken over."""
+
+    breaker_minimum_requests: int = Field(10, ge=1)
+    """Attempts in the window needed before the breaker can open."""
+
+    breaker_failure_rate: float = Field(0.5, gt=0, le=1)
+    """Share of failed attempts in the window that opens the breaker."""
+
+    breaker_open_seconds: float = Field(10.0, gt=0)
+    """Seconds the breaker stays open before letting probes through."""
+
+    breaker_probes: int = Field(3, ge=1)
+    """Probe attempts that must all succeed to close the breaker again."""
+
+    breaker_ramp_seconds: float = Field(30.0, ge=0)
+    """Seconds over which traffic is ramped back up after the breaker closes."""
+
+    hedge_endpoints: set[str] = Field(default_factory=set)
+    """
+    Upstream endpoints to hedge slow requests to by sending a second copy.
+    Only list endpoints the provider handles idempotently, hedges draw from
+    the retry budget. `refresh` is rejected as both copies reach the provider
+    and a rotating refresh token is only accepted once.
+    """
+
+    hedge_max_concurrency: int = Field(8, ge=1)
+    """
+    Hedged requests in flight per process. Sends past this go out without a
+    hedge instead of waiting for a thread.
+    """
+
+    hedge_quantile: float = Field(0.95, gt=0, lt=1)
+    """Quantile of recent upstream latency after which a hedge is sent."""
+
+    hedge_min_delay: float = Field(0.05, ge=0)
+    """Shortest time to wait for a response before sending a hedge."""
+
+    upstream_backoff_enabled: bool = False
+    """Stop calling upstream while `Retry-After` or rate limit headers say to."""
+
+    upstream_backoff_max: float = Field(300.0, gt=0)
+    """Longest a single provider response can stop upstream calls for."""
+
     retry_status_codes: tuple[HTTPStatus, ...] = Field(
         (
             HTTPStatus.TOO_MANY_REQUESTS,
@@ -122,6 +309,16 @@ class FetchSettings(BaseSettings):
     backoff_jitter_max: float = 1.25
     """Upper multiplier bound for retry backoff jitter around the base delay."""
 
+    @field_validator("hedge_endpoints")
+    @classmethod
+    def check_hedge_endpoints(cls, value: set[str]) -> set[str]:
+        if "refresh" in value:
+            raise ValueError(
+                "FETCH_HEDGE_ENDPOINTS can not include refresh, hedges send "
+                "the refresh token upstream twice"
+            )
+        return value
+
 
 class DatabaseSettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="DB_")
@@ -138,6 +335,77 @@ class DatabaseSettings(BaseSettings):
     """ SQlite3 database PRAGMAs to run at connection time for database.
     Note, this is JSON formatted in the ENV."""
 
+    backup_directory: Path | None = None
+    """Directory for scheduled rotating backups. Unset disables scheduling."""
+
+    backup_interval_seconds: float = 86400.0
+    """How often scheduled backups are taken."""
+
+    backup_keep: int = Field(7, ge=1)
+    """Number of scheduled backups to keep in the backup directory."""
+
+    backup_pages: int = Field(256, ge=1)
+    """
+    Database pages copied per backup step. Each step briefly holds the database
+    lock, so smaller steps let writes in more often at the cost of a slower
+    backup.
+    """
+
+    backup_sleep_seconds: float = 0.05
+    """Seconds to sleep between backup steps so writers can make progress."""
+
+
+class ReplicationSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="REPLICATION_")
+
+    change_log: bool = False
+    """
+    Record every token write in an append-only change log and serve it, along
+    with write forwarding, to replicas under /replication.
+    """
+
+    primary_url: str | None = None
+    """
+    Base URL of the primary bridge. Setting this makes the instance a replica:
+    it serves reads from its local database, which `flask followdb` keeps up to
+    date, and forwards token writes to the primary.
+    """
+
+    token: SecretStr | None = None
+    """Bearer token shared between the primary and its replicas."""
+
+    timeout: float = 5.0
+    """Timeout for requests from a replica to the primary."""
+
+    batch_size: int = Field(1000, ge=1)
+    """Number of changes a follower fetches per request."""
+
+    poll_interval_seconds: float = 1.0
+    """How long a caught up follower waits before polling for changes again."""
+
+    retention_seconds: float = 7 * 86400.0
+    """
+    How long `cleandb` keeps changes on the primary. Replicas further behind
+    than this must be re-seeded from a backup.
+    """
+
+    @model_validator(mode="after")
+    def check_token(self) -> "ReplicationSettings":
+        if (self.change_log or self.primary_url) and self.token is None:
+            raise ValueError(
+                "REPLICATION_TOKEN must be set if REPLICATION_CHANGE_LOG "
+                "or REPLICATION_PRIMARY_URL is set"
+            )
+        return self
+
+    @model_validator(mode="after")
+    def check_role(self) -> "ReplicationSettings":
+        if self.change_log and self.primary_url:
+            raise ValueError(
+                "REPLICATION_CHANGE_LOG and REPLICATION_PRIMARY_URL can not both be set"
+            )
+        return self
+
 
 class SentrySettings(BaseSettings):
     model_config = SettingsConfigDict(env_prefix="SENTRY_")
@@ -267,6 +535,31 @@ class LogSettings(BaseSettings):
     """Format string to use for access logs."""
 
 
+class ProvidersSettings(BaseSettings):
+    model_config = SettingsConfigDict(env_prefix="PROVIDERS_")
+
+    mounts: dict[str, Path] = Field(default_factory=dict)
+    """
+    Serve several providers from one process. Maps a path prefix such as
+    `/spotify`, or a host name such as `soundcloud.example.com`, to the env
+    file holding that provider's settings. Note, this is JSON formatted in the
+    ENV.
+    """
+
+    @model_validator(mode="after")
+    def check_mounts(self) -> "ProvidersSettings":
+        for mount in self.mounts:
+            if mount.startswith("/") and (mount == "/" or mount.endswith("/")):
+                raise ValueError(
+                    f"PROVIDERS_MOUNTS path prefix {mount!r} must not end with /"
+                )
+            elif not mount.startswith("/") and ("/" in mount or not mount):
+                raise ValueError(
+                    f"PROVIDERS_MOUNTS key {mount!r} must be a path prefix or host"
+                )
+        return self
+
+
 class Settings(BaseSettings):
     """
     Application settings for oauthclientbridge.
@@ -327,7 +620,15 @@ class Settings(BaseSettings):
     returns a synthetic bearer token instead of 400 invalid_grant. This
     deliberately provokes an upstream 401 from the provider API so affected
     clients stop retrying refresh failures against the bridge. Empty or unset
-    disables the workaround.
+    disables the workaround. Acts as a traffic class after `traffic_classes`
+    with only `revoked_grant_workaround` set.
+    """
+
+    traffic_classes: list[TrafficClass] = Field(default_factory=list)
+    """
+    User-Agent traffic classes, like `[{"name": "legacy", "user_agents":
+    "^OldApp/1\\.", "rate_limit_per_second": 0.1, "shed_priority": "low"}]`.
+    A User-Agent belongs to the first class whose pattern it matches.
     """
 
     revoked_grant_workaround_access_token: str = (
@@ -346,11 +647,107 @@ class Settings(BaseSettings):
     backoff path instead of hammering the bridge.
     """
 
+    stateless_grant_key: SecretStr | None = None
+    """
+    Fernet key enabling stateless grants. When set, /callback hands out the
+    encrypted grant itself as the client_secret instead of storing it, and
+    /token decrypts it without reading the token table. The database then only
+    tracks revocations and refresh token rotation generations. Grants stored
+    in the database before enabling this keep working.
+    """
+
+    stateless_generation_cache_seconds: float = 5.0
+    """
+    How long each process caches stateless grant generations. Revocations and
+    rotations made on other hosts become visible after at most this long.
+    """
+
+    request_budget_seconds: float | None = Field(default=None, gt=0)
+    """
+    Longest a request may spend on upstream and database waits. Callers can
+    ask for less with `X-Request-Deadline` (Unix time) or `grpc-timeout`.
+    Unset only limits requests that send one of those headers.
+    """
+
+    request_deadline_retry_after: int = Field(default=1, ge=0)
+    """Retry-After seconds returned when a request's deadline has already passed."""
+
+    client_rate_limit_per_second: float | None = Field(default=None, gt=0)
+    """
+    Sustained /token requests per second allowed for each client_id, more get
+    temporarily_unavailable with a Retry-After before any database or crypto
+    work. Unset disables the limit.
+    """
+
+    client_rate_limit_burst: int = Field(default=10, ge=1)
+    """Requests a client_id may make at once before the rate limit applies."""
+
+    client_rate_limit_clients: int = Field(default=4096, ge=1)
+    """
+    Client buckets kept, the least recently used are evicted. Should comfortably
+    exceed the clients active within `burst / per_second` seconds.
+    """
+
+    client_rate_limit_directory: Path | None = None
+    """
+    Directory to keep client buckets in, shared by every worker process using
+    it. Unset keeps separate buckets in each process.
+    """
+
+    shed_target_seconds: float | None = Field(default=None, gt=0)
+    """
+    Acceptable time for requests to queue before a worker picks them up, as
+    measured from the proxy's `X-Request-Start` header. Once every request
+    over `shed_interval_seconds` waited longer, requests to `shed_endpoints`
+    that waited over twice this are rejected. Unset disables load shedding.
+    """
+
+    shed_interval_seconds: float = Field(default=1.0, gt=0)
+    """How long queueing has to stay above the target before shedding starts."""
+
+    shed_endpoints: set[str] = Field(default_factory=lambda: {"views.token"})
+    """Endpoints whose requests may be shed under overload."""
+
+    shed_retry_after: int = Field(default=1, ge=0)
+    """Retry-After seconds returned to shed requests."""
+
+    bulkheads: dict[str, int] = Field(default_factory=dict)
+    """
+    Concurrent requests each worker process serves per endpoint, like
+    `{"views.metrics": 1, "views.callback": 4}`. Requests over the limit get
+    temporarily_unavailable straight away. Unlisted endpoints are unlimited.
+    """
+
+    bulkhead_retry_after: int = Field(default=1, ge=0)
+    """Retry-After seconds returned to requests rejected by a bulkhead."""
+
+    heavy_hitters_capacity: int = Field(default=0, ge=0)
+    """
+    Counters kept per process for the client_ids and User-Agents sending the
+    most /token requests, like 100. Counts are approximate once more keys than
+    this are active. Zero, the default, disables tracking.
+    """
+
+    heavy_hitters_top: int = Field(default=10, ge=1)
+    """Heavy hitters exported as metrics and shown by the admin endpoint."""
+
+    heavy_hitters_decay_seconds: float = Field(default=300.0, gt=0)
+    """Heavy hitter counts halve this often so the ranking follows recent traffic."""
+
+    heavy_hitters_directory: Path | None = None
+    """
+    Directory worker processes publish their heavy hitter counts to, merged by
+    whichever process is asked. Unset only shows the answering process.
+    """
+
     oauth: OAuthSettings = Field(default_factory=_settings_factory(OAuthSettings))
     fetch: FetchSettings = Field(default_factory=_settings_factory(FetchSettings))
     database: DatabaseSettings = Field(
         default_factory=_settings_factory(DatabaseSettings)
     )
+    replication: ReplicationSettings = Field(
+        default_factory=_settings_factory(ReplicationSettings)
+    )
     sentry: SentrySettings = Field(default_factory=_settings_factory(SentrySettings))
     log: LogSettings = Field(default_factory=_settings_factory(LogSettings))
     otel: TelemetrySettings = Field(
@@ -366,6 +763,26 @@ class Settings(BaseSettings):
             self.callback_template = self.callback_template_file.read_text()
         return self
 
+    @model_validator(mode="after")
+    def check_stateless_grant_key(self) -> "Settings":
+        if self.stateless_grant_key is not None:
+            try:
+                _ = fernet.Fernet(self.stateless_grant_key.get_secret_value())
+            except (ValueError, binascii.Error) as e:
+                raise ValueError(
+                    "BRIDGE_STATELESS_GRANT_KEY must be a valid Fernet key"
+                ) from e
+        return self
+
+    @model_validator(mode="after")
+    def check_replica_is_stateful(self) -> "Settings":
+        if self.replication.primary_url and self.stateless_grant_key is not None:
+            raise ValueError(
+                "Stateless grant generations are not replicated, "
+                "BRIDGE_STATELESS_GRANT_KEY can not be used on a replica"
+            )
+        return self
+
 
 current_settings: LocalProxy[Settings] = LocalProxy(
     lambda: cast(Settings, current_app.config["SETTINGS"])
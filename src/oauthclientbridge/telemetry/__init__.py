@@ -12,34 +12,60 @@ __all__ = [
     "init_tracing",
     "instrument",
     "instrument_app",
+    "observe_request_queue_time",
     "observe_token_grant_age",
+    "record_bulkhead_rejection",
     "record_client_attempt",
+    "record_client_backoff_rejection",
+    "record_client_breaker_state",
+    "record_client_concurrency_rejection",
+    "record_client_connect",
+    "record_client_connection_eviction",
     "record_client_error",
+    "record_client_hedge",
+    "record_client_pool_checkin",
+    "record_client_pool_checkout",
+    "record_client_pool_discard",
     "record_client_response",
     "record_client_retries",
+    "record_database_backup",
+    "record_database_backup_error",
     "record_database_error",
     "record_database_latency",
     "record_invalid_client_id",
+    "record_load_shed",
+    "record_refresh_queue_rejection",
+    "record_refresh_queue_wait",
     "record_refresh_token_invalidation",
     "record_request_metrics",
     "record_retry_decision",
     "record_server_error",
+    "record_token_rate_limit_rejection",
     "record_workaround",
     "request_refresh",
     "set_build_info",
+    "set_bulkhead_in_flight",
+    "set_client_concurrency",
+    "set_client_latency_estimate",
     "set_client_id",
+    "set_provider",
+    "set_refresh_queue_depth",
     "set_token_state_counts",
+    "set_top_requests",
     "start_background_refresh",
     "stop_background_refresh",
     "uninstrument",
     "otel_log_attributes",
+    "ServerRequest",
 ]
 
 set_client_id = _otel.set_client_id
+set_provider = _otel.set_provider
 record_invalid_client_id = _otel.record_invalid_client_id
 instrument = _otel.instrument
 uninstrument = _otel.uninstrument
 instrument_app = _otel.instrument_app
+ServerRequest = _otel.ServerRequest
 init_tracing = _otel.init_tracing
 init_metrics = _otel.init_metrics
 init_sentry = _sentry.init
@@ -66,6 +92,16 @@ def record_database_error(name: str, error: str) -> None:
     _prometheus.DBErrorCounter.labels(query=name, error=error).inc()
 
 
+def record_database_backup(duration: float, size: int) -> None:
+    _prometheus.DBBackupCounter.labels(result="success").inc()
+    _prometheus.DBBackupDurationHistogram.observe(duration)
+    _prometheus.DBBackupSizeGauge.set(size)
+
+
+def record_database_backup_error() -> None:
+    _prometheus.DBBackupCounter.labels(result="error").inc()
+
+
 def record_server_error(status: HTTPStatus, error: str) -> None:
     _prometheus.ServerErrorCounter.labels(
         endpoint=_prometheus.endpoint(),
@@ -78,6 +114,10 @@ def record_client_attempt(endpoint: str, kind: str) -> None:
     _prometheus.ClientAttemptCounter.labels(endpoint=endpoint, kind=kind).inc()
 
 
+def record_client_hedge(endpoint: str, outcome: str) -> None:
+    _prometheus.ClientHedgeCounter.labels(endpoint=endpoint, outcome=outcome).inc()
+
+
 def record_retry_decision(endpoint: str, decision: str, reason: str) -> None:
     _prometheus.ClientRetryDecisionCounter.labels(
         endpoint=endpoint, decision=decision, reason=reason
@@ -111,9 +151,116 @@ def record_client_response(
     _prometheus.ClientLatencyHistogram.labels(**labels).observe(duration)
 
 
+def record_client_connect(host: str, tls: str) -> None:
+    _prometheus.ClientConnectCounter.labels(host=host, tls=tls).inc()
+
+
+def record_client_pool_checkout(host: str, wait: float) -> None:
+    _prometheus.ClientPoolWaitHistogram.labels(host=host).observe(wait)
+    _prometheus.ClientPoolInUseGauge.labels(host=host).inc()
+
+
+def record_client_pool_checkin(host: str) -> None:
+    _prometheus.ClientPoolInUseGauge.labels(host=host).dec()
+
+
+def record_client_pool_discard(host: str) -> None:
+    _prometheus.ClientPoolDiscardCounter.labels(host=host).inc()
+
+
+def record_client_connection_eviction(host: str, reason: str) -> None:
+    _prometheus.ClientConnectionEvictionCounter.labels(host=host, reason=reason).inc()
+
+
+def record_client_breaker_state(
+    provider: str | None, endpoint: str, state: str, previous: str | None = None
+) -> None:
+    labels = {"oauth_provider": provider or "unknown", "endpoint": endpoint}
+    if previous is not None:
+        _prometheus.ClientBreakerStateGauge.labels(**labels, state=previous).set(0)
+        _prometheus.ClientBreakerTransitionCounter.labels(**labels, state=state).inc()
+    _prometheus.ClientBreakerStateGauge.labels(**labels, state=state).set(1)
+
+
+def set_client_concurrency(provider: str | None, limit: int, queued: int) -> None:
+    _prometheus.ClientConcurrencyLimitGauge.labels(
+        oauth_provider=provider or "unknown"
+    ).set(limit)
+    _prometheus.ClientConcurrencyQueuedGauge.labels(
+        oauth_provider=provider or "unknown"
+    ).set(queued)
+
+
+def record_client_backoff_rejection(provider: str | None) -> None:
+    _prometheus.ClientBackoffRejectionCounter.labels(
+        oauth_provider=provider or "unknown"
+    ).inc()
+
+
+def set_client_latency_estimate(
+    provider: str | None, endpoint: str, estimate: str, value: float
+) -> None:
+    _prometheus.ClientLatencyEstimateGauge.labels(
+        oauth_provider=provider or "unknown", endpoint=endpoint, estimate=estimate
+    ).set(value)
+
+
+def record_client_concurrency_rejection(provider: str | None) -> None:
+    _prometheus.ClientConcurrencyRejectionCounter.labels(
+        oauth_provider=provider or "unknown"
+    ).inc()
+
+
+def set_refresh_queue_depth(provider: str | None, depth: int) -> None:
+    _prometheus.RefreshQueueDepthGauge.labels(oauth_provider=provider or "unknown").set(
+        depth
+    )
+
+
+def record_refresh_queue_wait(provider: str | None, seconds: float) -> None:
+    _prometheus.RefreshQueueWaitHistogram.labels(
+        oauth_provider=provider or "unknown"
+    ).observe(seconds)
+
+
+def record_refresh_queue_rejection(provider: str | None, reason: str) -> None:
+    _prometheus.RefreshQueueRejectionCounter.labels(
+        oauth_provider=provider or "unknown", reason=reason
+    ).inc()
+
+
 def record_refresh_token_invalidation(reason: str) -> None:
     _prometheus.RefreshTokenInvalidationCounter.labels(reason=reason).inc()
 
 
+def observe_request_queue_time(seconds: float) -> None:
+    _prometheus.RequestQueueTimeHistogram.observe(seconds)
+
+
+def record_load_shed(endpoint: str, traffic_class: str) -> None:
+    _prometheus.LoadShedCounter.labels(
+        endpoint=endpoint, traffic_class=traffic_class
+    ).inc()
+
+
+def set_bulkhead_in_flight(partition: str, in_flight: int) -> None:
+    _prometheus.BulkheadInFlightGauge.labels(partition=partition).set(in_flight)
+
+
+def record_bulkhead_rejection(partition: str) -> None:
+    _prometheus.BulkheadRejectionCounter.labels(partition=partition).inc()
+
+
+def set_top_requests(kind: str, counts: list[float], top: int) -> None:
+    for rank in range(top):
+        _prometheus.TopRequestsGauge.labels(kind=kind, rank=str(rank + 1)).set(
+            counts[rank] if rank < len(counts) else 0
+        )
+
+
+def record_token_rate_limit_rejection(traffic_class: str) -> None:
+    _prometheus.TokenRateLimitRejectionCounter.labels(traffic_class=traffic_class).inc()
+
+
 def record_workaround(workaround: str) -> None:
     _prometheus.WorkaroundCounter.labels(workaround=workaround).inc()
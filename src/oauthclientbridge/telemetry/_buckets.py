@@ -64,3 +64,18 @@ TOKEN_GRANT_AGE = (
     31536000,  # 365 days
     float("inf"),
 )
+
+BACKUP_DURATION = (
+    0.1,
+    0.5,
+    1.0,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    300.0,
+    900.0,
+    1800.0,
+    3600.0,
+    float("inf"),
+)
@@ -1,20 +1,37 @@
+import dataclasses
 import importlib.util
 from collections.abc import Mapping
-from typing import Any, assert_never
+from timeit import default_timer
+from typing import TYPE_CHECKING, Any, assert_never
 from urllib.parse import urlsplit
 from wsgiref.util import request_uri
 
+import flask
 import requests
 import structlog
 from flask import Flask
-from opentelemetry import trace
+from opentelemetry import metrics, trace
 from opentelemetry.baggage.propagation import W3CBaggagePropagator
 from opentelemetry.exporter.otlp.proto.http.metric_exporter import OTLPMetricExporter
 from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+from opentelemetry.instrumentation import wsgi as otel_wsgi
+from opentelemetry.instrumentation._semconv import (
+    HTTP_DURATION_HISTOGRAM_BUCKETS_NEW,
+    _get_schema_url,  # pyright: ignore[reportPrivateUsage]
+    _OpenTelemetrySemanticConventionStability,  # pyright: ignore[reportPrivateUsage]
+    _OpenTelemetryStabilitySignalType,  # pyright: ignore[reportPrivateUsage]
+    _report_new,  # pyright: ignore[reportPrivateUsage]
+    _report_old,  # pyright: ignore[reportPrivateUsage]
+    _StabilityMode,  # pyright: ignore[reportPrivateUsage]
+)
 from opentelemetry.instrumentation.flask import FlaskInstrumentor
+from opentelemetry.instrumentation.flask import (
+    __version__ as flask_instrumentation_version,
+)
 from opentelemetry.instrumentation.logging import LoggingInstrumentor
 from opentelemetry.instrumentation.propagators import (
     TraceResponsePropagator,
+    get_global_response_propagator,
     set_global_response_propagator,
 )
 from opentelemetry.instrumentation.requests import RequestsInstrumentor
@@ -22,7 +39,7 @@ from opentelemetry.instrumentation.sqlite3 import SQLite3Instrumentor
 from opentelemetry.instrumentation.system_metrics import (
     SystemMetricsInstrumentor,
 )
-from opentelemetry.metrics import set_meter_provider
+from opentelemetry.metrics import Histogram, UpDownCounter, set_meter_provider
 from opentelemetry.propagate import set_global_textmap
 from opentelemetry.propagators.composite import CompositePropagator
 from opentelemetry.propagators.textmap import TextMapPropagator
@@ -43,7 +60,10 @@ from opentelemetry.sdk.trace.export import (
     ConsoleSpanExporter,
     SimpleSpanProcessor,
 )
+from opentelemetry.semconv.attributes.http_attributes import HTTP_ROUTE
+from opentelemetry.semconv.metrics.http_metrics import HTTP_SERVER_REQUEST_DURATION
 from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+from opentelemetry.util.http import get_excluded_urls
 from requests.structures import CaseInsensitiveDict
 
 # Import the leaf module directly; importing through telemetry's facade creates a cycle.
@@ -53,12 +73,23 @@ from oauthclientbridge.settings import (
     TelemetryComponent,
     TelemetryExporter,
     TelemetrySettings,
+    current_settings,
 )
 from oauthclientbridge.utils import uri
 
 from ._buckets import BYTES, TIME
 from ._resources import otel_log_attributes, resource_attributes
 
+if TYPE_CHECKING:
+    from _typeshed.wsgi import WSGIEnvironment
+
+_SERVER_INSTRUMENTS = "oauthclientbridge.server_instruments"
+# Old semantic convention names the Flask instrumentation still reports.
+_HTTP_SERVER_ACTIVE_REQUESTS = "http.server.active_requests"
+_HTTP_SERVER_DURATION = "http.server.duration"
+_HTTP_TARGET = "http.target"
+_flask_excluded_urls = get_excluded_urls("FLASK")
+
 
 def set_client_id(client_id: types.ClientId) -> None:
     """Associate a canonical client ID with the current request telemetry."""
@@ -68,6 +99,18 @@ def set_client_id(client_id: types.ClientId) -> None:
     sentry.set_user({"client_id": client_id_string})
 
 
+def set_provider() -> None:
+    """Label request telemetry with the provider serving it.
+
+    The resource only carries a provider when the process serves just one, so
+    this keeps traces apart when several providers share a process.
+    """
+    provider = current_settings.otel.oauth_provider
+    if provider:
+        structlog.contextvars.bind_contextvars(oauth_provider=provider)
+        trace.get_current_span().set_attribute("oauth.provider", provider)
+
+
 def record_invalid_client_id(client_id: str) -> None:
     """Preserve the rejected input without treating it as a client identity."""
     structlog.contextvars.bind_contextvars(invalid_client_id=client_id)
@@ -190,6 +233,128 @@ def instrument_app(app: Flask) -> None:
         request_hook=_flask_request_hook,
         response_hook=_flask_response_hook,
     )
+    app.extensions[_SERVER_INSTRUMENTS] = _server_instruments()
+
+
+@dataclasses.dataclass(frozen=True)
+class _ServerInstruments:
+    mode: _StabilityMode
+    active_requests: UpDownCounter
+    duration_old: Histogram | None
+    duration_new: Histogram | None
+
+
+def _server_instruments() -> _ServerInstruments:
+    # Same scope and definitions as FlaskInstrumentor.instrument_app, so the
+    # SDK hands back the instruments the Flask instrumentation records to.
+    mode = _OpenTelemetrySemanticConventionStability._get_opentelemetry_stability_opt_in_mode(  # pyright: ignore[reportPrivateUsage]
+        _OpenTelemetryStabilitySignalType.HTTP
+    )
+    meter = metrics.get_meter(
+        FlaskInstrumentor.__module__,
+        flask_instrumentation_version,
+        schema_url=_get_schema_url(mode),
+    )
+    if _report_new(mode):
+        active_requests = meter.create_up_down_counter(
+            name=_HTTP_SERVER_ACTIVE_REQUESTS,
+            unit="{request}",
+            description="Number of active HTTP server requests.",
+        )
+    else:
+        active_requests = meter.create_up_down_counter(
+            name=_HTTP_SERVER_ACTIVE_REQUESTS,
+            unit="requests",
+            description="Measures the number of concurrent HTTP requests that are currently in-flight.",
+        )
+    return _ServerInstruments(
+        mode=mode,
+        active_requests=active_requests,
+        duration_old=meter.create_histogram(
+            name=_HTTP_SERVER_DURATION,
+            unit="ms",
+            description="Measures the duration of inbound HTTP requests.",
+        )
+        if _report_old(mode)
+        else None,
+        duration_new=meter.create_histogram(
+            name=HTTP_SERVER_REQUEST_DURATION,
+            unit="s",
+            description="Duration of HTTP server requests.",
+            explicit_bucket_boundaries_advisory=HTTP_DURATION_HISTOGRAM_BUCKETS_NEW,
+        )
+        if _report_new(mode)
+        else None,
+    )
+
+
+class ServerRequest:
+    """Request served without going through the app's WSGI callable.
+
+    `FlaskInstrumentor` wraps `app.wsgi_app`. Its request hooks start and end
+    the span, but the wrapper adds the response to it and records the
+    http.server metrics. This does the same for requests the ASGI bridge
+    dispatches itself: call `start_response` in the request context and
+    `finish` once the context is popped.
+    """
+
+    def __init__(self, app: Flask, environ: "WSGIEnvironment") -> None:
+        self._instruments: _ServerInstruments = app.extensions[_SERVER_INSTRUMENTS]
+        self._start = default_timer()
+        self._attributes = otel_wsgi.collect_request_attributes(
+            environ, self._instruments.mode
+        )
+        self._active_attributes = otel_wsgi._parse_active_request_count_attrs(  # pyright: ignore[reportPrivateUsage, reportUnknownMemberType]
+            self._attributes, self._instruments.mode
+        )
+        self._route: str | None = None
+        self._traced = False
+        self._instruments.active_requests.add(1, self._active_attributes)
+
+    def start_response(self, status: str, headers: list[tuple[str, str]]) -> None:
+        if _flask_excluded_urls.url_disabled(flask.request.url):
+            return
+
+        self._traced = True
+        if flask.request.url_rule is not None:
+            self._route = str(flask.request.url_rule)
+        if propagator := get_global_response_propagator():
+            propagator.inject(
+                headers, setter=otel_wsgi.default_response_propagation_setter
+            )
+
+        span = trace.get_current_span()
+        otel_wsgi.add_response_attributes(
+            span, status, headers, self._attributes, self._instruments.mode
+        )
+        if span.is_recording() and (
+            custom := otel_wsgi.collect_custom_response_headers_attributes(headers)
+        ):
+            span.set_attributes(custom)
+        _flask_response_hook(span, status, headers)
+
+    def finish(self) -> None:
+        try:
+            if self._traced:
+                self._record_duration(default_timer() - self._start)
+        finally:
+            self._instruments.active_requests.add(-1, self._active_attributes)
+
+    def _record_duration(self, seconds: float) -> None:
+        if (histogram := self._instruments.duration_old) is not None:
+            attributes = otel_wsgi._parse_duration_attrs(  # pyright: ignore[reportPrivateUsage]
+                self._attributes, _StabilityMode.DEFAULT
+            )
+            if self._route:
+                attributes[_HTTP_TARGET] = self._route
+            histogram.record(max(round(seconds * 1000), 0), attributes)
+        if (histogram := self._instruments.duration_new) is not None:
+            attributes = otel_wsgi._parse_duration_attrs(  # pyright: ignore[reportPrivateUsage]
+                self._attributes, _StabilityMode.HTTP
+            )
+            if self._route:
+                attributes[HTTP_ROUTE] = self._route
+            histogram.record(max(seconds, 0), attributes)
 
 
 def init_tracing(
@@ -11,7 +11,7 @@ import prometheus_client.multiprocess
 from oauthclientbridge.settings import TelemetrySettings, current_settings
 from oauthclientbridge.utils import time as time_utils
 
-from ._buckets import BYTES, TIME, TOKEN_GRANT_AGE
+from ._buckets import BACKUP_DURATION, BYTES, TIME, TOKEN_GRANT_AGE
 from ._resources import BuildInfoLabels, build_info_labels
 
 registry = prometheus_client.CollectorRegistry()
@@ -34,6 +34,27 @@ DBLatencyHistorgram = prometheus_client.Histogram(
     registry=registry,
 )
 
+DBBackupCounter = prometheus_client.Counter(
+    "oauth_database_backup_total",
+    "Database backups by result.",
+    ["result"],
+    registry=registry,
+)
+
+DBBackupDurationHistogram = prometheus_client.Histogram(
+    "oauth_database_backup_duration_seconds",
+    "Duration of successful database backups.",
+    buckets=BACKUP_DURATION,
+    registry=registry,
+)
+
+DBBackupSizeGauge = prometheus_client.Gauge(
+    "oauth_database_backup_bytes",
+    "Size of the most recent successful database backup.",
+    multiprocess_mode="mostrecent",
+    registry=registry,
+)
+
 ServerErrorCounter = prometheus_client.Counter(
     "oauth_server_error_total",
     "OAuth errors returned to users.",
@@ -87,6 +108,21 @@ ClientAttemptCounter = prometheus_client.Counter(
     registry=registry,
 )
 
+ClientLatencyEstimateGauge = prometheus_client.Gauge(
+    "oauth_client_latency_estimate_seconds",
+    "Streaming estimates of upstream latency and the derived attempt timeout.",
+    ["oauth_provider", "endpoint", "estimate"],
+    multiprocess_mode="livemax",
+    registry=registry,
+)
+
+ClientHedgeCounter = prometheus_client.Counter(
+    "oauth_client_hedges",
+    "Hedged OAuth client attempts, labeled with whether the hedge won.",
+    ["endpoint", "outcome"],
+    registry=registry,
+)
+
 ClientRetryDecisionCounter = prometheus_client.Counter(
     "oauth_client_retry_decisions",
     "OAuth retry decisions and reasons.",
@@ -111,6 +147,112 @@ ClientResponseSizeHistogram = prometheus_client.Histogram(
 )
 
 
+ClientConnectCounter = prometheus_client.Counter(
+    "oauth_client_connects",
+    "New upstream connections and their TLS handshake kind.",
+    ["host", "tls"],
+    registry=registry,
+)
+
+ClientPoolWaitHistogram = prometheus_client.Histogram(
+    "oauth_client_pool_wait_seconds",
+    "Time spent waiting for a pooled upstream connection.",
+    ["host"],
+    buckets=TIME,
+    registry=registry,
+)
+
+ClientPoolInUseGauge = prometheus_client.Gauge(
+    "oauth_client_pool_in_use",
+    "Upstream connections currently checked out of the pool.",
+    ["host"],
+    multiprocess_mode="livesum",
+    registry=registry,
+)
+
+ClientPoolDiscardCounter = prometheus_client.Counter(
+    "oauth_client_pool_discards",
+    "Upstream connections closed because the pool was full.",
+    ["host"],
+    registry=registry,
+)
+
+ClientConnectionEvictionCounter = prometheus_client.Counter(
+    "oauth_client_connection_evictions",
+    "Upstream connections dropped before they were done.",
+    ["host", "reason"],
+    registry=registry,
+)
+
+ClientBreakerStateGauge = prometheus_client.Gauge(
+    "oauth_client_breaker_state",
+    "Processes with an upstream circuit breaker in each state.",
+    ["oauth_provider", "endpoint", "state"],
+    multiprocess_mode="livesum",
+    registry=registry,
+)
+
+ClientBreakerTransitionCounter = prometheus_client.Counter(
+    "oauth_client_breaker_transitions",
+    "Upstream circuit breaker state changes, labeled with the new state.",
+    ["oauth_provider", "endpoint", "state"],
+    registry=registry,
+)
+
+ClientConcurrencyLimitGauge = prometheus_client.Gauge(
+    "oauth_client_concurrency_limit",
+    "Adaptive limit on concurrent upstream requests.",
+    ["oauth_provider"],
+    multiprocess_mode="livesum",
+    registry=registry,
+)
+
+ClientConcurrencyQueuedGauge = prometheus_client.Gauge(
+    "oauth_client_concurrency_queued",
+    "Upstream requests waiting for the concurrency limit.",
+    ["oauth_provider"],
+    multiprocess_mode="livesum",
+    registry=registry,
+)
+
+ClientConcurrencyRejectionCounter = prometheus_client.Counter(
+    "oauth_client_concurrency_rejections",
+    "Upstream requests rejected after waiting for the concurrency limit.",
+    ["oauth_provider"],
+    registry=registry,
+)
+
+ClientBackoffRejectionCounter = prometheus_client.Counter(
+    "oauth_client_backoff_rejections",
+    "Upstream requests rejected while the provider asked us to back off.",
+    ["oauth_provider"],
+    registry=registry,
+)
+
+RefreshQueueDepthGauge = prometheus_client.Gauge(
+    "oauth_refresh_queue_depth",
+    "Upstream refreshes waiting for a refresh executor thread.",
+    ["oauth_provider"],
+    multiprocess_mode="livesum",
+    registry=registry,
+)
+
+RefreshQueueWaitHistogram = prometheus_client.Histogram(
+    "oauth_refresh_queue_wait_seconds",
+    "Time upstream refreshes waited for a refresh executor thread.",
+    ["oauth_provider"],
+    buckets=TIME,
+    registry=registry,
+)
+
+RefreshQueueRejectionCounter = prometheus_client.Counter(
+    "oauth_refresh_queue_rejections",
+    "Upstream refreshes rejected by the refresh executor.",
+    ["oauth_provider", "reason"],
+    registry=registry,
+)
+
+
 BuildInfoGauge = prometheus_client.Gauge(
     "oauth_build_info",
     "Build and deployment metadata.",
@@ -119,6 +261,50 @@ BuildInfoGauge = prometheus_client.Gauge(
     registry=registry,
 )
 
+TokenRateLimitRejectionCounter = prometheus_client.Counter(
+    "oauth_token_rate_limit_rejections",
+    "Token requests rejected by the per client rate limit.",
+    ["traffic_class"],
+    registry=registry,
+)
+
+RequestQueueTimeHistogram = prometheus_client.Histogram(
+    "oauth_request_queue_seconds",
+    "Time requests waited before a worker picked them up, from X-Request-Start.",
+    buckets=TIME,
+    registry=registry,
+)
+
+LoadShedCounter = prometheus_client.Counter(
+    "oauth_load_shed_requests",
+    "Requests rejected by load shedding while overloaded.",
+    ["endpoint", "traffic_class"],
+    registry=registry,
+)
+
+BulkheadInFlightGauge = prometheus_client.Gauge(
+    "oauth_bulkhead_in_flight",
+    "Requests in flight per bulkhead partition.",
+    ["partition"],
+    multiprocess_mode="livesum",
+    registry=registry,
+)
+
+BulkheadRejectionCounter = prometheus_client.Counter(
+    "oauth_bulkhead_rejections",
+    "Requests rejected because their bulkhead partition was full.",
+    ["partition"],
+    registry=registry,
+)
+
+TopRequestsGauge = prometheus_client.Gauge(
+    "oauth_token_top_requests",
+    "Recent /token requests of the heaviest client_ids and User-Agents by rank.",
+    ["kind", "rank"],
+    multiprocess_mode="mostrecent",
+    registry=registry,
+)
+
 RefreshTokenInvalidationCounter = prometheus_client.Counter(
     "oauth_refresh_token_invalidations_total",
     "Stored refresh tokens invalidated locally after authoritative upstream failures.",
@@ -143,7 +329,7 @@ TokenGrantAgeHistogram = prometheus_client.Histogram(
 TokenStateGauge = prometheus_client.Gauge(
     "oauth_token_records",
     "Stored token records by database state.",
-    ["state"],
+    ["oauth_provider", "state"],
     multiprocess_mode="mostrecent",
     registry=registry,
 )
@@ -214,6 +400,8 @@ def set_build_info(settings: TelemetrySettings) -> None:
     BuildInfoGauge.labels(**build_info_labels(settings)).set(1)
 
 
-def set_token_state_counts(counts: dict[str, int]) -> None:
+def set_token_state_counts(counts: dict[str, int], provider: str | None) -> None:
     for state, count in counts.items():
-        TokenStateGauge.labels(state=state).set(count)
+        TokenStateGauge.labels(oauth_provider=provider or "unknown", state=state).set(
+            count
+        )
@@ -0,0 +1,72 @@
+"""User-Agent traffic classes.
+
+Each of `traffic_classes` names a User-Agent regular expression and how the
+bridge treats matching clients: their own rate limit, how readily they are
+shed under overload and whether the revoked-grant workaround applies. The
+older `revoked_grant_workaround_user_agents` acts as one last class with
+just the workaround.
+
+Patterns are compiled once and searched in order, each on its own so inline
+flags like `(?i)` and groups work as in the single workaround pattern they
+extend. Results are cached per distinct User-Agent.
+"""
+
+import functools
+import re
+
+import flask
+
+from oauthclientbridge import runtime
+from oauthclientbridge.settings import ShedPriority, TrafficClass
+
+_CACHE_SIZE = 1024
+_WORKAROUND_CLASS = "revoked_grant_workaround"
+
+
+class Classifier:
+    """Matches User-Agents against traffic classes, first listed class wins."""
+
+    def __init__(self, classes: tuple[TrafficClass, ...]) -> None:
+        self._patterns = [(re.compile(c.user_agents), c) for c in classes]
+        self.classify = functools.lru_cache(maxsize=_CACHE_SIZE)(self._classify)
+
+    def _classify(self, user_agent: str) -> TrafficClass | None:
+        if not user_agent:
+            return None
+        for pattern, traffic_class in self._patterns:
+            if pattern.search(user_agent):
+                return traffic_class
+        return None
+
+
+def classify(user_agent: str | None = None) -> TrafficClass | None:
+    """Traffic class of `user_agent`, by default the current request's."""
+    if user_agent is None:
+        user_agent = flask.request.user_agent.string
+    return runtime.get().classifier.classify(user_agent)
+
+
+def name(traffic_class: TrafficClass | None) -> str:
+    return traffic_class.name if traffic_class is not None else "default"
+
+
+def shed_priority(traffic_class: TrafficClass | None) -> ShedPriority:
+    if traffic_class is None:
+        return ShedPriority.NORMAL
+    return traffic_class.shed_priority
+
+
+@functools.lru_cache()
+def get_classifier(
+    classes: tuple[TrafficClass, ...], workaround_user_agents: str | None = None
+) -> Classifier:
+    """Compiled classifier for the configured classes, shared by equal apps."""
+    if workaround_user_agents:
+        classes += (
+            TrafficClass(
+                name=_WORKAROUND_CLASS,
+                user_agents=workaround_user_agents,
+                revoked_grant_workaround=True,
+            ),
+        )
+    return Classifier(classes)
@@ -0,0 +1,162 @@
+"""Streaming NDJSON export and import of the token database.
+
+Each line is a self-describing JSON object keyed by `type`, so dumps can be
+moved between hosts, merged or split independently of the SQLite schema.
+"""
+
+import itertools
+import json
+import time
+from collections.abc import Callable, Iterable, Iterator
+from datetime import UTC, datetime
+from typing import IO, Any
+
+from oauthclientbridge import db, types
+
+
+class Progress:
+    """Periodically report how many records were handled and at what rate."""
+
+    def __init__(
+        self,
+        verb: str,
+        echo: Callable[[str], None],
+        interval: float = 5.0,
+    ) -> None:
+        self._verb = verb
+        self._echo = echo
+        self._interval = interval
+        self._start = time.monotonic()
+        self._last_report = self._start
+
+    def __call__(self, count: int) -> None:
+        now = time.monotonic()
+        if now - self._last_report >= self._interval:
+            self._last_report = now
+            self._report(count, now)
+
+    def done(self, count: int) -> None:
+        self._report(count, time.monotonic())
+
+    def _report(self, count: int, now: float) -> None:
+        elapsed = now - self._start
+        rate = count / elapsed if elapsed > 0 else 0.0
+        self._echo(f"{self._verb} {count} records in {elapsed:.1f}s ({rate:.0f}/s)")
+
+
+def export_ndjson(
+    output: IO[str],
+    batch_size: int = 1000,
+    progress: Callable[[int], None] | None = None,
+) -> int:
+    """Write every token record and grant generation as NDJSON lines."""
+    count = 0
+    lines = itertools.chain(
+        (token_line(record) for record in db.iter_records(batch_size)),
+        (_generation_line(record) for record in db.iter_generations(batch_size)),
+    )
+    for line in lines:
+        _ = output.write(json.dumps(line, separators=(",", ":")) + "\n")
+        count += 1
+        if progress is not None and count % batch_size == 0:
+            progress(count)
+    return count
+
+
+def import_ndjson(
+    source: IO[str],
+    batch_size: int = 1000,
+    replace: bool = False,
+    progress: Callable[[int], None] | None = None,
+) -> int:
+    """Read NDJSON lines and insert them in bounded transactional batches.
+
+    Returns the number of records read. Existing tokens are kept unless
+    `replace` is set, while grant generations are always merged.
+    """
+    count = 0
+    for batch in itertools.batched(_parse_lines(source), batch_size):
+        tokens = [record for record in batch if isinstance(record, db.TokenRecord)]
+        generations = [
+            record for record in batch if isinstance(record, db.GenerationRecord)
+        ]
+        if tokens:
+            _ = db.insert_records(tokens, replace=replace, batch_size=batch_size)
+        if generations:
+            _ = db.insert_generations(generations, batch_size=batch_size)
+
+        count += len(batch)
+        if progress is not None:
+            progress(count)
+    return count
+
+
+def _parse_lines(
+    lines: Iterable[str],
+) -> Iterator[db.TokenRecord | db.GenerationRecord]:
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield parse_line(json.loads(line))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid record on line {number}: {e}") from e
+
+
+def parse_line(data: dict[str, Any]) -> db.TokenRecord | db.GenerationRecord:
+    """Parse one decoded line back into the record it was exported from."""
+    client_id = data["client_id"]
+    if not isinstance(client_id, str):
+        raise ValueError(f"client_id is not a string: {client_id!r}")
+    match data["type"]:
+        case "token":
+            token = data["token"]
+            if token is not None and not isinstance(token, str):
+                raise ValueError(f"token is not a string: {token!r}")
+            return db.TokenRecord(
+                client_id=db.validate_client_id(client_id),
+                encrypted_token=None
+                if token is None
+                else types.EncryptedToken(token.encode("ascii")),
+                created_at=_parse_timestamp(data.get("created_at")),
+                last_updated_at=_parse_timestamp(data.get("last_updated_at")),
+            )
+        case "grant_generation":
+            generation = data["generation"]
+            return db.GenerationRecord(
+                client_id=db.validate_client_id(client_id),
+                generation=None if generation is None else int(generation),
+                last_updated_at=_parse_timestamp(data.get("last_updated_at")),
+            )
+        case unknown:
+            raise ValueError(f"unknown type {unknown!r}")
+
+
+def token_line(record: db.TokenRecord) -> dict[str, Any]:
+    """Encode a token record as a JSON compatible line."""
+    return {
+        "type": "token",
+        "client_id": str(record.client_id),
+        "token": None
+        if record.encrypted_token is None
+        else record.encrypted_token.decode("ascii"),
+        "created_at": _timestamp(record.created_at),
+        "last_updated_at": _timestamp(record.last_updated_at),
+    }
+
+
+def _generation_line(record: db.GenerationRecord) -> dict[str, Any]:
+    return {
+        "type": "grant_generation",
+        "client_id": str(record.client_id),
+        "generation": record.generation,
+        "last_updated_at": _timestamp(record.last_updated_at),
+    }
+
+
+def _timestamp(value: datetime | None) -> int | None:
+    return None if value is None else int(value.timestamp())
+
+
+def _parse_timestamp(value: int | None) -> datetime | None:
+    return None if value is None else datetime.fromtimestamp(int(value), UTC)
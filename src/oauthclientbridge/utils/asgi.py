@@ -0,0 +1,369 @@
+"""Serve Flask apps from an ASGI server.
+
+Endpoints with an async view run as coroutines on the event loop, so their
+upstream waits do not hold a thread. Everything else is handed to the app's
+WSGI callable in a worker thread. Async views are dispatched like Flask does
+it: the same before, after and teardown request hooks and error handlers run,
+but in worker threads, as they may touch the database, crypto or file locks.
+Views should do the same for their own blocking work, see `ThreadedSteps`.
+
+Request bodies are read up front, up to the app's `MAX_CONTENT_LENGTH` or
+`MAX_BODY_SIZE` when it has none.
+"""
+
+import asyncio
+import contextvars
+import functools
+import io
+import sys
+from collections.abc import (
+    Awaitable,
+    Callable,
+    Generator,
+    Iterable,
+    Mapping,
+    MutableMapping,
+)
+from typing import TYPE_CHECKING, Any, Generic, Protocol, TypeVar, cast
+
+from flask import Flask, request_started
+from flask.typing import ResponseReturnValue
+from werkzeug.exceptions import HTTPException, NotFound, RequestEntityTooLarge
+
+if TYPE_CHECKING:
+    from _typeshed import OptExcInfo
+    from _typeshed.wsgi import WSGIApplication, WSGIEnvironment
+
+Message = MutableMapping[str, Any]
+Scope = MutableMapping[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+AsyncView = Callable[[], Awaitable[ResponseReturnValue]]
+Resolver = Callable[["WSGIEnvironment"], Flask | None]
+StartResponse = Callable[[str, list[tuple[str, str]]], None]
+
+MAX_BODY_SIZE = 1024 * 1024
+
+_Response = tuple[int, list[tuple[bytes, bytes]], list[bytes]]
+_T = TypeVar("_T")
+_YieldT = TypeVar("_YieldT")
+_SendT = TypeVar("_SendT")
+
+# Context the request is dispatched in, set in that context itself.
+_request_context: contextvars.ContextVar[contextvars.Context] = contextvars.ContextVar(
+    "asgi_request_context"
+)
+
+
+class Recorder(Protocol):
+    """Instrumentation for a request the bridge dispatches natively.
+
+    `start_response` is called in the request context with the response's
+    status and headers, which it may add to. `finish` is called once the
+    request context is popped.
+    """
+
+    def start_response(self, status: str, headers: list[tuple[str, str]]) -> None: ...
+
+    def finish(self) -> None: ...
+
+
+class ASGIBridge:
+    """ASGI app running `views`, keyed by endpoint, natively.
+
+    `resolve` picks the Flask app for a request, adjusting SCRIPT_NAME and
+    PATH_INFO for mounted apps, see `providers.ProviderDispatcher.resolve`.
+    `record` instruments natively dispatched requests, like instrumentation
+    wrapping the app's WSGI callable would.
+    """
+
+    def __init__(
+        self,
+        resolve: Resolver,
+        views: Mapping[str, AsyncView],
+        record: Callable[[Flask, "WSGIEnvironment"], Recorder] | None = None,
+    ) -> None:
+        self._resolve = resolve
+        self._views = dict(views)
+        self._record = record
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            return await _lifespan(receive, send)
+        elif scope["type"] != "http":
+            raise ValueError(f"Unsupported ASGI scope type {scope['type']!r}")
+
+        environ = _environ(scope)
+        app = self._resolve(environ)
+        if app is None:
+            response = await asyncio.to_thread(_call, NotFound(), environ)
+        elif (body := await _read_body(receive, _body_limit(app))) is None:
+            response = await asyncio.to_thread(_call, RequestEntityTooLarge(), environ)
+        else:
+            _set_body(environ, body)
+            response = await self._handle(app, environ)
+
+        status, headers, chunks = response
+        await send(
+            {"type": "http.response.start", "status": status, "headers": headers}
+        )
+        await send({"type": "http.response.body", "body": b"".join(chunks)})
+
+    async def _handle(self, app: Flask, environ: "WSGIEnvironment") -> _Response:
+        view = self._view(app, environ)
+        if view is None:
+            return await asyncio.to_thread(_call, app, environ)
+
+        record = self._record(app, environ) if self._record else None
+        context = contextvars.copy_context()
+        _ = context.run(_request_context.set, context)
+        return await asyncio.create_task(
+            _dispatch(app, environ, view, record), context=context
+        )
+
+    def _view(self, app: Flask, environ: "WSGIEnvironment") -> AsyncView | None:
+        try:
+            endpoint, _ = app.url_map.bind_to_environ(environ).match()
+        except HTTPException:
+            return None
+        return self._views.get(str(endpoint))
+
+
+async def _dispatch(
+    app: Flask,
+    environ: "WSGIEnvironment",
+    view: AsyncView,
+    record: Recorder | None,
+) -> _Response:
+    """Mirror `Flask.wsgi_app` and `Flask.full_dispatch_request` for `view`.
+
+    Runs in a task of its own, with everything but the view in worker threads
+    entering the task's context, see `to_thread`.
+    """
+    ctx = app.request_context(environ)
+    error: BaseException | None = None
+    try:
+        try:
+            await to_thread(ctx.push)
+            try:
+                rv = await to_thread(_preprocess_request, app)
+                if rv is None:
+                    rv = await view()
+            except Exception as e:
+                rv = await to_thread(app.handle_user_exception, e)
+            response = await to_thread(app.finalize_request, rv)
+        except Exception as e:
+            error = e
+            response = await to_thread(_handle_exception, app, e)
+        except BaseException as e:
+            error = e
+            raise
+        start_response = record.start_response if record else None
+        return await to_thread(_call, response, environ, start_response)
+    finally:
+        try:
+            if error is not None and app.should_ignore_error(error):
+                error = None
+            await to_thread(ctx.pop, error)
+        finally:
+            if record is not None:
+                record.finish()
+
+
+def _handle_exception(app: Flask, e: Exception) -> "WSGIApplication":
+    # Flask logs the exception being handled, which is per thread.
+    try:
+        raise e
+    except Exception:
+        return app.handle_exception(e)
+
+
+def _preprocess_request(app: Flask) -> ResponseReturnValue | None:
+    request_started.send(app, _async_wrapper=app.ensure_sync)
+    return app.preprocess_request()
+
+
+async def to_thread(func: Callable[..., _T], /, *args: Any) -> _T:
+    """`asyncio.to_thread` in the context of the request being dispatched.
+
+    Flask's request context, logging context and the active span are context
+    variables that are set and reset by different calls, so these all have to
+    run in one context. The worker only enters it once the calling task has
+    suspended, a context can not be entered by two threads at once. Outside a
+    dispatched request this is `asyncio.to_thread`.
+    """
+    context = _request_context.get(None)
+    if context is None:
+        return await asyncio.to_thread(func, *args)
+
+    loop = asyncio.get_running_loop()
+    result: asyncio.Future[_T] = loop.create_future()
+
+    def submit() -> None:
+        work = loop.run_in_executor(None, functools.partial(context.run, func, *args))
+        work.add_done_callback(functools.partial(_copy_result, result))
+
+    # Callbacks run after the current task step, which leaves the context.
+    _ = loop.call_soon(submit)
+    return await result
+
+
+def _copy_result(target: "asyncio.Future[_T]", source: "asyncio.Future[_T]") -> None:
+    if target.cancelled():
+        return
+    elif (error := source.exception()) is not None:
+        target.set_exception(error)
+    else:
+        target.set_result(source.result())
+
+
+class Finished(Exception):
+    """The generator driven by `ThreadedSteps` returned `value`."""
+
+    def __init__(self, value: object) -> None:
+        super().__init__()
+        self.value = value
+
+
+class ThreadedSteps(Generic[_YieldT, _SendT]):
+    """Generator advanced in worker threads with `to_thread`.
+
+    For views and helpers that yield what they need to wait for to a caller
+    on the event loop, while the steps in between may block. `send` and
+    `throw` return the next value yielded and raise `Finished` once the
+    generator returns.
+    """
+
+    def __init__(self, steps: Generator[_YieldT, _SendT, object]) -> None:
+        self._steps = steps
+
+    async def send(self, value: _SendT | None) -> _YieldT:
+        return await to_thread(self._advance, self._steps.send, value)
+
+    async def throw(self, error: BaseException) -> _YieldT:
+        return await to_thread(self._advance, self._steps.throw, error)
+
+    @staticmethod
+    def _advance(step: Callable[[Any], _YieldT], value: object) -> _YieldT:
+        try:
+            return step(value)
+        except StopIteration as stop:
+            # Futures can not carry StopIteration.
+            raise Finished(stop.value) from None
+
+
+def _call(
+    app: "WSGIApplication",
+    environ: "WSGIEnvironment",
+    on_start: StartResponse | None = None,
+) -> _Response:
+    """Call a WSGI app and collect its response."""
+    started: list[tuple[str, list[tuple[str, str]]]] = []
+    body: list[bytes] = []
+
+    def start_response(
+        status: str,
+        headers: list[tuple[str, str]],
+        exc_info: "OptExcInfo | None" = None,
+    ) -> Callable[[bytes], object]:
+        if exc_info and exc_info[1] and started:
+            raise exc_info[1].with_traceback(exc_info[2])
+        if on_start is not None:
+            on_start(status, headers)
+        started[:] = [(status, headers)]
+        return body.append
+
+    iterable: Iterable[bytes] = app(environ, start_response)
+    try:
+        body.extend(iterable)
+    finally:
+        if close := getattr(iterable, "close", None):
+            close()
+
+    status, headers = started[0]
+    return (
+        int(status.split(" ", 1)[0]),
+        [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers],
+        body,
+    )
+
+
+def _environ(scope: Scope) -> "WSGIEnvironment":
+    root_path: str = scope.get("root_path", "")
+    path: str = scope["path"]
+    if root_path and path.startswith(root_path):
+        path = path[len(root_path) :]
+    server_name, server_port = scope.get("server") or ("localhost", 80)
+
+    environ: dict[str, Any] = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": root_path.encode().decode("latin-1"),
+        "PATH_INFO": path.encode().decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server_name,
+        "SERVER_PORT": str(server_port),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "CONTENT_LENGTH": "0",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    raw_path: bytes = scope.get("raw_path") or scope["path"].encode()
+    if query := scope.get("query_string"):
+        raw_path += b"?" + query
+    environ["REQUEST_URI"] = environ["RAW_URI"] = raw_path.decode("latin-1")
+    if client := scope.get("client"):
+        environ["REMOTE_ADDR"], environ["REMOTE_PORT"] = client[0], str(client[1])
+
+    headers: list[tuple[bytes, bytes]] = scope.get("headers", [])
+    for raw_name, raw_value in headers:
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        value = raw_value.decode("latin-1")
+        if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            name = f"HTTP_{name}"
+        elif name == "CONTENT_LENGTH":
+            continue
+        environ[name] = f"{environ[name]},{value}" if name in environ else value
+    return environ
+
+
+def _body_limit(app: Flask) -> int:
+    limit = cast(int | None, app.config["MAX_CONTENT_LENGTH"])
+    return MAX_BODY_SIZE if limit is None else limit
+
+
+def _set_body(environ: "WSGIEnvironment", body: bytes) -> None:
+    environ["CONTENT_LENGTH"] = str(len(body))
+    environ["wsgi.input"] = io.BytesIO(body)
+
+
+async def _read_body(receive: Receive, limit: int) -> bytes | None:
+    """Request body, None once it grows past `limit` bytes."""
+    chunks: list[bytes] = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunk: bytes = message.get("body", b"")
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+async def _lifespan(receive: Receive, send: Send) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await send({"type": "lifespan.shutdown.complete"})
+            return
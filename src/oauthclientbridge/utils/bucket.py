@@ -1,4 +1,15 @@
+import hashlib
+import struct
 import threading
+import time
+from pathlib import Path
+
+from oauthclientbridge.utils.shared import SharedTable, SharedValue
+
+# Key hash, tokens and wall clock time of the last update.
+_ENTRY = struct.Struct("<Qdd")
+# Slots a key may use, the least recently updated of them is evicted.
+_PROBES = 8
 
 
 class Bucket:
@@ -21,3 +32,78 @@ class Bucket:
 
             self._tokens -= tokens
             return True
+
+
+class SharedBucket:
+    """`Bucket` kept in a `SharedValue`, shared by every process using it.
+
+    A new file starts full, an existing one keeps its tokens across restarts.
+    """
+
+    def __init__(self, path: Path, capacity: int, refill_amount: float):
+        self.capacity = capacity
+        self.refill_amount = refill_amount
+        self._tokens = SharedValue(path, capacity)
+        with self._tokens.locked():
+            self._tokens.value = min(capacity, self._tokens.value)
+
+    def add(self, tokens: float) -> None:
+        with self._tokens.locked():
+            self._tokens.value = min(self.capacity, self._tokens.value + tokens)
+
+    def consume(self, tokens: float = 1) -> bool:
+        with self._tokens.locked():
+            if self._tokens.value < tokens:
+                return False
+
+            self._tokens.value -= tokens
+            return True
+
+    def close(self) -> None:
+        self._tokens.close()
+
+
+class BucketTable:
+    """Token buckets per key, refilling at `rate` per second up to `capacity`.
+
+    Buckets live in a `SharedTable` of `size` slots, shared by every process
+    when given a `path`. A new key takes the least recently used of the slots
+    it hashes to, buckets idle that long have refilled so evicting them only
+    matters when the table is far too small for the active keys.
+    """
+
+    def __init__(self, capacity: int, rate: float, size: int, path: Path | None = None):
+        self.capacity = capacity
+        self.rate = rate
+        self._table = SharedTable(path, _ENTRY, size)
+
+    def consume(self, key: str, tokens: float = 1) -> float:
+        """Take `tokens` for `key`, returning zero or seconds until it could."""
+        digest = hashlib.blake2b(key.encode(), digest_size=8)
+        key_hash = int.from_bytes(digest.digest(), "little") or 1
+        start = key_hash % self._table.length
+        now = time.time()
+
+        with self._table.locked():
+            slot, available, updated = start, float(self.capacity), now
+            oldest = float("inf")
+            for probe in range(min(_PROBES, self._table.length)):
+                index = (start + probe) % self._table.length
+                stored_hash, stored_tokens, stored_updated = self._table.read(index)
+                if stored_hash == key_hash:
+                    slot, available, updated = index, stored_tokens, stored_updated
+                    break
+                if stored_updated < oldest:
+                    slot, oldest = index, stored_updated
+
+            available = min(self.capacity, available + (now - updated) * self.rate)
+            if available >= tokens:
+                available -= tokens
+                wait = 0.0
+            else:
+                wait = (tokens - available) / self.rate
+            self._table.write(slot, key_hash, available, now)
+        return wait
+
+    def close(self) -> None:
+        self._table.close()
@@ -0,0 +1,78 @@
+"""JSON encoding with `orjson` when installed, the standard library otherwise.
+
+Both produce compact UTF-8 encoded bytes and accept `bytes` or `str` when
+decoding, so callers do not care which one is in use. Objects neither knows
+are passed to `default`, dates and dataclasses included so Flask keeps its
+own handling of them.
+"""
+
+import json
+from collections.abc import Callable
+from types import ModuleType
+from typing import Any, override
+
+import flask
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.sansio.response import Response
+
+orjson: ModuleType | None
+try:
+    import orjson as _orjson
+except ImportError:
+    orjson = None
+else:
+    orjson = _orjson
+
+
+def dumps(
+    obj: Any,
+    default: Callable[[Any], Any] | None = None,
+    sort_keys: bool = False,
+) -> bytes:
+    if orjson is not None:
+        option: int = (
+            orjson.OPT_NON_STR_KEYS
+            | orjson.OPT_PASSTHROUGH_DATACLASS
+            | orjson.OPT_PASSTHROUGH_DATETIME
+        )
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=default, option=option)
+    return json.dumps(
+        obj, default=default, sort_keys=sort_keys, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def loads(data: bytes | bytearray | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class JSONProvider(DefaultJSONProvider):
+    """Flask JSON provider encoding and decoding with `dumps` and `loads`.
+
+    Calls passing stdlib specific arguments and debug mode's indented output
+    still go through Flask's default provider.
+    """
+
+    @override
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj, default=self.default, sort_keys=self.sort_keys).decode()
+
+    @override
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return loads(s)
+
+    @override
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        body = dumps(obj, default=self.default, sort_keys=self.sort_keys)
+        return flask.Response(body + b"\n", mimetype=self.mimetype)
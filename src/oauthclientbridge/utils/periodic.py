@@ -0,0 +1,60 @@
+"""Background thread that runs work on a fixed interval."""
+
+import threading
+from collections.abc import Callable
+
+from opentelemetry import trace
+
+tracer = trace.get_tracer(__name__)
+
+
+class PeriodicWorker:
+    """Run work every `interval` seconds until stopped."""
+
+    def __init__(
+        self,
+        work: Callable[[], None],
+        *,
+        interval: float,
+        startup_delay: Callable[[], float] | None = None,
+        name: str = "periodic-worker",
+    ) -> None:
+        self._work = work
+        self._interval = interval
+        self._startup_delay = startup_delay
+        self._name = name
+        self._stopped = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                return
+
+            self._thread = threading.Thread(
+                target=self._run,
+                daemon=True,
+                name=self._name,
+            )
+            self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stopped.set()
+
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+
+    def _run(self) -> None:
+        startup_delay = 0.0 if self._startup_delay is None else self._startup_delay()
+        if self._stopped.wait(startup_delay):
+            return
+
+        while True:
+            with tracer.start_as_current_span(f"WORKER {self._name}") as span:
+                span.set_attribute("worker.name", self._name)
+                span.set_attribute("worker.interval_seconds", self._interval)
+                self._work()
+
+            if self._stopped.wait(self._interval):
+                return
@@ -0,0 +1,102 @@
+import contextlib
+import fcntl
+import mmap
+import os
+import struct
+import threading
+from collections.abc import Generator
+from pathlib import Path
+from typing import Any
+
+_STATE = struct.Struct("<d")
+
+
+class SharedValue:
+    """Float kept in a memory mapped file, shared by every process using it.
+
+    Updates should hold `locked`, which takes a POSIX record lock on the file,
+    which unlike `flock` is not shared with forked workers, and a thread lock
+    for threads within one. A new file starts at `initial`, an existing one
+    keeps its value across restarts.
+    """
+
+    def __init__(self, path: Path, initial: float):
+        self._lock = threading.Lock()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self.locked():
+            created = os.fstat(self._fd).st_size < _STATE.size
+            if created:
+                os.ftruncate(self._fd, _STATE.size)
+            self._map = mmap.mmap(self._fd, _STATE.size)
+            if created:
+                self.value = initial
+
+    @property
+    def value(self) -> float:
+        return _STATE.unpack_from(self._map)[0]
+
+    @value.setter
+    def value(self, value: float) -> None:
+        _STATE.pack_into(self._map, 0, value)
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+    @contextlib.contextmanager
+    def locked(self) -> Generator[None, None, None]:
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+
+
+class SharedTable:
+    """Fixed number of `record` structs in a memory mapped file.
+
+    Shared and locked like `SharedValue`, or kept in process memory without a
+    `path`. Records start zeroed, and a file of another size is reset.
+    """
+
+    def __init__(self, path: Path | None, record: struct.Struct, length: int):
+        self.length = length
+        self._record = record
+        self._lock = threading.Lock()
+        self._fd: int | None = None
+        size = record.size * length
+        if path is None:
+            self._map: mmap.mmap | bytearray = bytearray(size)
+            return
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self.locked():
+            if os.fstat(self._fd).st_size != size:
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+            self._map = mmap.mmap(self._fd, size)
+
+    def read(self, index: int) -> tuple[Any, ...]:
+        return self._record.unpack_from(self._map, index * self._record.size)
+
+    def write(self, index: int, *values: Any) -> None:
+        self._record.pack_into(self._map, index * self._record.size, *values)
+
+    def close(self) -> None:
+        if self._fd is not None:
+            assert isinstance(self._map, mmap.mmap)
+            self._map.close()
+            os.close(self._fd)
+
+    @contextlib.contextmanager
+    def locked(self) -> Generator[None, None, None]:
+        with self._lock:
+            if self._fd is None:
+                yield
+                return
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
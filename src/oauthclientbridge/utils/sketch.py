@@ -0,0 +1,63 @@
+from typing import Any
+
+
+class SpaceSaving:
+    """Approximate top counts of a stream in `capacity` counters.
+
+    Implements Space-Saving: a new item past capacity replaces the smallest
+    counter and inherits its count, recorded as possible overcount in its
+    error. Any item seen more than total / capacity times is always kept.
+    Summaries merge by adding counts and keeping the largest counters.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self._counts: dict[str, float] = {}
+        self._errors: dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def add(self, item: str, count: float = 1) -> None:
+        if item in self._counts:
+            self._counts[item] += count
+        elif len(self._counts) < self.capacity:
+            self._counts[item] = count
+            self._errors[item] = 0
+        else:
+            smallest = min(self._counts, key=self._counts.__getitem__)
+            floor = self._counts.pop(smallest)
+            del self._errors[smallest]
+            self._counts[item] = floor + count
+            self._errors[item] = floor
+
+    def merge(self, other: "SpaceSaving") -> None:
+        for item, count in other._counts.items():
+            self._counts[item] = self._counts.get(item, 0) + count
+            self._errors[item] = self._errors.get(item, 0) + other._errors[item]
+        for item, _ in self.top(len(self._counts))[self.capacity :]:
+            del self._counts[item], self._errors[item]
+
+    def scale(self, factor: float) -> None:
+        """Multiply every count, to let old traffic fade."""
+        for item in self._counts:
+            self._counts[item] *= factor
+            self._errors[item] *= factor
+
+    def top(self, k: int) -> list[tuple[str, float]]:
+        """The `k` items with the highest counts, highest first."""
+        return sorted(self._counts.items(), key=lambda i: i[1], reverse=True)[:k]
+
+    def error(self, item: str) -> float:
+        """How much of the count for `item` may belong to evicted items."""
+        return self._errors.get(item, 0)
+
+    def dump(self) -> dict[str, Any]:
+        return {"counts": self._counts, "errors": self._errors}
+
+    @classmethod
+    def load(cls, capacity: int, data: dict[str, Any]) -> "SpaceSaving":
+        sketch = cls(capacity)
+        sketch._counts = {str(k): float(v) for k, v in data["counts"].items()}
+        sketch._errors = {str(k): float(v) for k, v in data["errors"].items()}
+        return sketch
@@ -1,12 +1,29 @@
 import urllib.parse
+from collections.abc import Iterable, Sequence
+from typing import NamedTuple
 
 URIParam = dict[str, str]
 REDACTED_URL_VALUE = "<REDACTED>"
 
 
-def _rewrite_query(original: str, params: URIParam) -> str:
+class ParsedURI(NamedTuple):
+    """URI split up front, for building many variants of it with `rewrite_uri`."""
+
+    parts: urllib.parse.SplitResult
+    query: tuple[tuple[str, tuple[str, ...]], ...]
+
+
+def parse_uri(uri: str) -> ParsedURI:
+    parts = urllib.parse.urlsplit(uri)
+    query = urllib.parse.parse_qs(parts.query, keep_blank_values=True)
+    return ParsedURI(parts, tuple((q, tuple(values)) for q, values in query.items()))
+
+
+def _rewrite_query(
+    original: Iterable[tuple[str, Sequence[str]]], params: URIParam
+) -> str:
     parts: list[tuple[str, str]] = []
-    query = urllib.parse.parse_qs(original, keep_blank_values=True)
+    query = dict(original)
     for p, value in params.items():
         query[p] = [value]  # Override with new params.
     for q, values in query.items():
@@ -15,10 +32,11 @@ def _rewrite_query(original: str, params: URIParam) -> str:
     return urllib.parse.urlencode(parts)
 
 
-def rewrite_uri(uri: str, params: URIParam) -> str:
-    scheme, netloc, path, query, fragment = urllib.parse.urlsplit(uri)
-    query = _rewrite_query(query, params)
-    return urllib.parse.urlunsplit((scheme, netloc, path, query, fragment))
+def rewrite_uri(uri: str | ParsedURI, params: URIParam) -> str:
+    if isinstance(uri, str):
+        uri = parse_uri(uri)
+    query = _rewrite_query(uri.query, params)
+    return urllib.parse.urlunsplit(uri.parts._replace(query=query))
 
 
 def sanitize_url(url: str | None) -> str | None:
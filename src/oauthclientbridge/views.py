@@ -1,7 +1,9 @@
+import contextlib
+import dataclasses
 import hmac
-import re
+from collections.abc import Callable, Generator
 from http import HTTPStatus
-from typing import Any
+from typing import Any, NamedTuple, cast
 
 import flask
 import structlog
@@ -12,9 +14,22 @@ from opentelemetry.semconv.attributes.exception_attributes import (
     EXCEPTION_TYPE,
 )
 
-from oauthclientbridge import client, crypto, db, oauth, telemetry
+from oauthclientbridge import (
+    client,
+    crypto,
+    db,
+    heavy_hitters,
+    oauth,
+    ratelimit,
+    replication,
+    runtime,
+    telemetry,
+    traffic,
+)
 from oauthclientbridge.errors import OAuthError
 from oauthclientbridge.settings import LogLevel, current_settings
+from oauthclientbridge.utils import time as time_utils
+from oauthclientbridge.utils.asgi import Finished, ThreadedSteps
 
 logger: structlog.BoundLogger = structlog.get_logger()
 
@@ -36,13 +51,14 @@ def _updated_fields(
 @routes.route("/")
 def authorize() -> flask.Response:
     """Store random state in session cookie and redirect to auth endpoint."""
+    oauth_settings = current_settings.oauth
     redirect_uri: str | None = flask.request.args.get("redirect_uri")
-    if redirect_uri and redirect_uri != current_settings.oauth.redirect_uri:
+    if redirect_uri and redirect_uri != oauth_settings.redirect_uri:
         return _error(OAuthError.INVALID_REQUEST, "Wrong redirect_uri.")
 
-    default_scope = " ".join(current_settings.oauth.scopes)
-    scope = flask.request.args.get("scope", default_scope)
-    if not _requested_scope_is_allowed(scope, current_settings.oauth.allowed_scopes):
+    app_runtime = runtime.get()
+    scope = flask.request.args.get("scope", app_runtime.default_scope)
+    if not _requested_scope_is_allowed(scope, app_runtime.allowed_scopes):
         return _error(OAuthError.INVALID_SCOPE, "Requested scope is not allowed.")
     state = crypto.generate_key()
 
@@ -50,17 +66,17 @@ def authorize() -> flask.Response:
     flask.session["state"] = state
 
     return oauth.redirect(
-        current_settings.oauth.authorization_uri,
-        client_id=current_settings.oauth.client_id,
+        app_runtime.authorization_uri,
+        client_id=oauth_settings.client_id,
         response_type="code",
-        redirect_uri=current_settings.oauth.redirect_uri,
+        redirect_uri=oauth_settings.redirect_uri,
         scope=scope,
         state=state,
     )
 
 
 def _requested_scope_is_allowed(
-    requested_scope: str, allowed_scopes: set[str] | None
+    requested_scope: str, allowed_scopes: frozenset[str] | None
 ) -> bool:
     return allowed_scopes is None or set(requested_scope.split()).issubset(
         allowed_scopes
@@ -143,19 +159,39 @@ def callback() -> flask.Response:
     if "refresh_token" in result:
         result = oauth.scrub_refresh_token(result)
 
-    client_secret = crypto.generate_key()
-    token = crypto.dumps(client_secret, result)
-
     client_id = db.generate_id()
     telemetry.set_client_id(client_id)
     inserted_fields = tuple(sorted(result.keys()))
+
+    grant_key = current_settings.stateless_grant_key
+    if grant_key is not None:
+        logger.warning("Issuing stateless grant", inserted_fields=inserted_fields)
+        trace.get_current_span().add_event(
+            "Issuing stateless grant", {"inserted_fields": inserted_fields}
+        )
+        client_secret = client.dump_grant(
+            grant_key.get_secret_value(),
+            client.StatelessGrant(
+                client_id=client_id,
+                generation=0,
+                created_at=time_utils.utcnow(),
+                token=result,
+            ),
+        )
+        return _render(
+            client_id=str(client_id), client_secret=client_secret, state=client_state
+        )
+
+    client_secret = crypto.generate_key()
+    token = crypto.dumps(client_secret, result)
+
     logger.warning("Inserting token", inserted_fields=inserted_fields)
     trace.get_current_span().add_event(
         "Inserting token", {"inserted_fields": inserted_fields}
     )
 
     try:
-        db.insert(client_id, token)
+        replication.insert(client_id, token)
     except db.IntegrityError:
         logger.warning("Could not get unique client id.")
         return _error("integrity_error", "Database integrity error.", client_state)
@@ -165,9 +201,47 @@ def callback() -> flask.Response:
     )
 
 
+class _Fetch(NamedTuple):
+    uri: str
+    endpoint: str
+    data: dict[str, str | None]
+
+
+_TokenSteps = Generator[_Fetch, dict[str, Any], flask.Response]
+
+
 @routes.route("/token", methods=["POST"])
 def token() -> flask.Response:
     """Validate token request, refreshing when needed."""
+    steps = _token()
+    try:
+        pending = next(steps)
+        while True:
+            pending = steps.send(
+                oauth.fetch_queued(pending.uri, pending.endpoint, **pending.data)
+            )
+    except StopIteration as stop:
+        return stop.value
+
+
+async def token_async() -> flask.Response:
+    """Async `token` used by the ASGI entry point, refreshes do not block.
+
+    The steps in between, database and crypto work, run in worker threads.
+    """
+    steps = ThreadedSteps(_token())
+    try:
+        pending = await steps.send(None)
+        while True:
+            pending = await steps.send(
+                await oauth.fetch_async(pending.uri, pending.endpoint, **pending.data)
+            )
+    except Finished as done:
+        return cast(flask.Response, done.value)
+
+
+def _token() -> _TokenSteps:
+    """Token endpoint, yielding the upstream fetches it needs for refreshes."""
     # TODO: allow all methods and raise invalid_request for !POST?
 
     if flask.request.form.get("grant_type") != "client_credentials":
@@ -198,18 +272,27 @@ def token() -> flask.Response:
         client_id_value = authorization.username
         client_secret_value = authorization.password
 
-    try:
+    heavy_hitters.record(client_id_value, flask.request.user_agent.string)
+
+    if retry_after := ratelimit.retry_after(client_id_value, traffic.classify()):
+        raise oauth.Error(
+            OAuthError.TEMPORARILY_UNAVAILABLE,
+            "Too many requests for this client.",
+            retry_after=retry_after,
+        )
+
+    grant_key = current_settings.stateless_grant_key
+    if grant_key is not None and client.is_stateless_secret(client_secret_value):
+        with _credential_errors(client_id_value):
+            grant = client.validate_grant(
+                client_id_value, client_secret_value, grant_key.get_secret_value()
+            )
+        telemetry.set_client_id(grant.client_id)
+        return (yield from _stateless_token(grant, grant_key.get_secret_value()))
+
+    with _credential_errors(client_id_value):
         credentials = client.validate_credentials(client_id_value, client_secret_value)
-    except client.ClientIdValidationError:
-        if client_id_value is not None:
-            telemetry.record_invalid_client_id(client_id_value)
-        raise oauth.Error(OAuthError.INVALID_CLIENT, "Malformed client_id.")
-    except client.ClientSecretValidationError:
-        raise oauth.Error(OAuthError.INVALID_CLIENT, "Client not known.")
-    except client.CredentialValidationError as e:
-        raise oauth.Error(OAuthError.INVALID_CLIENT, str(e))
-    else:
-        telemetry.set_client_id(credentials.client_id)
+    telemetry.set_client_id(credentials.client_id)
 
     client_id = credentials.client_id
     client_secret = credentials.client_secret
@@ -220,14 +303,7 @@ def token() -> flask.Response:
         raise oauth.Error(OAuthError.INVALID_CLIENT, "Client not known.")
 
     if record.encrypted_token is None:
-        workaround_response = _revoked_grant_workaround_response()
-        if workaround_response is not None:
-            logger.warning("Serving revoked grant workaround token")
-            telemetry.record_workaround("revoked_grant")
-            trace.get_current_span().add_event("Served revoked grant workaround token")
-            return flask.jsonify(workaround_response)
-
-        raise oauth.Error(OAuthError.INVALID_GRANT, "Grant has been revoked.")
+        return _revoked_grant()
 
     try:
         result = crypto.loads(client_secret, record.encrypted_token)
@@ -240,13 +316,92 @@ def token() -> flask.Response:
         telemetry.observe_token_grant_age(record.created_at)
         return flask.jsonify(result)
 
-    refresh_result = oauth.fetch(
+    refresh_result, modified = yield from _refresh(
+        result, revoke=lambda: replication.update(client_id, None)
+    )
+
+    # Reduce write pressure by only issuing update on changes.
+    if result != modified:
+        _record_token_update(result, modified)
+        replication.update(client_id, crypto.dumps(client_secret, modified))
+
+    # Only return what we got from the API (minus refresh_token).
+    telemetry.observe_token_grant_age(record.created_at)
+    return flask.jsonify(refresh_result)
+
+
+def _stateless_token(grant: client.StatelessGrant, key: str) -> _TokenSteps:
+    generation = db.lookup_generation(grant.client_id)
+    if generation is None:
+        return _revoked_grant()
+    elif grant.generation < generation:
+        raise oauth.Error(OAuthError.INVALID_GRANT, "Grant has been superseded.")
+
+    result = grant.token
+    if "refresh_token" not in result:
+        telemetry.observe_token_grant_age(grant.created_at)
+        return flask.jsonify(result)
+
+    refresh_result, modified = yield from _refresh(
+        result, revoke=lambda: db.update_generation(grant.client_id, None)
+    )
+
+    # Only rotate the grant on changes, rotation obsoletes the presented one.
+    if result != modified:
+        _record_token_update(result, modified)
+        rotated = dataclasses.replace(
+            grant, generation=max(grant.generation, generation) + 1, token=modified
+        )
+        db.update_generation(rotated.client_id, rotated.generation)
+        refresh_result["client_secret"] = client.dump_grant(key, rotated)
+
+    telemetry.observe_token_grant_age(grant.created_at)
+    return flask.jsonify(refresh_result)
+
+
+@contextlib.contextmanager
+def _credential_errors(client_id_value: str | None) -> Generator[None, None, None]:
+    """Translate client credential validation failures to OAuth errors."""
+    try:
+        yield
+    except client.ClientIdValidationError:
+        if client_id_value is not None:
+            telemetry.record_invalid_client_id(client_id_value)
+        raise oauth.Error(OAuthError.INVALID_CLIENT, "Malformed client_id.")
+    except client.ClientSecretValidationError:
+        raise oauth.Error(OAuthError.INVALID_CLIENT, "Client not known.")
+    except client.CredentialValidationError as e:
+        raise oauth.Error(OAuthError.INVALID_CLIENT, str(e))
+
+
+def _revoked_grant() -> flask.Response:
+    workaround_response = _revoked_grant_workaround_response()
+    if workaround_response is not None:
+        logger.warning("Serving revoked grant workaround token")
+        telemetry.record_workaround("revoked_grant")
+        trace.get_current_span().add_event("Served revoked grant workaround token")
+        return flask.jsonify(workaround_response)
+
+    raise oauth.Error(OAuthError.INVALID_GRANT, "Grant has been revoked.")
+
+
+def _refresh(
+    result: dict[str, Any], revoke: Callable[[], object]
+) -> Generator[_Fetch, dict[str, Any], tuple[dict[str, Any], dict[str, Any]]]:
+    """Refresh a stored grant upstream.
+
+    Returns the response for the client and the grant to store, raising
+    oauth.Error for failures after calling `revoke` on terminal ones.
+    """
+    refresh_result = yield _Fetch(
         current_settings.oauth.refresh_uri or current_settings.oauth.token_uri,
-        client_id=current_settings.oauth.client_id,
-        client_secret=current_settings.oauth.client_secret.get_secret_value(),
-        grant_type=current_settings.oauth.grant_type,
-        refresh_token=result["refresh_token"],
-        endpoint="refresh",
+        "refresh",
+        {
+            "client_id": current_settings.oauth.client_id,
+            "client_secret": current_settings.oauth.client_secret.get_secret_value(),
+            "grant_type": current_settings.oauth.grant_type,
+            "refresh_token": result["refresh_token"],
+        },
     )
     refresh_outcome = oauth.token_endpoint_outcome(
         HTTPStatus.BAD_REQUEST if "error" in refresh_result else HTTPStatus.OK,
@@ -262,7 +417,7 @@ def token() -> flask.Response:
             # Cache terminal refresh failures locally so older clients stop
             # repeatedly sending the same dead refresh token upstream.
             # Spotify refresh token expiry: https://developer.spotify.com/blog/2026-06-18-refresh-token-expiration
-            db.update(client_id, None)
+            _ = revoke()
             telemetry.record_refresh_token_invalidation(error.value)
             logger.warning("Revoking stored token after upstream invalid_grant")
         elif error == OAuthError.TEMPORARILY_UNAVAILABLE:
@@ -309,22 +464,44 @@ def token() -> flask.Response:
         modified["refresh_token"] = refresh_result["refresh_token"]
         del refresh_result["refresh_token"]
 
-    # Reduce write pressure by only issuing update on changes.
-    if result != modified:
-        updated_fields = _updated_fields(result, modified)
-        logger.warning("Updating token", updated_fields=updated_fields)
-        trace.get_current_span().add_event(
-            "Updating token", {"updated_fields": updated_fields}
-        )
-        db.update(client_id, crypto.dumps(client_secret, modified))
+    return refresh_result, modified
 
-    # Only return what we got from the API (minus refresh_token).
-    telemetry.observe_token_grant_age(record.created_at)
-    return flask.jsonify(refresh_result)
+
+def _record_token_update(original: dict[str, Any], modified: dict[str, Any]) -> None:
+    updated_fields = _updated_fields(original, modified)
+    logger.warning("Updating token", updated_fields=updated_fields)
+    trace.get_current_span().add_event(
+        "Updating token", {"updated_fields": updated_fields}
+    )
 
 
 @routes.route("/metrics", methods=["GET"])
 def metrics() -> flask.Response:
+    if (denied := _metrics_denied()) is not None:
+        return denied
+
+    heavy_hitters.update_metrics()
+    return telemetry.export_metrics()
+
+
+@routes.route("/metrics/heavy-hitters", methods=["GET"])
+def heavy_hitters_report() -> flask.Response:
+    """The client_ids and User-Agents sending the most /token requests."""
+    if (denied := _metrics_denied()) is not None:
+        return denied
+
+    return flask.jsonify(
+        {
+            kind: [
+                {"key": key, "count": round(count, 1), "error": round(error, 1)}
+                for key, count, error in ranked
+            ]
+            for kind, ranked in heavy_hitters.top().items()
+        }
+    )
+
+
+def _metrics_denied() -> flask.Response | None:
     if not current_settings.metrics_enabled:
         return flask.Response(status=HTTPStatus.NOT_FOUND)
 
@@ -337,8 +514,7 @@ def metrics() -> flask.Response:
                 status=HTTPStatus.UNAUTHORIZED,
                 headers={"WWW-Authenticate": "Bearer"},
             )
-
-    return telemetry.export_metrics()
+    return None
 
 
 def _error(
@@ -379,22 +555,18 @@ def _error(
 
 
 def _revoked_grant_workaround_response() -> dict[str, Any] | None:
-    user_agents = current_settings.revoked_grant_workaround_user_agents
-    if not user_agents:
-        return None
-
-    user_agent = flask.request.user_agent.string
-    if not user_agent or not re.search(user_agents, user_agent):
+    traffic_class = traffic.classify()
+    if traffic_class is None or not traffic_class.revoked_grant_workaround:
         return None
 
     return {
         "access_token": current_settings.revoked_grant_workaround_access_token,
         "token_type": "Bearer",
-        "expires_in": current_settings.revoked_grant_workaround_expires_in,
+        "expires_in": traffic_class.workaround_expires_in
+        or current_settings.revoked_grant_workaround_expires_in,
     }
 
 
-# TODO: Pass in the template string instead of settings.
 def _render(
     client_id: str | None = None,
     client_secret: str | None = None,
@@ -410,12 +582,10 @@ def _render(
         "error": error,
         "description": description,
     }
+    context: dict[str, Any] = {"variables": variables, **variables}
+    flask.current_app.update_template_context(context)
     response = flask.Response(
-        flask.render_template_string(
-            current_settings.callback_template,
-            variables=variables,
-            **variables,
-        ).encode("utf-8"),
+        runtime.get().callback_template.render(context).encode("utf-8"),
         content_type="text/html; charset=UTF-8",
     )
     return _set_callback_security_headers(
@@ -1,30 +1,52 @@
 import atexit
+from collections.abc import Callable
 
+from flask import Flask
 from opentelemetry import trace
 
 from oauthclientbridge import (
     create_app,
     logs,
+    providers,
     start_runtime_services,
     stop_runtime_services,
     telemetry,
 )
-from oauthclientbridge.settings import Settings
+from oauthclientbridge.settings import (
+    LogSettings,
+    ProvidersSettings,
+    SentrySettings,
+    Settings,
+    TelemetrySettings,
+)
 
 tracer = trace.get_tracer(__name__)
 
-settings = Settings()
-
-logs.init_logging(settings.log)
+# Process wide services are configured from the process environment, so they
+# are shared by every provider when several are mounted.
+logs.init_logging(LogSettings())
 
-telemetry.init_sentry(settings.sentry)
+telemetry.init_sentry(SentrySettings())
 
 telemetry.instrument()
-telemetry.init_tracing(settings.otel)
-telemetry.init_metrics(settings.otel)
+telemetry_settings = TelemetrySettings()
+telemetry.init_tracing(telemetry_settings)
+telemetry.init_metrics(telemetry_settings)
 
-with tracer.start_as_current_span("STARTUP"):
-    app = create_app(settings)
-    start_runtime_services(app)
+mounts = ProvidersSettings().mounts
 
-atexit.register(stop_runtime_services, app)
+with tracer.start_as_current_span("STARTUP"):
+    apps: list[Flask]
+    app: Flask | Callable[..., object]
+    if mounts:
+        dispatcher = providers.ProviderDispatcher(providers.create_apps(mounts))
+        apps, app = list(dispatcher.apps.values()), dispatcher
+    else:
+        app = create_app(Settings())
+        apps = [app]
+
+    for provider_app in apps:
+        start_runtime_services(provider_app)
+
+for provider_app in apps:
+    atexit.register(stop_runtime_services, provider_app)
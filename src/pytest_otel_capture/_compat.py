@@ -20,6 +20,12 @@ __all__ = [
 
 
 def reset_otel_once() -> None:
-    """Reset OTel's provider-singleton guards for test isolation."""
+    """Reset OTel's provider-singleton guards for test isolation.
+
+    The providers go too, so proxy tracers and meters first used by a later
+    test do not get bound to a provider nothing reads from anymore.
+    """
     opentelemetry.trace._TRACER_PROVIDER_SET_ONCE = Once()
+    opentelemetry.trace._TRACER_PROVIDER = None
     opentelemetry.metrics._internal._METER_PROVIDER_SET_ONCE = Once()
+    opentelemetry.metrics._internal._METER_PROVIDER = None
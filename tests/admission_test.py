@@ -0,0 +1,153 @@
+import time
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+
+from oauthclientbridge import admission, runtime
+from oauthclientbridge.errors import OAuthError
+from oauthclientbridge.settings import Settings, ShedPriority, TrafficClass
+from oauthclientbridge.telemetry import _prometheus as stats
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(admission.time, "monotonic", clock)
+    return clock
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("1700000000.5", 1700000000.5),
+        ("t=1700000000.5", 1700000000.5),
+        ("1700000000500", 1700000000.5),
+        ("t=1700000000500000", 1700000000.5),
+        ("soon", None),
+        ("nan", None),
+        ("-1", None),
+        ("", None),
+        (None, None),
+    ],
+)
+def test_parse_request_start(value: str | None, expected: float | None) -> None:
+    assert admission.parse_request_start(value) == expected
+
+
+def test_codel_sheds_after_sustained_delay(clock: Clock) -> None:
+    codel = admission.CoDel(target=0.1, interval=1)
+
+    assert not codel.shed(0.5)
+    clock.now += 1
+    assert codel.shed(0.5)
+    assert codel.overloaded
+    # Requests that have not waited long are still served.
+    assert not codel.shed(0.15)
+
+
+def test_codel_ignores_short_spikes(clock: Clock) -> None:
+    codel = admission.CoDel(target=0.1, interval=1)
+
+    assert not codel.shed(0.5)
+    assert not codel.shed(0.01)
+    clock.now += 1
+
+    assert not codel.shed(0.5)
+    assert not codel.overloaded
+
+
+def test_codel_shed_priorities(clock: Clock) -> None:
+    codel = admission.CoDel(target=0.1, interval=1)
+    _ = codel.shed(0.5)
+    clock.now += 1
+
+    assert codel.shed(0.05, ShedPriority.LOW)
+    assert not codel.shed(0.05, ShedPriority.NORMAL)
+    assert not codel.shed(5, ShedPriority.HIGH)
+
+
+def test_codel_recovers_once_queue_drains(clock: Clock) -> None:
+    codel = admission.CoDel(target=0.1, interval=1)
+    _ = codel.shed(0.5)
+    clock.now += 1
+    assert codel.shed(0.5)
+
+    _ = codel.shed(0.01)
+    clock.now += 1
+
+    assert not codel.shed(0.5)
+
+
+def _overload(settings: Settings, clock: Clock) -> None:
+    settings.shed_target_seconds = 0.1
+    controller = admission.get_controller(0.1, settings.shed_interval_seconds)
+    _ = controller.shed(1)
+    clock.now += settings.shed_interval_seconds
+
+
+def test_token_is_shed_under_overload(
+    client: FlaskClient, settings: Settings, clock: Clock
+) -> None:
+    _overload(settings, clock)
+    labels = {"endpoint": "views.token", "traffic_class": "default"}
+    before = (
+        stats.registry.get_sample_value("oauth_load_shed_requests_total", labels) or 0
+    )
+
+    resp = client.post(
+        "/token", data={}, headers={"X-Request-Start": f"t={time.time() - 1:.3f}"}
+    )
+
+    assert resp.status_code == 503
+    assert resp.json is not None
+    assert resp.json["error"] == OAuthError.TEMPORARILY_UNAVAILABLE
+    assert resp.headers["Retry-After"] == "1"
+    assert stats.registry.get_sample_value(
+        "oauth_load_shed_requests_total", labels
+    ) == (before + 1)
+
+
+def test_other_endpoints_are_not_shed(
+    client: FlaskClient, settings: Settings, clock: Clock
+) -> None:
+    _overload(settings, clock)
+
+    resp = client.get("/metrics", headers={"X-Request-Start": f"{time.time() - 1}"})
+
+    assert resp.status_code == 200
+
+
+def test_requests_without_start_are_not_shed(
+    client: FlaskClient, settings: Settings, clock: Clock
+) -> None:
+    _overload(settings, clock)
+
+    assert client.post("/token", data={}).status_code == 400
+
+
+def test_low_priority_class_is_shed_without_waiting(
+    app: Flask, client: FlaskClient, settings: Settings, clock: Clock
+) -> None:
+    _overload(settings, clock)
+    settings.traffic_classes = [
+        TrafficClass(
+            name="legacy", user_agents="^OldApp/", shed_priority=ShedPriority.LOW
+        )
+    ]
+    runtime.init_app(app, settings)
+    start = {"X-Request-Start": f"{time.time()}"}
+
+    resp = client.post("/token", data={}, headers={**start, "User-Agent": "OldApp/1"})
+    assert resp.status_code == 503
+
+    resp = client.post("/token", data={}, headers={**start, "User-Agent": "NewApp/2"})
+    assert resp.status_code == 400
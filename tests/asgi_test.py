@@ -0,0 +1,396 @@
+import asyncio
+import base64
+import json
+import unittest.mock
+from typing import Any
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+from opentelemetry.sdk.metrics.export import HistogramDataPoint, NumberDataPoint
+from requests_mock import Mocker as RequestsMocker
+
+from oauthclientbridge import db, oauth, telemetry, views
+from oauthclientbridge.oauth import (
+    _transport as oauth_transport,  # pyright: ignore[reportPrivateUsage] # Force threaded transport.
+)
+from oauthclientbridge.settings import current_settings
+from oauthclientbridge.utils import asgi as asgi_utils
+from oauthclientbridge.utils.asgi import ASGIBridge, Message
+
+from .conftest import TokenTuple
+from .plugins import otel
+
+
+@pytest.fixture
+def bridge(app: Flask) -> ASGIBridge:
+    return ASGIBridge(
+        lambda environ: app,
+        {"views.token": views.token_async},
+        record=telemetry.ServerRequest,
+    )
+
+
+@pytest.fixture(autouse=True)
+def thread_handoff(app: Flask) -> None:
+    db.allow_thread_handoff(app)
+
+
+@pytest.fixture(autouse=True)
+def threaded_transport(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Keep upstream requests on `requests` so requests_mock sees them.
+    monkeypatch.setattr(oauth_transport, "_httpx_available", lambda: False)
+
+
+def _request(
+    bridge: ASGIBridge,
+    method: str,
+    path: str,
+    form: dict[str, str] | None = None,
+    headers: dict[str, str] | None = None,
+    chunks: int = 1,
+) -> tuple[int, dict[str, str], bytes]:
+    body = "&".join(f"{k}={v}" for k, v in (form or {}).items()).encode()
+    request_headers = {"host": "localhost", **(headers or {})}
+    if form is not None:
+        request_headers["content-type"] = "application/x-www-form-urlencoded"
+
+    scope: dict[str, Any] = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(k.encode(), v.encode()) for k, v in request_headers.items()],
+        "client": ("127.0.0.1", 12345),
+        "server": ("localhost", 80),
+    }
+    incoming: list[Message] = [
+        {"type": "http.request", "body": body, "more_body": True}
+        for _ in range(chunks - 1)
+    ]
+    incoming.append({"type": "http.request", "body": body})
+    sent: list[Message] = []
+
+    async def receive() -> Message:
+        return incoming.pop(0) if incoming else {"type": "http.disconnect"}
+
+    async def send(message: Message) -> None:
+        sent.append(message)
+
+    asyncio.run(bridge(scope, receive, send))
+
+    start, body_message = sent
+    response_headers = {k.decode(): v.decode() for k, v in start["headers"]}
+    return start["status"], response_headers, body_message["body"]
+
+
+def _form(token: TokenTuple, **extra: str) -> dict[str, str]:
+    return {
+        "client_id": str(token.client_id),
+        "client_secret": token.client_secret,
+        "grant_type": "client_credentials",
+        **extra,
+    }
+
+
+def test_token_matches_wsgi(
+    bridge: ASGIBridge, client: FlaskClient, access_token: TokenTuple
+) -> None:
+    status, headers, body = _request(bridge, "POST", "/token", _form(access_token))
+    expected = client.post("/token", data=_form(access_token))
+
+    assert status == expected.status_code == 200
+    assert json.loads(body) == expected.json
+    assert headers["cache-control"] == expected.headers["Cache-Control"]
+
+
+@pytest.mark.parametrize(
+    "extra",
+    [{"grant_type": "password"}, {"scope": "foo"}, {"client_secret": "wrong"}],
+)
+def test_token_errors_match_wsgi(
+    bridge: ASGIBridge,
+    client: FlaskClient,
+    access_token: TokenTuple,
+    extra: dict[str, str],
+) -> None:
+    status, _, body = _request(bridge, "POST", "/token", _form(access_token, **extra))
+    expected = client.post("/token", data=_form(access_token, **extra))
+
+    assert status == expected.status_code
+    assert json.loads(body) == expected.json
+
+
+def test_token_refresh_runs_async(
+    bridge: ASGIBridge,
+    client: FlaskClient,
+    refresh_token: TokenTuple,
+    requests_mock: RequestsMocker,
+) -> None:
+    _ = requests_mock.post(
+        current_settings.oauth.token_uri,
+        [
+            {"status_code": 503, "json": {"error": "temporarily_unavailable"}},
+            {"json": {"access_token": "fresh", "token_type": "Bearer"}},
+        ],
+    )
+
+    with unittest.mock.patch("asyncio.sleep") as mock_sleep:
+        status, _, body = _request(bridge, "POST", "/token", _form(refresh_token))
+
+    assert status == 200
+    assert json.loads(body) == {"access_token": "fresh", "token_type": "Bearer"}
+    assert requests_mock.call_count == 2
+    assert requests_mock.request_history[1].text is not None
+    assert "refresh_token=abc" in requests_mock.request_history[1].text
+    mock_sleep.assert_called_once()
+
+
+def test_basic_auth_is_passed_through(
+    bridge: ASGIBridge, client: FlaskClient, access_token: TokenTuple
+) -> None:
+    credentials = "%s:%s" % (access_token.client_id, access_token.client_secret)
+    authorization = "Basic " + base64.b64encode(credentials.encode()).decode()
+
+    status, _, body = _request(
+        bridge,
+        "POST",
+        "/token",
+        {"grant_type": "client_credentials"},
+        headers={"authorization": authorization},
+    )
+
+    assert status == 200
+    assert json.loads(body)["access_token"] == "123"
+
+
+def test_token_metrics_match_wsgi(
+    otel_mock: otel.OTelMocker,
+    bridge: ASGIBridge,
+    client: FlaskClient,
+    access_token: TokenTuple,
+) -> None:
+    expected = client.post("/token", data=_form(access_token))
+    status, headers, _ = _request(bridge, "POST", "/token", _form(access_token))
+
+    metrics = otel_mock.get_metrics_data()
+    duration = otel.get_metric(metrics, "http.server.duration")
+    active = otel.get_metric(metrics, "http.server.active_requests")
+    assert duration is not None and active is not None
+    # Same attributes for both requests, so they share a data point.
+    [duration_point] = duration.data.data_points
+    [active_point] = active.data.data_points
+
+    assert status == expected.status_code == 200
+    assert "traceresponse" in headers and "traceresponse" in expected.headers
+    assert isinstance(duration_point, HistogramDataPoint)
+    assert duration_point.count == 2
+    assert isinstance(active_point, NumberDataPoint)
+    assert active_point.value == 0
+
+
+_SpanSummary = tuple[str, str, str, dict[str, object], str, tuple[str, ...]]
+_MetricKey = tuple[str, str, frozenset[tuple[str, object]]]
+
+
+def _spans(otel_mock: otel.OTelMocker) -> list[_SpanSummary]:
+    return [
+        (
+            span.name,
+            span.scope.name if span.scope else "",
+            str(span._readable_span.kind),  # pyright: ignore[reportPrivateUsage]
+            dict(span.attributes or {}),
+            str(span.status.status_code),
+            tuple(event.name for event in span.events),
+        )
+        for span in otel_mock.get_finished_spans()
+    ]
+
+
+def _metrics(otel_mock: otel.OTelMocker) -> dict[_MetricKey, float]:
+    values: dict[_MetricKey, float] = {}
+    for metric in otel_mock.get_metrics_data():
+        for point in metric.data.data_points:
+            key = (
+                metric.name,
+                metric.scope.name,
+                frozenset((point.attributes or {}).items()),
+            )
+            if isinstance(point, HistogramDataPoint):
+                values[key] = point.count
+            elif isinstance(point, NumberDataPoint):
+                values[key] = point.value
+    return values
+
+
+def _delta(
+    before: dict[_MetricKey, float], after: dict[_MetricKey, float]
+) -> dict[_MetricKey, float]:
+    return {
+        key: value - before.get(key, 0)
+        for key, value in after.items()
+        if value != before.get(key, 0)
+    }
+
+
+@pytest.mark.parametrize(
+    "case", ["access", "invalid_client", "refresh", "bulkhead", "unexpected_error"]
+)
+def test_token_telemetry_matches_wsgi(
+    otel_mock: otel.OTelMocker,
+    app: Flask,
+    bridge: ASGIBridge,
+    client: FlaskClient,
+    access_token: TokenTuple,
+    refresh_token: TokenTuple,
+    requests_mock: RequestsMocker,
+    monkeypatch: pytest.MonkeyPatch,
+    case: str,
+) -> None:
+    # Covers every request hook and error handler the native path runs, so
+    # Flask or instrumentation upgrades that change one path show up here.
+    token = access_token
+    match case:
+        case "invalid_client":
+            token = access_token._replace(client_secret="wrong")
+        case "refresh":
+            token = refresh_token
+            _ = requests_mock.post(
+                current_settings.oauth.token_uri,
+                json={"access_token": "fresh", "token_type": "Bearer"},
+            )
+        case "bulkhead":
+            current_settings.bulkheads = {"views.token": 0}
+        case "unexpected_error":
+            app.testing = False
+            monkeypatch.setattr(
+                views.db, "lookup", unittest.mock.Mock(side_effect=OSError)
+            )
+    form, headers = _form(token), {"user-agent": "parity/1.0"}
+    _ = otel_mock.get_finished_spans()
+    before = _metrics(otel_mock)
+
+    expected = client.post(
+        "/token",
+        data=form,
+        headers=headers,
+        environ_overrides={"REMOTE_PORT": "12345"},
+    )
+    expected_spans, after_wsgi = _spans(otel_mock), _metrics(otel_mock)
+    status, _, body = _request(bridge, "POST", "/token", form, headers)
+    spans, after_asgi = _spans(otel_mock), _metrics(otel_mock)
+
+    assert status == expected.status_code
+    assert json.loads(body) == expected.json
+    assert spans == expected_spans
+    assert _delta(after_wsgi, after_asgi) == _delta(before, after_wsgi)
+
+
+def test_token_runs_blocking_steps_in_threads(
+    bridge: ASGIBridge,
+    client: FlaskClient,
+    access_token: TokenTuple,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    lookup = views.db.lookup
+    threads: list[bool] = []
+
+    def record_lookup(client_id: str) -> Any:
+        try:
+            _ = asyncio.get_running_loop()
+        except RuntimeError:
+            threads.append(True)
+        else:
+            threads.append(False)
+        return lookup(client_id)
+
+    monkeypatch.setattr(views.db, "lookup", record_lookup)
+
+    status, _, _ = _request(bridge, "POST", "/token", _form(access_token))
+
+    assert status == 200
+    assert threads == [True]
+
+
+def test_body_past_max_content_length_is_rejected(
+    app: Flask, bridge: ASGIBridge, client: FlaskClient, access_token: TokenTuple
+) -> None:
+    app.config["MAX_CONTENT_LENGTH"] = 100
+
+    status, _, _ = _request(bridge, "POST", "/token", _form(access_token), chunks=3)
+
+    assert status == 413
+
+
+def test_body_limit_defaults_to_max_body_size(
+    bridge: ASGIBridge,
+    client: FlaskClient,
+    access_token: TokenTuple,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(asgi_utils, "MAX_BODY_SIZE", 10)
+
+    status, _, _ = _request(bridge, "POST", "/token", _form(access_token))
+
+    assert status == 413
+
+
+def test_other_routes_use_wsgi(bridge: ASGIBridge, client: FlaskClient) -> None:
+    with unittest.mock.patch.object(views, "token_async") as token_async:
+        status, _, _ = _request(bridge, "GET", "/token")
+
+    assert status == 405
+    token_async.assert_not_called()
+
+
+def test_unresolved_requests_are_not_found() -> None:
+    bridge = ASGIBridge(lambda environ: None, {})
+
+    status, _, _ = _request(bridge, "GET", "/token")
+
+    assert status == 404
+
+
+def test_lifespan_is_acknowledged(bridge: ASGIBridge) -> None:
+    incoming: list[Message] = [
+        {"type": "lifespan.startup"},
+        {"type": "lifespan.shutdown"},
+    ]
+    sent: list[Message] = []
+
+    async def receive() -> Message:
+        return incoming.pop(0)
+
+    async def send(message: Message) -> None:
+        sent.append(message)
+
+    asyncio.run(bridge({"type": "lifespan"}, receive, send))
+
+    assert [m["type"] for m in sent] == [
+        "lifespan.startup.complete",
+        "lifespan.shutdown.complete",
+    ]
+
+
+def test_fetch_async_matches_fetch(
+    app_context: object, requests_mock: RequestsMocker
+) -> None:
+    _ = requests_mock.post(
+        current_settings.oauth.token_uri,
+        [
+            {"status_code": 429, "headers": {"Retry-After": "1"}},
+            {"json": {"access_token": "abc", "token_type": "Bearer"}},
+        ],
+    )
+
+    with unittest.mock.patch("asyncio.sleep") as mock_sleep:
+        result = asyncio.run(
+            oauth.fetch_async(current_settings.oauth.token_uri, "token")
+        )
+
+    assert result == {"access_token": "abc", "token_type": "Bearer"}
+    assert mock_sleep.call_args.args[0] >= 1
@@ -5,10 +5,11 @@ from dataclasses import dataclass
 
 import flask
 import pytest
+from flask import Flask
 from flask.testing import FlaskClient
 from requests_mock import Mocker
 
-from oauthclientbridge import crypto, db
+from oauthclientbridge import crypto, db, runtime
 from oauthclientbridge.errors import OAuthError
 from oauthclientbridge.settings import Settings
 from oauthclientbridge.views import (
@@ -159,9 +160,10 @@ def test_requested_scope_allowlist(case: ScopeCase):
 
 
 def test_authorize_uses_configured_scopes_when_scope_is_omitted(
-    client: FlaskClient, settings: Settings
+    app: Flask, client: FlaskClient, settings: Settings
 ):
     settings.oauth = settings.oauth.model_copy(update={"scopes": {"foo", "bar"}})
+    runtime.init_app(app, settings)
 
     response = client.get("/")
 
@@ -211,6 +213,7 @@ def test_authorize_uses_configured_scopes_when_scope_is_omitted(
     ids=lambda case: case.name,
 )
 def test_authorize_enforces_configured_scope_allowlist(
+    app: Flask,
     client: FlaskClient,
     settings: Settings,
     case: ScopeCase,
@@ -218,6 +221,7 @@ def test_authorize_enforces_configured_scope_allowlist(
     settings.oauth = settings.oauth.model_copy(
         update={"scopes": {"foo", "bar"}, "allowed_scopes": case.allowed_scopes}
     )
+    runtime.init_app(app, settings)
 
     response = client.get(
         "/?" + urllib.parse.urlencode({"scope": case.requested_scope})
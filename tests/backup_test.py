@@ -0,0 +1,155 @@
+import contextlib
+import fcntl
+import sqlite3
+import threading
+from pathlib import Path
+
+import pytest
+from flask import Flask
+from flask.ctx import AppContext
+
+from oauthclientbridge import backup, db, telemetry
+from oauthclientbridge.settings import Settings
+from oauthclientbridge.telemetry import _prometheus as stats
+from oauthclientbridge.utils.periodic import PeriodicWorker
+
+from .conftest import TokenTuple
+
+
+def _client_ids(path: Path) -> set[str]:
+    with contextlib.closing(sqlite3.connect(path)) as connection:
+        rows = connection.execute("SELECT client_id FROM tokens").fetchall()
+    return {row[0] for row in rows}
+
+
+def test_backup_copies_live_database(
+    app_context: AppContext, access_token: TokenTuple, tmp_path: Path
+) -> None:
+    target = tmp_path / "copy.db"
+
+    db.backup(target, pages=1, sleep=0)
+
+    assert _client_ids(target) == {str(access_token.client_id)}
+    assert not (tmp_path / "copy.db.partial").exists()
+
+
+def test_run_rotates_old_backups(app_context: AppContext, tmp_path: Path) -> None:
+    paths = [backup.run(tmp_path, keep=2, pages=1, sleep=0) for _ in range(3)]
+
+    assert None not in paths
+    assert sorted(tmp_path.glob("backup-*.db")) == paths[1:]
+
+
+def test_run_records_metrics(app_context: AppContext, tmp_path: Path) -> None:
+    before = stats.registry.get_sample_value(
+        "oauth_database_backup_total", {"result": "success"}
+    )
+
+    target = backup.run(tmp_path, keep=1, pages=1, sleep=0)
+
+    assert target is not None
+    after = stats.registry.get_sample_value(
+        "oauth_database_backup_total", {"result": "success"}
+    )
+    assert (after or 0) - (before or 0) == 1
+    assert stats.registry.get_sample_value("oauth_database_backup_bytes") == (
+        target.stat().st_size
+    )
+
+
+def test_run_skips_recent_backup(app_context: AppContext, tmp_path: Path) -> None:
+    assert backup.run(tmp_path, keep=2, pages=1, sleep=0) is not None
+    assert backup.run(tmp_path, keep=2, pages=1, sleep=0, min_age=60) is None
+
+
+def test_run_skips_when_another_backup_is_running(
+    app_context: AppContext, tmp_path: Path
+) -> None:
+    with open(tmp_path / ".lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        # flock locks belong to the open file description, so a second open
+        # in this process contends just like another worker would.
+        assert backup.run(tmp_path, keep=1, pages=1, sleep=0) is None
+
+
+def test_backupdb_command_writes_target(
+    app: Flask, app_context: AppContext, access_token: TokenTuple, tmp_path: Path
+) -> None:
+    target = tmp_path / "cli.db"
+
+    result = app.test_cli_runner().invoke(args=["backupdb", str(target)])
+
+    assert result.exit_code == 0
+    assert _client_ids(target) == {str(access_token.client_id)}
+
+
+def test_backupdb_command_requires_target_or_directory(
+    app: Flask, app_context: AppContext
+) -> None:
+    result = app.test_cli_runner().invoke(args=["backupdb"])
+
+    assert result.exit_code == 2
+    assert "DB_BACKUP_DIRECTORY" in result.stderr
+
+
+def test_scheduled_backups_disabled_without_directory(app: Flask) -> None:
+    backup.start_scheduled_backups(app)
+
+    assert "oauth_backup_worker" not in app.extensions
+
+
+def test_scheduled_backups_run_in_app_context(
+    settings: Settings, app: Flask, app_context: AppContext, tmp_path: Path
+) -> None:
+    settings.database.backup_directory = tmp_path
+    done = threading.Event()
+    original_run = backup.run
+
+    def run(*args: object, **kwargs: object) -> Path | None:
+        try:
+            return original_run(*args, **kwargs)  # pyright: ignore[reportArgumentType]
+        finally:
+            done.set()
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(backup, "run", run)
+        monkeypatch.setattr(backup, "uniform", lambda a, b: 0.0)
+        backup.start_scheduled_backups(app)
+        try:
+            assert done.wait(timeout=5)
+        finally:
+            backup.stop_scheduled_backups(app)
+
+    assert len(list(tmp_path.glob("backup-*.db"))) == 1
+
+
+def test_periodic_worker_runs_until_stopped() -> None:
+    calls: list[int] = []
+    ran_twice = threading.Event()
+
+    def work() -> None:
+        calls.append(1)
+        if len(calls) >= 2:
+            ran_twice.set()
+
+    worker = PeriodicWorker(work, interval=0.01)
+    worker.start()
+    assert ran_twice.wait(timeout=5)
+    worker.stop(timeout=1)
+    count = len(calls)
+
+    assert not worker._thread or not worker._thread.is_alive()  # pyright: ignore[reportPrivateUsage]
+    assert len(calls) == count
+
+
+def test_record_database_backup_error_increments_counter() -> None:
+    before = stats.registry.get_sample_value(
+        "oauth_database_backup_total", {"result": "error"}
+    )
+
+    telemetry.record_database_backup_error()
+
+    after = stats.registry.get_sample_value(
+        "oauth_database_backup_total", {"result": "error"}
+    )
+    assert (after or 0) - (before or 0) == 1
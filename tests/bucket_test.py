@@ -1,4 +1,10 @@
-from oauthclientbridge.utils.bucket import Bucket
+import multiprocessing
+from pathlib import Path
+
+import pytest
+
+from oauthclientbridge.utils import bucket as bucket_module
+from oauthclientbridge.utils.bucket import Bucket, BucketTable, SharedBucket
 
 
 def test_bucket_consumes_token_on_admission() -> None:
@@ -19,3 +25,119 @@ def test_bucket_add_refills_capacity() -> None:
 
     bucket.add(0.25)
     assert bucket.consume() is True
+
+
+def test_shared_bucket_starts_full(tmp_path: Path) -> None:
+    bucket = SharedBucket(tmp_path / "bucket", capacity=2, refill_amount=0.25)
+
+    assert bucket.consume() is True
+    assert bucket.consume() is True
+    assert bucket.consume() is False
+
+
+def test_shared_bucket_add_is_bounded(tmp_path: Path) -> None:
+    bucket = SharedBucket(tmp_path / "bucket", capacity=1, refill_amount=0.25)
+
+    bucket.add(5)
+
+    assert bucket.consume() is True
+    assert bucket.consume() is False
+
+
+def test_shared_bucket_tokens_are_shared(tmp_path: Path) -> None:
+    first = SharedBucket(tmp_path / "bucket", capacity=2, refill_amount=0.5)
+    second = SharedBucket(tmp_path / "bucket", capacity=2, refill_amount=0.5)
+
+    assert first.consume() is True
+    assert second.consume() is True
+    assert first.consume() is False
+
+    second.add(1)
+    assert first.consume() is True
+
+
+def test_shared_bucket_is_clamped_to_new_capacity(tmp_path: Path) -> None:
+    _ = SharedBucket(tmp_path / "bucket", capacity=8, refill_amount=0.5)
+
+    bucket = SharedBucket(tmp_path / "bucket", capacity=1, refill_amount=0.5)
+
+    assert bucket.consume() is True
+    assert bucket.consume() is False
+
+
+def _consume_all(bucket: SharedBucket, results: "multiprocessing.Queue[int]") -> None:
+    results.put(sum(bucket.consume() for _ in range(100)))
+
+
+def test_shared_bucket_is_shared_by_forked_workers(tmp_path: Path) -> None:
+    bucket = SharedBucket(tmp_path / "bucket", capacity=50, refill_amount=0.25)
+    context = multiprocessing.get_context("fork")
+    results: "multiprocessing.Queue[int]" = context.Queue()
+
+    workers = [
+        context.Process(target=_consume_all, args=(bucket, results)) for _ in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    assert sum(results.get() for _ in workers) == 50
+    assert bucket.consume() is False
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(bucket_module.time, "time", clock)
+    return clock
+
+
+def test_bucket_table_limits_each_key(clock: Clock) -> None:
+    table = BucketTable(capacity=2, rate=0.5, size=16)
+
+    assert table.consume("a") == 0
+    assert table.consume("a") == 0
+    assert table.consume("a") == 2
+    assert table.consume("b") == 0
+
+
+def test_bucket_table_refills_over_time(clock: Clock) -> None:
+    table = BucketTable(capacity=1, rate=0.5, size=16)
+
+    assert table.consume("a") == 0
+    clock.now += 1
+    assert table.consume("a") == 1
+
+    clock.now += 1
+    assert table.consume("a") == 0
+
+
+def test_bucket_table_evicts_least_recently_used(clock: Clock) -> None:
+    table = BucketTable(capacity=1, rate=0.001, size=2)
+
+    assert table.consume("a") == 0
+    clock.now += 1
+    assert table.consume("b") == 0
+    clock.now += 1
+    assert table.consume("c") == 0
+
+    # "a" was evicted for "c" and starts over with a full bucket.
+    assert table.consume("a") == 0
+    assert table.consume("c") > 0
+
+
+def test_bucket_table_is_shared_with_path(clock: Clock, tmp_path: Path) -> None:
+    first = BucketTable(capacity=1, rate=0.5, size=16, path=tmp_path / "table")
+    second = BucketTable(capacity=1, rate=0.5, size=16, path=tmp_path / "table")
+
+    assert first.consume("a") == 0
+    assert second.consume("a") == 2
@@ -0,0 +1,59 @@
+from flask.testing import FlaskClient
+
+from oauthclientbridge import bulkhead
+from oauthclientbridge.errors import OAuthError
+from oauthclientbridge.settings import Settings
+from oauthclientbridge.telemetry import _prometheus as stats
+
+
+def _rejections(partition: str) -> float:
+    return (
+        stats.registry.get_sample_value(
+            "oauth_bulkhead_rejections_total", {"partition": partition}
+        )
+        or 0
+    )
+
+
+def test_bulkhead_rejects_when_full(client: FlaskClient, settings: Settings) -> None:
+    settings.bulkheads = {"views.metrics": 1}
+    settings.bulkhead_retry_after = 2
+    partition = bulkhead.get_bulkhead("views.metrics", 1)
+    assert partition.try_enter()
+    before = _rejections("views.metrics")
+
+    resp = client.get("/metrics")
+
+    assert resp.status_code == 503
+    assert resp.json is not None
+    assert resp.json["error"] == OAuthError.TEMPORARILY_UNAVAILABLE
+    assert resp.headers["Retry-After"] == "2"
+    assert _rejections("views.metrics") == before + 1
+    assert partition.in_flight == 1
+
+
+def test_bulkhead_releases_after_request(
+    client: FlaskClient, settings: Settings
+) -> None:
+    settings.bulkheads = {"views.metrics": 1}
+
+    assert client.get("/metrics").status_code == 200
+    assert client.get("/metrics").status_code == 200
+    assert bulkhead.get_bulkhead("views.metrics", 1).in_flight == 0
+
+
+def test_bulkhead_releases_after_error(client: FlaskClient, settings: Settings) -> None:
+    settings.bulkheads = {"views.token": 1}
+
+    assert client.post("/token", data={}).status_code == 400
+    assert client.post("/token", data={}).status_code == 400
+    assert bulkhead.get_bulkhead("views.token", 1).in_flight == 0
+
+
+def test_bulkhead_only_limits_listed_endpoints(
+    client: FlaskClient, settings: Settings
+) -> None:
+    settings.bulkheads = {"views.callback": 1}
+    assert bulkhead.get_bulkhead("views.callback", 1).try_enter()
+
+    assert client.get("/metrics").status_code == 200
@@ -0,0 +1,45 @@
+import pytest
+
+from oauthclientbridge.utils import cache
+from oauthclientbridge.utils.cache import TTLCache
+
+
+def test_ttl_cache_returns_fresh_entries() -> None:
+    entries = TTLCache[str, int | None](ttl=10)
+
+    entries.set("a", None)
+
+    assert entries.get("a") == (True, None)
+    assert entries.get("b") == (False, None)
+
+
+def test_ttl_cache_expires_entries(monkeypatch: pytest.MonkeyPatch) -> None:
+    now = 100.0
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now)
+    entries = TTLCache[str, int](ttl=10)
+    entries.set("a", 1)
+
+    now = 111.0
+
+    assert entries.get("a") == (False, None)
+    assert len(entries) == 0
+
+
+def test_ttl_cache_evicts_least_recently_used() -> None:
+    entries = TTLCache[str, int](ttl=10, maxsize=2)
+    entries.set("a", 1)
+    entries.set("b", 2)
+    _ = entries.get("a")
+
+    entries.set("c", 3)
+
+    assert entries.get("a") == (True, 1)
+    assert entries.get("b") == (False, None)
+
+
+def test_ttl_cache_disabled_with_zero_ttl() -> None:
+    entries = TTLCache[str, int](ttl=0)
+
+    entries.set("a", 1)
+
+    assert entries.get("a") == (False, None)
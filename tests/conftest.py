@@ -13,7 +13,32 @@ from flask.testing import FlaskClient
 from pydantic import SecretStr
 from werkzeug.datastructures import Headers
 
-from oauthclientbridge import create_app, crypto, db, types
+from oauthclientbridge import (
+    admission,
+    bulkhead,
+    create_app,
+    crypto,
+    db,
+    deadline,
+    heavy_hitters,
+    ratelimit,
+    types,
+)
+from oauthclientbridge.oauth import (
+    _backoff as oauth_backoff,  # pyright: ignore[reportPrivateUsage] # Global upstream backoff reset.
+)
+from oauthclientbridge.oauth import (
+    _breaker as oauth_breaker,  # pyright: ignore[reportPrivateUsage] # Global circuit breaker reset.
+)
+from oauthclientbridge.oauth import (
+    _executor as oauth_executor,  # pyright: ignore[reportPrivateUsage] # Global refresh executor reset.
+)
+from oauthclientbridge.oauth import (
+    _latency as oauth_latency,  # pyright: ignore[reportPrivateUsage] # Global latency tracker reset.
+)
+from oauthclientbridge.oauth import (
+    _limit as oauth_limit,  # pyright: ignore[reportPrivateUsage] # Global concurrency limit reset.
+)
 from oauthclientbridge.oauth import (
     _retry as oauth_retry,  # pyright: ignore[reportPrivateUsage] # Global retry limiter reset.
 )
@@ -48,6 +73,56 @@ def reset_retry_limiter():
     oauth_retry.get_retry_limiter.cache_clear()
 
 
+@pytest.fixture(autouse=True)
+def reset_concurrency_limit():
+    oauth_limit.get_concurrency_limit.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_circuit_breaker():
+    oauth_breaker.get_circuit_breaker.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_latency_tracker():
+    oauth_latency.get_latency_tracker.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_upstream_backoff():
+    oauth_backoff.get_upstream_backoff.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_refresh_executor():
+    oauth_executor.get_refresh_executor.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_client_buckets():
+    ratelimit.get_client_buckets.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_admission_controller():
+    admission.get_controller.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_bulkheads():
+    bulkhead.get_bulkhead.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_heavy_hitters():
+    heavy_hitters.get_heavy_hitters.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_request_deadline():
+    deadline.set_remaining(None)
+
+
 class ResponseTuple(NamedTuple):
     data: dict[str, Any]
     status: int
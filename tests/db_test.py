@@ -1,3 +1,4 @@
+import concurrent.futures
 import sqlite3
 import uuid
 from dataclasses import dataclass
@@ -5,6 +6,7 @@ from datetime import UTC, datetime
 from unittest.mock import patch
 
 import pytest
+from flask import Flask
 from flask.ctx import AppContext
 
 from oauthclientbridge import db, types
@@ -183,3 +185,58 @@ def test_upgrade_adds_timestamp_columns_without_dropping_rows(
         created_at=None,
         last_updated_at=None,
     )
+
+
+def test_lookup_generation_defaults_to_zero(app_context: AppContext):
+    assert db.lookup_generation(CLIENT_ID) == 0
+
+
+def test_update_generation_only_moves_forward(app_context: AppContext):
+    db.update_generation(CLIENT_ID, 2)
+    db.update_generation(CLIENT_ID, 1)
+
+    assert db.lookup_generation(CLIENT_ID) == 2
+
+
+def test_update_generation_revocation_is_final(app_context: AppContext):
+    db.update_generation(CLIENT_ID, None)
+    db.update_generation(CLIENT_ID, 3)
+
+    assert db.lookup_generation(CLIENT_ID) is None
+
+
+def test_lookup_generation_is_cached(cursor: sqlite3.Cursor):
+    assert db.lookup_generation(CLIENT_ID) == 0
+
+    cursor.execute(
+        "INSERT INTO grant_generations (client_id, generation) VALUES (?, 5)",
+        (str(CLIENT_ID),),
+    )
+
+    assert db.lookup_generation(CLIENT_ID) == 0
+
+
+def test_upgrade_adds_grant_generations_table(
+    app_context: AppContext, cursor: sqlite3.Cursor
+):
+    cursor.execute("DROP TABLE grant_generations")
+
+    db.upgrade()
+
+    assert db.lookup_generation(CLIENT_ID) == 0
+
+
+@pytest.mark.parametrize("handoff", [False, True])
+def test_connection_thread_handoff(app: Flask, handoff: bool) -> None:
+    if handoff:
+        db.allow_thread_handoff(app)
+
+    with app.app_context():
+        connection = db.get()
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            future = executor.submit(connection.execute, "SELECT 1")
+            if handoff:
+                assert future.result().fetchone() == (1,)
+            else:
+                with pytest.raises(sqlite3.ProgrammingError):
+                    _ = future.result()
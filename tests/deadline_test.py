@@ -0,0 +1,186 @@
+import time
+import unittest.mock
+
+import flask
+import pytest
+from requests_mock import Mocker as RequestsMocker
+
+from oauthclientbridge import db, deadline, oauth
+from oauthclientbridge.errors import OAuthError
+from oauthclientbridge.settings import current_settings
+
+from .conftest import PostClient, TokenTuple
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("2S", 2.0),
+        ("1500m", 1.5),
+        ("1M", 60.0),
+        ("100u", 0.0001),
+        (" 3S ", 3.0),
+        ("3", None),
+        ("123456789S", None),
+        ("-1S", None),
+        ("1.5S", None),
+    ],
+)
+def test_parse_grpc_timeout(value: str, expected: float | None) -> None:
+    assert deadline.parse_grpc_timeout(value) == (
+        pytest.approx(expected) if expected is not None else None
+    )
+
+
+@pytest.mark.parametrize(
+    ("headers", "expected"),
+    [
+        ({}, None),
+        ({"grpc-timeout": "2S"}, 2.0),
+        ({"X-Request-Deadline": "+3"}, 3.0),
+        ({"X-Request-Deadline": "+3", "grpc-timeout": "1S"}, 1.0),
+        ({"X-Request-Deadline": "soon"}, None),
+        ({"X-Request-Deadline": "inf"}, None),
+    ],
+)
+def test_request_deadline_from_headers(
+    app: flask.Flask, headers: dict[str, str], expected: float | None
+) -> None:
+    # Offsets are turned into absolute deadlines when the test runs.
+    headers = {
+        key: str(time.time() + float(value)) if value.startswith("+") else value
+        for key, value in headers.items()
+    }
+    with app.test_request_context(headers=headers):
+        _ = app.preprocess_request()
+        remaining = deadline.remaining()
+
+    if expected is None:
+        assert remaining is None
+    else:
+        assert remaining == pytest.approx(expected, abs=0.1)
+
+
+def test_request_deadline_is_capped_by_budget(app: flask.Flask) -> None:
+    app.config["SETTINGS"].request_budget_seconds = 1.0
+
+    with app.test_request_context(headers={"grpc-timeout": "10S"}):
+        _ = app.preprocess_request()
+        remaining = deadline.remaining()
+
+    assert remaining == pytest.approx(1.0, abs=0.1)
+
+
+def test_request_deadline_is_reset_between_requests(app: flask.Flask) -> None:
+    with app.test_request_context(headers={"grpc-timeout": "10S"}):
+        _ = app.preprocess_request()
+    with app.test_request_context():
+        _ = app.preprocess_request()
+        assert deadline.remaining() is None
+
+
+def test_fetch_stops_retrying_at_request_deadline(
+    app_context: flask.ctx.AppContext, requests_mock: RequestsMocker
+) -> None:
+    deadline.set_remaining(0.5)
+    mock = requests_mock.post(
+        current_settings.oauth.token_uri,
+        status_code=503,
+        headers={"Retry-After": "1"},
+    )
+
+    with unittest.mock.patch("time.sleep") as mock_sleep:
+        result = oauth.fetch(current_settings.oauth.token_uri, "refresh")
+
+    mock_sleep.assert_not_called()
+    assert mock.call_count == 1
+    assert "error" in result
+
+
+def test_fetch_is_not_sent_past_request_deadline(
+    app_context: flask.ctx.AppContext, requests_mock: RequestsMocker
+) -> None:
+    deadline.set_remaining(-1)
+    mock = requests_mock.post(current_settings.oauth.token_uri, json={})
+
+    result = oauth.fetch(current_settings.oauth.token_uri, "refresh")
+
+    assert not mock.called
+    assert "error" in result
+
+
+def test_fetch_past_request_deadline_is_temporarily_unavailable(
+    app_context: flask.ctx.AppContext, requests_mock: RequestsMocker
+) -> None:
+    current_settings.request_deadline_retry_after = 2
+    deadline.set_remaining(0)
+    mock = requests_mock.post(current_settings.oauth.token_uri, json={})
+
+    result = oauth.fetch(current_settings.oauth.token_uri, "refresh")
+
+    assert not mock.called
+    assert result["error"] == OAuthError.TEMPORARILY_UNAVAILABLE
+    assert result["retry_after"] == 2
+
+
+def test_token_past_request_deadline_is_temporarily_unavailable(
+    post: PostClient, refresh_token: TokenTuple, requests_mock: RequestsMocker
+) -> None:
+    mock = requests_mock.post(current_settings.oauth.token_uri, json={})
+    data = {
+        "client_id": refresh_token.client_id,
+        "client_secret": refresh_token.client_secret,
+        "grant_type": "client_credentials",
+    }
+
+    # A Unix time deadline long in the past.
+    resp = post("/token", data, headers={"X-Request-Deadline": "1"})
+
+    assert not mock.called
+    assert resp.status == 503
+    assert resp.data["error"] == OAuthError.TEMPORARILY_UNAVAILABLE
+    assert resp.headers["Retry-After"] == "1"
+
+
+def _busy_timeout() -> int:
+    return int(db.get().execute("PRAGMA busy_timeout").fetchone()[0])
+
+
+def test_cursor_busy_timeout_follows_request_deadline(
+    app_context: flask.ctx.AppContext,
+) -> None:
+    before = _busy_timeout()
+    deadline.set_remaining(0.25)
+
+    with db.cursor("test"):
+        during = _busy_timeout()
+
+    assert before == current_settings.database.timeout * 1000
+    assert 0 < during <= 250
+    assert _busy_timeout() == before
+
+
+def test_cursor_busy_timeout_is_kept_without_deadline(
+    app_context: flask.ctx.AppContext,
+) -> None:
+    with db.cursor("test"):
+        during = _busy_timeout()
+
+    assert during == current_settings.database.timeout * 1000
+
+
+def test_cursor_busy_timeout_keeps_pragma_override(
+    app_context: flask.ctx.AppContext,
+) -> None:
+    current_settings.database.pragmas = [
+        *current_settings.database.pragmas,
+        "PRAGMA busy_timeout = 100",
+    ]
+    db.close(None)
+    deadline.set_remaining(0.25)
+
+    with db.cursor("test"):
+        during = _busy_timeout()
+
+    assert during == 100
+    assert _busy_timeout() == 100
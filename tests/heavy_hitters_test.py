@@ -0,0 +1,134 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+from flask.testing import FlaskClient
+from pydantic import SecretStr
+
+from oauthclientbridge import heavy_hitters
+from oauthclientbridge.settings import Settings
+from oauthclientbridge.telemetry import _prometheus as stats
+
+from .conftest import PostClient
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(heavy_hitters.time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def tracked(settings: Settings) -> None:
+    settings.heavy_hitters_capacity = 100
+
+
+def test_heavy_hitters_decay(clock: Clock) -> None:
+    tracker = heavy_hitters.HeavyHitters(capacity=4, decay_seconds=60)
+    for _ in range(8):
+        tracker.record("a", "ua")
+
+    clock.now += 120
+
+    assert tracker.merged()["client_id"].top(1) == [("a", 2)]
+
+
+def test_heavy_hitters_merge_published_workers(tmp_path: Path) -> None:
+    other = {
+        "client_id": {"counts": {"b": 5}, "errors": {"b": 0}},
+        "user_agent": {"counts": {"old-app": 5}, "errors": {"old-app": 0}},
+    }
+    _ = (tmp_path / "heavy-hitters-1.json").write_text(json.dumps(other))
+    _ = (tmp_path / "heavy-hitters-2.json").write_text("not json")
+    stale = tmp_path / "heavy-hitters-3.json"
+    _ = stale.write_text(json.dumps(other))
+    os.utime(stale, (0, 0))
+
+    tracker = heavy_hitters.HeavyHitters(4, 60, tmp_path)
+    tracker.record("a", "old-app")
+
+    merged = tracker.merged()
+
+    assert merged["client_id"].top(2) == [("b", 5), ("a", 1)]
+    assert merged["user_agent"].top(1) == [("old-app", 6)]
+    assert (tmp_path / f"heavy-hitters-{os.getpid()}.json").exists()
+
+
+def test_heavy_hitters_endpoint(
+    tracked: None, post: PostClient, client: FlaskClient
+) -> None:
+    data = {
+        "client_id": "abc",
+        "client_secret": "wrong",
+        "grant_type": "client_credentials",
+    }
+    for _ in range(3):
+        _ = post("/token", data, headers={"User-Agent": "old-app/1.0"})
+
+    resp = client.get("/metrics/heavy-hitters")
+
+    assert resp.status_code == 200
+    assert resp.json == {
+        "client_id": [{"key": "abc", "count": 3, "error": 0}],
+        "user_agent": [{"key": "old-app/1.0", "count": 3, "error": 0}],
+    }
+
+
+def test_heavy_hitters_endpoint_requires_metrics_token(
+    client: FlaskClient, settings: Settings
+) -> None:
+    settings.metrics_token = SecretStr("t0ken")
+
+    assert client.get("/metrics/heavy-hitters").status_code == 401
+    resp = client.get(
+        "/metrics/heavy-hitters", headers={"Authorization": "Bearer t0ken"}
+    )
+    assert resp.status_code == 200
+
+
+def test_heavy_hitters_metrics_are_ranked(
+    tracked: None, post: PostClient, client: FlaskClient, settings: Settings
+) -> None:
+    settings.heavy_hitters_top = 2
+    for client_id in ["a", "a", "b"]:
+        data = {
+            "client_id": client_id,
+            "client_secret": "wrong",
+            "grant_type": "client_credentials",
+        }
+        _ = post("/token", data)
+
+    _ = client.get("/metrics")
+
+    def sample(rank: str) -> float | None:
+        return stats.registry.get_sample_value(
+            "oauth_token_top_requests", {"kind": "client_id", "rank": rank}
+        )
+
+    assert sample("1") == 2
+    assert sample("2") == 1
+
+
+def test_heavy_hitters_are_off_by_default(
+    post: PostClient, client: FlaskClient
+) -> None:
+    data = {
+        "client_id": "abc",
+        "client_secret": "wrong",
+        "grant_type": "client_credentials",
+    }
+    _ = post("/token", data)
+
+    resp = client.get("/metrics/heavy-hitters")
+
+    assert resp.json == {"client_id": [], "user_agent": []}
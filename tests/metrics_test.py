@@ -11,6 +11,7 @@ from pydantic import SecretStr
 from oauthclientbridge import (
     create_app,
     db,
+    runtime,
     start_runtime_services,
     stop_runtime_services,
     telemetry,
@@ -126,8 +127,14 @@ def test_metrics_exposes_token_state_counts(client: FlaskClient):
     resp = client.get("/metrics")
 
     assert resp.status_code == 200
-    assert b'oauth_token_records{state="present"} 1.0' in resp.data
-    assert b'oauth_token_records{state="revoked"} 1.0' in resp.data
+    assert (
+        b'oauth_token_records{oauth_provider="unknown",state="present"} 1.0'
+        in resp.data
+    )
+    assert (
+        b'oauth_token_records{oauth_provider="unknown",state="revoked"} 1.0'
+        in resp.data
+    )
 
 
 def test_metrics_uses_mostrecent_aggregation_for_token_state_counts():
@@ -203,12 +210,14 @@ def test_create_app_does_not_start_runtime_services(app: Flask):
 
 
 def test_metrics_exposes_workaround_counter(
+    app: Flask,
     client: FlaskClient,
     post: PostClient,
     access_token: TokenTuple,
     settings: Settings,
 ):
     settings.revoked_grant_workaround_user_agents = r"^Mopidy-Spotify/4\.1\.1\b"
+    runtime.init_app(app, settings)
 
     _ = db.update(access_token.client_id, None)
 
@@ -0,0 +1,168 @@
+from http import HTTPStatus
+from pathlib import Path
+
+import flask.ctx
+import pytest
+from requests_mock import Mocker as RequestsMocker
+
+from oauthclientbridge import oauth
+from oauthclientbridge.errors import OAuthError
+from oauthclientbridge.oauth import (
+    _backoff as oauth_backoff,  # pyright: ignore[reportPrivateUsage] # Direct implementation test.
+)
+from oauthclientbridge.settings import current_settings
+from oauthclientbridge.telemetry import _prometheus as stats
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(oauth_backoff.time, "time", clock)
+    return clock
+
+
+def test_backoff_counts_down(clock: Clock) -> None:
+    backoff = oauth_backoff.UpstreamBackoff(maximum=60)
+    assert backoff.remaining() == 0
+
+    backoff.block(10)
+    clock.now += 2.5
+
+    assert backoff.remaining() == 8
+
+    clock.now += 8
+    assert backoff.remaining() == 0
+
+
+def test_backoff_is_never_shortened(clock: Clock) -> None:
+    backoff = oauth_backoff.UpstreamBackoff(maximum=60)
+
+    backoff.block(10)
+    backoff.block(5)
+
+    assert backoff.remaining() == 10
+
+
+def test_backoff_is_capped(clock: Clock) -> None:
+    backoff = oauth_backoff.UpstreamBackoff(maximum=60)
+
+    backoff.block(3600)
+
+    assert backoff.remaining() == 60
+
+
+def test_backoff_is_shared_with_path(clock: Clock, tmp_path: Path) -> None:
+    path = tmp_path / "backoff"
+    first = oauth_backoff.UpstreamBackoff(60, path)
+    second = oauth_backoff.UpstreamBackoff(60, path)
+
+    first.block(10)
+
+    assert second.remaining() == 10
+    assert oauth_backoff.UpstreamBackoff(60, path).remaining() == 10
+
+
+@pytest.mark.parametrize(
+    ("headers", "expected"),
+    [
+        ({"RateLimit-Remaining": "0", "RateLimit-Reset": "7"}, 7),
+        ({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1700000030"}, 30),
+        ({"X-RateLimit-Remaining": "3", "X-RateLimit-Reset": "7"}, 0),
+        ({"RateLimit-Remaining": "0", "RateLimit-Reset": "soon"}, 0),
+        ({"RateLimit-Remaining": "0"}, 0),
+        ({}, 0),
+    ],
+)
+def test_parse_rate_limit_reset(
+    clock: Clock, headers: dict[str, str], expected: int
+) -> None:
+    lowered = {key.lower(): value for key, value in headers.items()}
+    assert oauth_backoff.parse_rate_limit_reset(lowered) == expected
+
+
+def test_fetch_fails_fast_after_retry_after(
+    app_context: flask.ctx.AppContext, requests_mock: RequestsMocker
+) -> None:
+    current_settings.fetch.upstream_backoff_enabled = True
+    current_settings.fetch.total_retries = 0
+    labels = {"oauth_provider": "unknown"}
+    before = (
+        stats.registry.get_sample_value("oauth_client_backoff_rejections_total", labels)
+        or 0
+    )
+    mock = requests_mock.post(
+        current_settings.oauth.token_uri,
+        status_code=HTTPStatus.TOO_MANY_REQUESTS,
+        headers={"Retry-After": "30"},
+        json={"error": "temporarily_unavailable"},
+    )
+
+    _ = oauth.fetch(current_settings.oauth.token_uri, "refresh")
+    result = oauth.fetch(current_settings.oauth.token_uri, "token")
+
+    assert mock.call_count == 1
+    assert result["error"] == OAuthError.TEMPORARILY_UNAVAILABLE
+    assert result["retry_after"] in (29, 30)
+    assert stats.registry.get_sample_value(
+        "oauth_client_backoff_rejections_total", labels
+    ) == (before + 1)
+
+
+def test_fetch_backs_off_on_exhausted_rate_limit(
+    app_context: flask.ctx.AppContext, requests_mock: RequestsMocker
+) -> None:
+    current_settings.fetch.upstream_backoff_enabled = True
+    mock = requests_mock.post(
+        current_settings.oauth.token_uri,
+        headers={"RateLimit-Remaining": "0", "RateLimit-Reset": "5"},
+        json={"access_token": "abc", "token_type": "Bearer"},
+    )
+
+    first = oauth.fetch(current_settings.oauth.token_uri, "refresh")
+    second = oauth.fetch(current_settings.oauth.token_uri, "refresh")
+
+    assert mock.call_count == 1
+    assert first["access_token"] == "abc"
+    assert second["error"] == OAuthError.TEMPORARILY_UNAVAILABLE
+
+
+def test_fetch_ignores_retry_after_on_non_retryable_status(
+    app_context: flask.ctx.AppContext, requests_mock: RequestsMocker
+) -> None:
+    current_settings.fetch.upstream_backoff_enabled = True
+    mock = requests_mock.post(
+        current_settings.oauth.token_uri,
+        status_code=HTTPStatus.BAD_REQUEST,
+        headers={"Retry-After": "30"},
+        json={"error": "invalid_grant"},
+    )
+
+    for _ in range(2):
+        _ = oauth.fetch(current_settings.oauth.token_uri, "refresh")
+
+    assert mock.call_count == 2
+
+
+def test_fetch_backoff_can_be_disabled(
+    app_context: flask.ctx.AppContext, requests_mock: RequestsMocker
+) -> None:
+    current_settings.fetch.upstream_backoff_enabled = False
+    current_settings.fetch.total_retries = 0
+    mock = requests_mock.post(
+        current_settings.oauth.token_uri,
+        status_code=HTTPStatus.TOO_MANY_REQUESTS,
+        headers={"Retry-After": "30"},
+    )
+
+    for _ in range(2):
+        _ = oauth.fetch(current_settings.oauth.token_uri, "refresh")
+
+    assert mock.call_count == 2
@@ -0,0 +1,258 @@
+import unittest.mock
+from http import HTTPStatus
+
+import flask.ctx
+import pytest
+from requests_mock import Mocker as RequestsMocker
+
+from oauthclientbridge import oauth
+from oauthclientbridge.errors import OAuthError
+from oauthclientbridge.oauth import (
+    _breaker as oauth_breaker,  # pyright: ignore[reportPrivateUsage] # Direct implementation test.
+)
+from oauthclientbridge.oauth._outcome import UpstreamResult
+from oauthclientbridge.settings import current_settings
+from oauthclientbridge.telemetry import _prometheus as stats
+
+BreakerState = oauth_breaker.BreakerState
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(oauth_breaker.time, "monotonic", clock)
+    return clock
+
+
+def _breaker(ramp_seconds: float = 0) -> oauth_breaker.CircuitBreaker:
+    return oauth_breaker.CircuitBreaker(
+        window=4,
+        failure_rate=0.5,
+        minimum_requests=4,
+        open_seconds=10,
+        probes=2,
+        ramp_seconds=ramp_seconds,
+        provider="test",
+        endpoint="refresh",
+    )
+
+
+def _attempt(breaker: oauth_breaker.CircuitBreaker, result: UpstreamResult) -> None:
+    admitted = breaker.allow()
+    assert admitted is not None
+    breaker.record(admitted, result)
+
+
+def _open(breaker: oauth_breaker.CircuitBreaker) -> None:
+    for _ in range(4):
+        _attempt(breaker, UpstreamResult.SERVER_ERROR)
+    assert breaker.state == BreakerState.OPEN
+
+
+def test_breaker_opens_on_failure_rate(clock: Clock) -> None:
+    breaker = _breaker()
+    for result in [UpstreamResult.SUCCESS, UpstreamResult.TIMEOUT] * 2:
+        _attempt(breaker, result)
+
+    assert breaker.state == BreakerState.OPEN
+    assert breaker.allow() is None
+    assert breaker.retry_after() == 10
+
+
+def test_breaker_needs_minimum_requests(clock: Clock) -> None:
+    breaker = _breaker()
+    for _ in range(3):
+        _attempt(breaker, UpstreamResult.RATE_LIMITED)
+
+    assert breaker.state == BreakerState.CLOSED
+
+
+@pytest.mark.parametrize(
+    "result",
+    [UpstreamResult.SUCCESS, UpstreamResult.CLIENT_ERROR, UpstreamResult.REJECTED],
+)
+def test_breaker_ignores_non_failures(clock: Clock, result: UpstreamResult) -> None:
+    breaker = _breaker()
+    for _ in range(10):
+        _attempt(breaker, result)
+
+    assert breaker.state == BreakerState.CLOSED
+
+
+def test_breaker_retry_after_counts_down(clock: Clock) -> None:
+    breaker = _breaker()
+    _open(breaker)
+
+    clock.now += 7.5
+
+    assert breaker.retry_after() == 3
+
+
+def test_breaker_half_opens_with_limited_probes(clock: Clock) -> None:
+    breaker = _breaker()
+    _open(breaker)
+    clock.now += 10
+
+    assert breaker.allow() == BreakerState.HALF_OPEN
+    assert breaker.allow() == BreakerState.HALF_OPEN
+    assert breaker.allow() is None
+
+
+def test_breaker_closes_after_successful_probes(clock: Clock) -> None:
+    breaker = _breaker()
+    _open(breaker)
+    clock.now += 10
+
+    probes = [breaker.allow(), breaker.allow()]
+    for probe in probes:
+        assert probe is not None
+        breaker.record(probe, UpstreamResult.SUCCESS)
+
+    assert breaker.state == BreakerState.CLOSED
+
+
+def test_breaker_reopens_on_failed_probe(clock: Clock) -> None:
+    breaker = _breaker()
+    _open(breaker)
+    clock.now += 10
+
+    _attempt(breaker, UpstreamResult.SUCCESS)
+    _attempt(breaker, UpstreamResult.TIMEOUT)
+
+    assert breaker.state == BreakerState.OPEN
+    assert breaker.retry_after() == 10
+
+
+def test_breaker_rejected_probe_is_returned(clock: Clock) -> None:
+    breaker = _breaker()
+    _open(breaker)
+    clock.now += 10
+
+    _attempt(breaker, UpstreamResult.REJECTED)
+
+    assert breaker.allow() == BreakerState.HALF_OPEN
+    assert breaker.allow() == BreakerState.HALF_OPEN
+
+
+def test_breaker_ignores_late_results_from_closed_state(clock: Clock) -> None:
+    breaker = _breaker()
+    _open(breaker)
+    clock.now += 10
+
+    breaker.record(BreakerState.CLOSED, UpstreamResult.TIMEOUT)
+
+    assert breaker.allow() == BreakerState.HALF_OPEN
+
+
+def test_breaker_ramps_traffic_after_closing(clock: Clock) -> None:
+    breaker = _breaker(ramp_seconds=20)
+    _open(breaker)
+    clock.now += 10
+    for _ in range(2):
+        _attempt(breaker, UpstreamResult.SUCCESS)
+
+    with unittest.mock.patch("random.random", return_value=0.5):
+        assert breaker.allow() is None
+        clock.now += 11
+        assert breaker.allow() == BreakerState.CLOSED
+
+    with unittest.mock.patch("random.random", return_value=0.05):
+        clock.now -= 11
+        assert breaker.allow() == BreakerState.CLOSED
+
+
+def test_breaker_transitions_are_exported(clock: Clock) -> None:
+    labels = {"oauth_provider": "test", "endpoint": "refresh"}
+    before = (
+        stats.registry.get_sample_value(
+            "oauth_client_breaker_transitions_total", {**labels, "state": "open"}
+        )
+        or 0
+    )
+    breaker = _breaker()
+
+    _open(breaker)
+
+    assert stats.registry.get_sample_value(
+        "oauth_client_breaker_transitions_total", {**labels, "state": "open"}
+    ) == (before + 1)
+    assert (
+        stats.registry.get_sample_value(
+            "oauth_client_breaker_state", {**labels, "state": "open"}
+        )
+        == 1
+    )
+    assert (
+        stats.registry.get_sample_value(
+            "oauth_client_breaker_state", {**labels, "state": "closed"}
+        )
+        == 0
+    )
+
+
+def test_fetch_fails_fast_while_breaker_is_open(
+    app_context: flask.ctx.AppContext, requests_mock: RequestsMocker
+) -> None:
+    current_settings.fetch.breaker_enabled = True
+    current_settings.fetch.breaker_minimum_requests = 2
+    current_settings.fetch.breaker_open_seconds = 30
+    current_settings.fetch.total_retries = 0
+    mock = requests_mock.post(
+        current_settings.oauth.token_uri,
+        status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+        json={"error": "temporarily_unavailable"},
+    )
+
+    for _ in range(2):
+        _ = oauth.fetch(current_settings.oauth.token_uri, "refresh")
+    result = oauth.fetch(current_settings.oauth.token_uri, "refresh")
+
+    assert mock.call_count == 2
+    assert result["error"] == OAuthError.TEMPORARILY_UNAVAILABLE
+    assert result["retry_after"] == 30
+
+
+def test_fetch_breakers_are_per_endpoint(
+    app_context: flask.ctx.AppContext, requests_mock: RequestsMocker
+) -> None:
+    current_settings.fetch.breaker_enabled = True
+    current_settings.fetch.breaker_minimum_requests = 2
+    current_settings.fetch.total_retries = 0
+    _ = requests_mock.post(
+        current_settings.oauth.token_uri, status_code=HTTPStatus.BAD_GATEWAY
+    )
+    for _ in range(2):
+        _ = oauth.fetch(current_settings.oauth.token_uri, "refresh")
+
+    mock = requests_mock.post(
+        current_settings.oauth.token_uri,
+        json={"access_token": "abc", "token_type": "Bearer"},
+    )
+    result = oauth.fetch(current_settings.oauth.token_uri, "token")
+
+    assert mock.called
+    assert result["access_token"] == "abc"
+
+
+def test_fetch_breaker_can_be_disabled(
+    app_context: flask.ctx.AppContext, requests_mock: RequestsMocker
+) -> None:
+    current_settings.fetch.breaker_enabled = False
+    current_settings.fetch.breaker_minimum_requests = 1
+    current_settings.fetch.total_retries = 0
+    mock = requests_mock.post(
+        current_settings.oauth.token_uri, status_code=HTTPStatus.BAD_GATEWAY
+    )
+
+    for _ in range(3):
+        _ = oauth.fetch(current_settings.oauth.token_uri, "refresh")
+
+    assert mock.call_count == 3
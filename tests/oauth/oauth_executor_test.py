@@ -0,0 +1,231 @@
+import concurrent.futures
+import threading
+import time
+from typing import Any
+
+import flask.ctx
+import pytest
+from requests_mock import Mocker as RequestsMocker
+
+from oauthclientbridge import deadline, oauth
+from oauthclientbridge.errors import OAuthError
+from oauthclientbridge.oauth import (
+    _executor as oauth_executor,  # pyright: ignore[reportPrivateUsage] # Direct implementation test.
+)
+from oauthclientbridge.settings import current_settings
+from oauthclientbridge.telemetry import _prometheus as stats
+
+
+def _rejections(reason: str) -> float:
+    return (
+        stats.registry.get_sample_value(
+            "oauth_refresh_queue_rejections_total",
+            {"oauth_provider": "unknown", "reason": reason},
+        )
+        or 0
+    )
+
+
+def _blocker(
+    executor: oauth_executor.RefreshExecutor, key: str = "blocker"
+) -> threading.Event:
+    """Occupy a worker until the returned event is set."""
+    started, release = threading.Event(), threading.Event()
+
+    def block() -> None:
+        started.set()
+        _ = release.wait(5)
+
+    _ = executor.submit(key, block, time.monotonic() + 5)
+    assert started.wait(5)
+    return release
+
+
+def test_executor_shares_pending_work() -> None:
+    executor = oauth_executor.RefreshExecutor(workers=1, queue_size=4)
+    release = _blocker(executor)
+    calls: list[int] = []
+
+    first = executor.submit("a", lambda: calls.append(1), time.monotonic() + 5)
+    second = executor.submit("a", lambda: calls.append(2), time.monotonic() + 5)
+    release.set()
+
+    assert first is second
+    assert first.result(5) is None
+    assert calls == [1]
+
+
+def test_executor_rejects_when_full() -> None:
+    executor = oauth_executor.RefreshExecutor(workers=1, queue_size=1)
+    release = _blocker(executor)
+    before = _rejections("full")
+
+    try:
+        _ = executor.submit("a", lambda: None, time.monotonic() + 5)
+        with pytest.raises(oauth_executor.QueueFull):
+            _ = executor.submit("b", lambda: None, time.monotonic() + 5)
+    finally:
+        release.set()
+
+    assert _rejections("full") == before + 1
+
+
+def test_executor_drops_expired_work() -> None:
+    executor = oauth_executor.RefreshExecutor(workers=1, queue_size=1)
+    release = _blocker(executor)
+    calls: list[int] = []
+
+    future = executor.submit("a", lambda: calls.append(1), time.monotonic() + 0.01)
+    time.sleep(0.02)
+    release.set()
+
+    with pytest.raises(oauth_executor.Expired):
+        future.result(5)
+    assert calls == []
+
+
+def test_fetch_queued_runs_on_worker(
+    app_context: flask.ctx.AppContext, requests_mock: RequestsMocker
+) -> None:
+    current_settings.fetch.refresh_workers = 1
+    threads: list[str] = []
+
+    def respond(request: Any, context: Any) -> dict[str, str]:
+        threads.append(threading.current_thread().name)
+        return {"access_token": "abc", "token_type": "Bearer"}
+
+    _ = requests_mock.post(current_settings.oauth.token_uri, json=respond)
+
+    result = oauth.fetch_queued(current_settings.oauth.token_uri, "refresh")
+
+    assert result["access_token"] == "abc"
+    assert threads == ["oauth-refresh-0"]
+
+
+def test_fetch_queued_gives_up_at_deadline(
+    app_context: flask.ctx.AppContext, requests_mock: RequestsMocker
+) -> None:
+    current_settings.fetch.refresh_workers = 1
+    current_settings.fetch.refresh_retry_after = 3
+    deadline.set_remaining(0.05)
+    before = _rejections("timeout")
+
+    def respond(request: Any, context: Any) -> dict[str, str]:
+        time.sleep(0.2)
+        return {"access_token": "abc", "token_type": "Bearer"}
+
+    _ = requests_mock.post(current_settings.oauth.token_uri, json=respond)
+
+    result = oauth.fetch_queued(current_settings.oauth.token_uri, "refresh")
+
+    assert result["error"] == OAuthError.TEMPORARILY_UNAVAILABLE
+    assert result["retry_after"] == 3
+    assert _rejections("timeout") == before + 1
+
+
+def test_fetch_queued_does_not_refresh_after_waiter_gave_up(
+    app_context: flask.ctx.AppContext, requests_mock: RequestsMocker
+) -> None:
+    current_settings.fetch.refresh_workers = 1
+    current_settings.fetch.refresh_queue_size = 4
+    current_settings.fetch.total_timeout = 0.4
+    current_settings.fetch.backoff_factor = 0
+    executor = oauth_executor.get_refresh_executor(1, 4, None)
+    release = _blocker(executor)
+    gave_up = threading.Event()
+    threading.Timer(0.2, release.set).start()
+
+    def respond(request: Any, context: Any) -> dict[str, str]:
+        if len(requests_mock.request_history) == 1:
+            assert gave_up.wait(5)
+            context.status_code = 503
+            return {"error": "temporarily_unavailable"}
+        return {"access_token": "rotated", "token_type": "Bearer"}
+
+    _ = requests_mock.post(current_settings.oauth.token_uri, json=respond)
+
+    result = oauth.fetch_queued(current_settings.oauth.token_uri, "refresh")
+    gave_up.set()
+    _blocker(executor).set()
+
+    assert result["error"] == OAuthError.TEMPORARILY_UNAVAILABLE
+    assert len(requests_mock.request_history) == 1
+
+
+def test_fetch_queued_gives_waiters_their_own_result(
+    app_context: flask.ctx.AppContext,
+    requests_mock: RequestsMocker,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    current_settings.fetch.refresh_workers = 1
+    current_settings.fetch.refresh_queue_size = 4
+    executor = oauth_executor.get_refresh_executor(1, 4, None)
+    release = _blocker(executor)
+    _ = requests_mock.post(
+        current_settings.oauth.token_uri,
+        json={"access_token": "abc", "token_type": "Bearer"},
+    )
+    results: list[dict[str, Any]] = []
+    submitted = threading.Semaphore(0)
+    submit = executor.submit
+
+    def counted_submit(*args: Any) -> Any:
+        future = submit(*args)
+        submitted.release()
+        return future
+
+    monkeypatch.setattr(executor, "submit", counted_submit)
+
+    def wait() -> None:
+        with app_context.app.app_context():
+            results.append(
+                oauth.fetch_queued(current_settings.oauth.token_uri, "refresh")
+            )
+
+    threads = [threading.Thread(target=wait) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for _ in threads:
+        assert submitted.acquire(timeout=5)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(requests_mock.request_history) == 1
+    assert results[0] == results[1]
+    assert results[0] is not results[1]
+
+
+def test_fetch_queued_counts_expired_work_once(
+    app_context: flask.ctx.AppContext, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    current_settings.fetch.refresh_workers = 1
+    current_settings.fetch.refresh_queue_size = 4
+    executor = oauth_executor.get_refresh_executor(1, 4, None)
+    future = concurrent.futures.Future[Any]()
+    future.set_exception(oauth_executor.Expired())
+    before = _rejections("timeout")
+
+    monkeypatch.setattr(executor, "submit", lambda *args: future)
+    result = oauth.fetch_queued(current_settings.oauth.token_uri, "refresh")
+
+    assert result["error"] == OAuthError.TEMPORARILY_UNAVAILABLE
+    assert _rejections("timeout") == before
+
+
+def test_fetch_queued_sheds_when_queue_is_full(
+    app_context: flask.ctx.AppContext,
+) -> None:
+    current_settings.fetch.refresh_workers = 1
+    current_settings.fetch.refresh_queue_size = 1
+    executor = oauth_executor.get_refresh_executor(1, 1, None)
+    release = _blocker(executor)
+
+    try:
+        _ = executor.submit("queued", lambda: None, time.monotonic() + 5)
+        result = oauth.fetch_queued(current_settings.oauth.token_uri, "refresh")
+    finally:
+        release.set()
+
+    assert result["error"] == OAuthError.TEMPORARILY_UNAVAILABLE
+    assert result["retry_after"] == current_settings.fetch.refresh_retry_after
@@ -0,0 +1,219 @@
+import asyncio
+import contextlib
+import threading
+import time
+import unittest.mock
+from collections.abc import Callable
+from typing import Any
+
+import flask.ctx
+import httpx
+import pytest
+from requests_mock import Mocker as RequestsMocker
+
+from oauthclientbridge import oauth
+from oauthclientbridge.oauth import (
+    _core as oauth_core,  # pyright: ignore[reportPrivateUsage] # Direct implementation test.
+)
+from oauthclientbridge.oauth import (
+    _httpx as oauth_httpx,  # pyright: ignore[reportPrivateUsage] # Direct implementation test.
+)
+from oauthclientbridge.oauth import (
+    _latency as oauth_latency,  # pyright: ignore[reportPrivateUsage] # Direct implementation test.
+)
+from oauthclientbridge.oauth import (
+    _retry as oauth_retry,  # pyright: ignore[reportPrivateUsage] # Direct implementation test.
+)
+from oauthclientbridge.settings import current_settings
+from oauthclientbridge.telemetry import _prometheus as stats
+
+FAST = {"access_token": "fast", "token_type": "Bearer"}
+SLOW = {"access_token": "slow", "token_type": "Bearer"}
+
+
+def _hedges(outcome: str) -> float:
+    return (
+        stats.registry.get_sample_value(
+            "oauth_client_hedges_total", {"endpoint": "token", "outcome": outcome}
+        )
+        or 0
+    )
+
+
+@pytest.fixture
+def hedged(app_context: flask.ctx.AppContext) -> None:
+    current_settings.fetch.hedge_endpoints = {"token"}
+    current_settings.fetch.hedge_min_delay = 0.01
+    tracker = oauth_latency.get_latency_tracker(None, "token")
+    for _ in range(20):
+        tracker.observe(0.01)
+
+
+def _transport(
+    handler: Callable[[httpx.Request], httpx.Response],
+) -> contextlib.AbstractContextManager[object]:
+    # requests_mock serializes sends, so race the attempts through httpx.
+    transport = oauth_httpx.HTTP2Transport(max_connections=2)
+    transport._client = httpx.Client(  # pyright: ignore[reportPrivateUsage]
+        transport=httpx.MockTransport(handler)
+    )
+    return unittest.mock.patch(
+        "oauthclientbridge.oauth._core.get_transport", return_value=transport
+    )
+
+
+def test_fetch_hedge_wins_over_slow_attempt(hedged: None) -> None:
+    release = threading.Event()
+    calls: list[int] = []
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        calls.append(len(calls))
+        if len(calls) == 1:
+            _ = release.wait(5)
+            return httpx.Response(200, json=SLOW)
+        return httpx.Response(200, json=FAST)
+
+    before = _hedges("won")
+
+    try:
+        with _transport(respond):
+            result = oauth.fetch(current_settings.oauth.token_uri, "token")
+    finally:
+        release.set()
+
+    assert result == FAST
+    assert len(calls) == 2
+    assert _hedges("won") == before + 1
+
+
+def test_fetch_hedge_loses_to_primary_attempt(hedged: None) -> None:
+    release = threading.Event()
+    calls: list[int] = []
+
+    def respond(request: httpx.Request) -> httpx.Response:
+        calls.append(len(calls))
+        if len(calls) == 1:
+            time.sleep(0.1)
+            return httpx.Response(200, json=SLOW)
+        _ = release.wait(5)
+        return httpx.Response(200, json=FAST)
+
+    before = _hedges("lost")
+
+    try:
+        with _transport(respond):
+            result = oauth.fetch(current_settings.oauth.token_uri, "token")
+    finally:
+        release.set()
+
+    assert result == SLOW
+    assert len(calls) == 2
+    assert _hedges("lost") == before + 1
+
+
+def test_fetch_does_not_hedge_fast_attempts(
+    hedged: None, requests_mock: RequestsMocker
+) -> None:
+    current_settings.fetch.hedge_min_delay = 1
+    mock = requests_mock.post(current_settings.oauth.token_uri, json=FAST)
+    before = _hedges("won") + _hedges("lost") + _hedges("skipped")
+
+    result = oauth.fetch(current_settings.oauth.token_uri, "token")
+
+    assert result == FAST
+    assert mock.call_count == 1
+    assert _hedges("won") + _hedges("lost") + _hedges("skipped") == before
+
+
+def test_fetch_hedge_draws_from_retry_budget(
+    hedged: None, requests_mock: RequestsMocker
+) -> None:
+    current_settings.fetch.retry_budget_capacity = 1
+    current_settings.fetch.retry_budget_refill_per_initial = 0
+    budget = oauth_retry.get_retry_limiter(1, 0, None, None)
+    assert budget.consume()
+
+    def respond(request: Any, context: Any) -> dict[str, str]:
+        time.sleep(0.1)
+        return SLOW
+
+    mock = requests_mock.post(current_settings.oauth.token_uri, json=respond)
+    before = _hedges("skipped")
+
+    result = oauth.fetch(current_settings.oauth.token_uri, "token")
+
+    assert result == SLOW
+    assert mock.call_count == 1
+    assert _hedges("skipped") == before + 1
+
+
+def test_fetch_does_not_hedge_unlisted_endpoints(
+    hedged: None, requests_mock: RequestsMocker
+) -> None:
+    tracker = oauth_latency.get_latency_tracker(None, "refresh")
+    for _ in range(20):
+        tracker.observe(0.01)
+
+    def respond(request: Any, context: Any) -> dict[str, str]:
+        time.sleep(0.1)
+        return SLOW
+
+    mock = requests_mock.post(current_settings.oauth.token_uri, json=respond)
+
+    result = oauth.fetch(current_settings.oauth.token_uri, "refresh")
+
+    assert result == SLOW
+    assert mock.call_count == 1
+
+
+def test_fetch_does_not_hedge_without_a_free_thread(
+    hedged: None, requests_mock: RequestsMocker
+) -> None:
+    current_settings.fetch.hedge_max_concurrency = 1
+    pool = oauth_core._get_hedge_pool(2)  # pyright: ignore[reportPrivateUsage]
+    assert pool.reserve()
+
+    def respond(request: Any, context: Any) -> dict[str, str]:
+        time.sleep(0.1)
+        return SLOW
+
+    mock = requests_mock.post(current_settings.oauth.token_uri, json=respond)
+
+    try:
+        result = oauth.fetch(current_settings.oauth.token_uri, "token")
+    finally:
+        pool.release()
+
+    assert result == SLOW
+    assert mock.call_count == 1
+
+
+def test_fetch_async_hedge_cancels_loser(hedged: None) -> None:
+    cancelled: list[bool] = []
+
+    async def respond(request: httpx.Request) -> httpx.Response:
+        if not cancelled:
+            cancelled.append(False)
+            try:
+                await asyncio.Event().wait()
+            except asyncio.CancelledError:
+                cancelled[0] = True
+                raise
+        return httpx.Response(200, json=FAST)
+
+    transport = oauth_httpx.AsyncHTTPXTransport(http2=False, max_connections=2)
+    transport._client = httpx.AsyncClient(  # pyright: ignore[reportPrivateUsage]
+        transport=httpx.MockTransport(respond)
+    )
+    before = _hedges("won")
+
+    with unittest.mock.patch(
+        "oauthclientbridge.oauth._core.get_async_transport", return_value=transport
+    ):
+        result = asyncio.run(
+            oauth.fetch_async(current_settings.oauth.token_uri, "token")
+        )
+
+    assert result == FAST
+    assert cancelled == [True]
+    assert _hedges("won") == before + 1
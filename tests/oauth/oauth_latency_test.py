@@ -0,0 +1,127 @@
+import flask.ctx
+import pytest
+import requests
+from requests_mock import Mocker as RequestsMocker
+
+from oauthclientbridge import oauth
+from oauthclientbridge.oauth import (
+    _latency as oauth_latency,  # pyright: ignore[reportPrivateUsage] # Direct implementation test.
+)
+from oauthclientbridge.settings import current_settings
+from oauthclientbridge.telemetry import _prometheus as stats
+
+
+def _estimate(endpoint: str, estimate: str) -> float | None:
+    return stats.registry.get_sample_value(
+        "oauth_client_latency_estimate_seconds",
+        {"oauth_provider": "unknown", "endpoint": endpoint, "estimate": estimate},
+    )
+
+
+def _observe(endpoint: str, latency: float, count: int = 20) -> None:
+    tracker = oauth_latency.get_latency_tracker(None, endpoint)
+    for _ in range(count):
+        tracker.observe(latency)
+
+
+def test_latency_quantile_needs_samples() -> None:
+    tracker = oauth_latency.LatencyTracker(window=100, minimum_samples=10)
+    for latency in range(9):
+        tracker.observe(latency)
+
+    assert tracker.quantile(0.5) is None
+    assert tracker.timeout(3) is None
+
+
+def test_latency_quantile_over_window() -> None:
+    tracker = oauth_latency.LatencyTracker(window=100, minimum_samples=10)
+    for latency in range(200):
+        tracker.observe(latency)
+
+    assert tracker.quantile(0.95) == 194
+    assert tracker.quantile(0.5) == 149
+
+
+def test_latency_timeout_follows_steady_latency() -> None:
+    tracker = oauth_latency.LatencyTracker(window=100, minimum_samples=10)
+    for _ in range(100):
+        tracker.observe(0.1)
+
+    timeout = tracker.timeout(3)
+    assert timeout is not None
+    assert timeout == pytest.approx(0.3, rel=0.01)
+
+
+def test_latency_timeout_reacts_to_shifting_mean() -> None:
+    tracker = oauth_latency.LatencyTracker(window=100, minimum_samples=10)
+    for _ in range(100):
+        tracker.observe(0.1)
+    for _ in range(5):
+        tracker.observe(0.5)
+
+    timeout = tracker.timeout(1)
+    assert timeout is not None
+    assert timeout > 0.5
+
+
+def test_latency_estimates_are_exported() -> None:
+    _observe("refresh", 0.25)
+
+    assert _estimate("refresh", "mean") == pytest.approx(0.25)
+    assert _estimate("refresh", "p99") == 0.25
+
+
+def test_fetch_uses_adapted_timeout(
+    app_context: flask.ctx.AppContext, requests_mock: RequestsMocker
+) -> None:
+    current_settings.fetch.adaptive_timeout = True
+    current_settings.fetch.adaptive_timeout_min = 0.5
+    _observe("refresh", 0.25)
+    mock = requests_mock.post(current_settings.oauth.token_uri, json={})
+
+    _ = oauth.fetch(current_settings.oauth.token_uri, "refresh")
+
+    assert mock.last_request is not None
+    assert mock.last_request.timeout == pytest.approx(0.75, rel=0.05)
+    assert _estimate("refresh", "timeout") == mock.last_request.timeout
+
+
+@pytest.mark.parametrize(
+    ("adaptive", "latency", "expected"),
+    [(False, 0.01, 5.0), (True, 0.01, 1.0), (True, 10.0, 5.0)],
+)
+def test_fetch_adapted_timeout_bounds(
+    app_context: flask.ctx.AppContext,
+    requests_mock: RequestsMocker,
+    adaptive: bool,
+    latency: float,
+    expected: float,
+) -> None:
+    current_settings.fetch.adaptive_timeout = adaptive
+    _observe("refresh", latency)
+    mock = requests_mock.post(current_settings.oauth.token_uri, json={})
+
+    _ = oauth.fetch(current_settings.oauth.token_uri, "refresh")
+
+    assert mock.last_request is not None
+    assert mock.last_request.timeout == expected
+
+
+def test_fetch_timeouts_lengthen_adapted_timeout(
+    app_context: flask.ctx.AppContext, requests_mock: RequestsMocker
+) -> None:
+    current_settings.fetch.total_retries = 0
+    current_settings.fetch.adaptive_timeout_min = 0.1
+    _observe("refresh", 0.05)
+    _ = requests_mock.post(
+        current_settings.oauth.token_uri, exc=requests.exceptions.ReadTimeout
+    )
+    tracker = oauth_latency.get_latency_tracker(None, "refresh")
+    before = tracker.timeout(current_settings.fetch.adaptive_timeout_multiplier)
+
+    for _ in range(3):
+        _ = oauth.fetch(current_settings.oauth.token_uri, "refresh")
+
+    after = tracker.timeout(current_settings.fetch.adaptive_timeout_multiplier)
+    assert before is not None and after is not None
+    assert after > before
@@ -0,0 +1,259 @@
+import asyncio
+import threading
+from http import HTTPStatus
+
+import flask.ctx
+import pytest
+import requests
+from requests_mock import Mocker as RequestsMocker
+
+from oauthclientbridge import oauth
+from oauthclientbridge.errors import OAuthError
+from oauthclientbridge.oauth import (
+    _core as oauth_core,  # pyright: ignore[reportPrivateUsage] # Direct implementation test.
+)
+from oauthclientbridge.oauth import (
+    _limit as oauth_limit,  # pyright: ignore[reportPrivateUsage] # Direct implementation test.
+)
+from oauthclientbridge.settings import current_settings
+from oauthclientbridge.telemetry import _prometheus as stats
+
+from ..conftest import PostClient, TokenTuple
+
+
+def _limit(initial: int = 4, maximum: int = 8) -> oauth_limit.ConcurrencyLimit:
+    return oauth_limit.ConcurrencyLimit(
+        initial, maximum, backoff_ratio=0.5, latency_tolerance=2.0, provider="test"
+    )
+
+
+def _saturate(limit: oauth_limit.ConcurrencyLimit) -> None:
+    while limit.acquire(0):
+        pass
+
+
+def test_limit_grows_while_in_use() -> None:
+    limit = _limit(initial=2)
+    _saturate(limit)
+
+    for _ in range(10):
+        limit.release(0.1, overloaded=False)
+        assert limit.acquire(0)
+
+    assert limit.limit > 2
+
+
+def test_limit_does_not_grow_when_idle() -> None:
+    limit = _limit(initial=4)
+
+    for _ in range(10):
+        assert limit.acquire(0)
+        limit.release(0.1, overloaded=False)
+
+    assert limit.limit == 4
+
+
+def test_limit_is_capped_at_maximum() -> None:
+    limit = _limit(initial=8, maximum=8)
+    _saturate(limit)
+
+    for _ in range(50):
+        limit.release(0.1, overloaded=False)
+        assert limit.acquire(0)
+
+    assert limit.limit == 8
+
+
+def test_limit_is_cut_on_overload() -> None:
+    limit = _limit(initial=8)
+
+    assert limit.acquire(0)
+    limit.release(0.1, overloaded=True)
+
+    assert limit.limit == 4
+
+
+def test_limit_is_cut_once_per_round_trip(monkeypatch: pytest.MonkeyPatch) -> None:
+    limit = _limit(initial=8)
+    now = 100.0
+    monkeypatch.setattr(oauth_limit.time, "monotonic", lambda: now)
+
+    for _ in range(3):
+        assert limit.acquire(0)
+    for _ in range(3):
+        limit.release(0.1, overloaded=True)
+    assert limit.limit == 4
+
+    now += 1
+    assert limit.acquire(0)
+    limit.release(0.1, overloaded=True)
+    assert limit.limit == 2
+
+
+def test_limit_is_cut_on_latency_spike() -> None:
+    limit = _limit(initial=8)
+    for _ in range(3):
+        assert limit.acquire(0)
+        limit.release(0.1, overloaded=False)
+
+    assert limit.acquire(0)
+    limit.release(0.5, overloaded=False)
+
+    assert limit.limit == 4
+
+
+def test_limit_never_drops_below_one() -> None:
+    limit = _limit(initial=2)
+
+    for _ in range(10):
+        assert limit.acquire(0)
+        limit.release(0.0, overloaded=True)
+
+    assert limit.limit == 1
+    assert limit.acquire(0)
+
+
+def test_unused_slot_does_not_adapt() -> None:
+    limit = _limit(initial=4)
+
+    assert limit.acquire(0)
+    limit.release()
+
+    assert limit.limit == 4
+
+
+def test_acquire_times_out_when_full() -> None:
+    limit = _limit(initial=1)
+    assert limit.acquire(0)
+
+    assert not limit.acquire(0.01)
+    assert limit.queued == 0
+
+
+def test_release_hands_slot_to_waiter() -> None:
+    limit = _limit(initial=1)
+    assert limit.acquire(0)
+    acquired: list[bool] = []
+
+    waiter = threading.Thread(target=lambda: acquired.append(limit.acquire(5)))
+    waiter.start()
+    while limit.queued == 0:
+        pass
+    limit.release(0.1, overloaded=False)
+    waiter.join()
+
+    assert acquired == [True]
+    assert not limit.acquire(0)
+
+
+def test_release_hands_slot_to_async_waiter() -> None:
+    limit = _limit(initial=1)
+    assert limit.acquire(0)
+
+    async def wait() -> bool:
+        task = asyncio.create_task(limit.acquire_async(5))
+        while limit.queued == 0:
+            await asyncio.sleep(0)
+        limit.release(0.1, overloaded=False)
+        return await task
+
+    assert asyncio.run(wait())
+    assert not limit.acquire(0)
+
+
+def test_async_acquire_times_out_when_full() -> None:
+    limit = _limit(initial=1)
+    assert limit.acquire(0)
+
+    assert not asyncio.run(limit.acquire_async(0.01))
+    assert limit.queued == 0
+
+
+def test_limit_and_queue_are_exported() -> None:
+    limit = _limit(initial=1)
+    assert limit.acquire(0)
+
+    assert not limit.acquire(0)
+
+    labels = {"oauth_provider": "test"}
+    assert (
+        stats.registry.get_sample_value("oauth_client_concurrency_limit", labels) == 1
+    )
+    assert (
+        stats.registry.get_sample_value("oauth_client_concurrency_queued", labels) == 0
+    )
+
+
+def test_fetch_is_not_limited_by_default(app_context: flask.ctx.AppContext) -> None:
+    assert oauth_core._get_concurrency_limit() is None  # pyright: ignore[reportPrivateUsage]
+
+
+def test_fetch_is_rejected_when_limit_is_full(
+    app_context: flask.ctx.AppContext, requests_mock: RequestsMocker
+) -> None:
+    current_settings.fetch.concurrency_limit_enabled = True
+    current_settings.fetch.concurrency_limit_initial = 1
+    current_settings.fetch.concurrency_limit_max_wait = 0
+    current_settings.fetch.concurrency_limit_retry_after = 7
+    limit = oauth_core._get_concurrency_limit()  # pyright: ignore[reportPrivateUsage]
+    assert limit is not None and limit.acquire(0)
+    mock = requests_mock.post(current_settings.oauth.token_uri, json={})
+
+    result = oauth.fetch(current_settings.oauth.token_uri, "token")
+
+    assert result["error"] == OAuthError.TEMPORARILY_UNAVAILABLE
+    assert result["retry_after"] == 7
+    assert not mock.called
+
+
+def test_fetch_cuts_limit_on_retryable_status(
+    app_context: flask.ctx.AppContext, requests_mock: RequestsMocker
+) -> None:
+    current_settings.fetch.concurrency_limit_enabled = True
+    current_settings.fetch.concurrency_limit_initial = 10
+    current_settings.fetch.total_retries = 0
+    _ = requests_mock.post(
+        current_settings.oauth.token_uri, status_code=HTTPStatus.TOO_MANY_REQUESTS
+    )
+
+    _ = oauth.fetch(current_settings.oauth.token_uri, "token")
+
+    limit = oauth_core._get_concurrency_limit()  # pyright: ignore[reportPrivateUsage]
+    assert limit is not None and limit.limit == 9  # pyright: ignore[reportPrivateUsage]
+
+
+def test_fetch_cuts_limit_on_timeout(
+    app_context: flask.ctx.AppContext, requests_mock: RequestsMocker
+) -> None:
+    current_settings.fetch.concurrency_limit_enabled = True
+    current_settings.fetch.concurrency_limit_initial = 10
+    current_settings.fetch.total_retries = 0
+    _ = requests_mock.post(
+        current_settings.oauth.token_uri, exc=requests.exceptions.ReadTimeout
+    )
+
+    _ = oauth.fetch(current_settings.oauth.token_uri, "token")
+
+    limit = oauth_core._get_concurrency_limit()  # pyright: ignore[reportPrivateUsage]
+    assert limit is not None and limit.limit == 9  # pyright: ignore[reportPrivateUsage]
+
+
+def test_token_refresh_rejected_with_retry_after(
+    post: PostClient, refresh_token: TokenTuple, requests_mock: RequestsMocker
+) -> None:
+    current_settings.fetch.concurrency_limit_enabled = True
+    current_settings.fetch.concurrency_limit_initial = 1
+    current_settings.fetch.concurrency_limit_max_wait = 0
+    limit = oauth_core._get_concurrency_limit()  # pyright: ignore[reportPrivateUsage]
+    assert limit is not None and limit.acquire(0)
+
+    data = {
+        "client_id": refresh_token.client_id,
+        "client_secret": refresh_token.client_secret,
+        "grant_type": "client_credentials",
+    }
+    result = post("/token", data)
+
+    assert result.status == HTTPStatus.SERVICE_UNAVAILABLE
+    assert result.data["error"] == OAuthError.TEMPORARILY_UNAVAILABLE
+    assert result.headers["Retry-After"] == "1"
@@ -0,0 +1,157 @@
+import http.server
+import threading
+import unittest.mock
+from collections.abc import Generator
+
+import flask.ctx
+import pytest
+import requests
+
+from oauthclientbridge import oauth
+from oauthclientbridge.oauth import (
+    _pool as oauth_pool,  # pyright: ignore[reportPrivateUsage] # Direct implementation test.
+)
+from oauthclientbridge.settings import current_settings
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_Server"
+
+    def do_GET(self) -> None:
+        self._respond()
+
+    def do_POST(self) -> None:
+        _ = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._respond()
+
+    def _respond(self) -> None:
+        self.server.peers.append(self.client_address[1])
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        body = b'{"access_token": "abc", "token_type": "Bearer"}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        _ = self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+class _Server(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+    peers: list[int]
+    statuses: list[int]
+
+
+@pytest.fixture
+def server() -> Generator[_Server, None, None]:
+    server = _Server(("127.0.0.1", 0), _Handler)
+    server.peers, server.statuses = [], []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def session() -> Generator[requests.Session, None, None]:
+    session = requests.Session()
+    session.mount("http://", oauth_pool.PooledAdapter())
+    yield session
+    session.close()
+
+
+def _url(server: _Server) -> str:
+    return "http://127.0.0.1:%d/token" % server.server_address[1]
+
+
+def test_evict_only_drops_failing_connection(
+    server: _Server, session: requests.Session
+) -> None:
+    server.statuses = [200, 503]
+    healthy = session.get(_url(server), stream=True)
+    failing = session.get(_url(server), stream=True)
+    _ = healthy.content
+
+    assert oauth_pool.evict(failing, "retryable_status")
+    assert failing.status_code == 503
+    assert failing.json()["access_token"] == "abc"
+
+    _ = session.get(_url(server)).content
+
+    assert server.peers[2] == server.peers[0]
+    assert server.peers[1] != server.peers[0]
+
+
+def test_evict_ignores_responses_without_pooled_connection() -> None:
+    assert not oauth_pool.evict(unittest.mock.Mock(spec=requests.Response), "test")
+
+
+def test_connection_info_tracks_requests(
+    server: _Server, session: requests.Session
+) -> None:
+    for expected in (1, 2):
+        resp = session.get(_url(server), stream=True)
+        info = oauth_pool.connection_info(resp)
+        _ = resp.content
+
+        assert info is not None
+        assert info[0] >= 0
+        assert info[1] == expected
+
+
+def test_connection_max_age_retires_old_connections(
+    app_context: flask.ctx.AppContext, server: _Server, session: requests.Session
+) -> None:
+    current_settings.fetch.connection_max_age_seconds = 0.001
+    with unittest.mock.patch("time.monotonic", side_effect=range(1000)):
+        _ = session.get(_url(server)).content
+        _ = session.get(_url(server)).content
+
+    assert server.peers[0] != server.peers[1]
+
+
+def test_pool_maxsize_per_host(
+    app_context: flask.ctx.AppContext, session: requests.Session
+) -> None:
+    current_settings.fetch.pool_maxsize = 4
+    current_settings.fetch.pool_maxsize_per_host = {"slow.example.com": 2}
+    adapter = session.get_adapter("http://")
+
+    def pool_size(url: str) -> int:
+        request = requests.Request("GET", url).prepare()
+        pool = adapter.get_connection_with_tls_context(request, True)  # pyright: ignore[reportAttributeAccessIssue, reportUnknownMemberType, reportUnknownVariableType]
+        return pool.pool.maxsize  # pyright: ignore[reportUnknownMemberType, reportUnknownVariableType]
+
+    assert pool_size("http://slow.example.com/") == 2
+    assert pool_size("http://fast.example.com/") == 4
+
+
+def test_https_pools_share_preloaded_ssl_context() -> None:
+    adapter = oauth_pool.PooledAdapter()
+    request = requests.Request("GET", "https://provider.example.com/").prepare()
+
+    pool = adapter.get_connection_with_tls_context(request, True)
+    adapter.cert_verify(pool, request.url or "", True, None)
+
+    assert pool.conn_kw["ssl_context"] is adapter._ssl_context  # pyright: ignore[reportPrivateUsage]
+    assert getattr(pool, "ca_certs") is None
+
+
+def test_oauth_fetch_evicts_connection_on_retryable_status(
+    app_context: flask.ctx.AppContext, server: _Server, session: requests.Session
+) -> None:
+    server.statuses = [503, 200]
+    with (
+        unittest.mock.patch(
+            "oauthclientbridge.oauth._transport.get_session", return_value=session
+        ),
+        unittest.mock.patch("time.sleep"),
+    ):
+        result = oauth.fetch(_url(server), "test_endpoint")
+
+    assert result["access_token"] == "abc"
+    assert server.peers[0] != server.peers[1]
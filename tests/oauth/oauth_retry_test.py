@@ -1,6 +1,7 @@
 import unittest.mock
 from dataclasses import dataclass
 from http import HTTPStatus
+from pathlib import Path
 
 import flask.ctx
 import pytest
@@ -20,6 +21,7 @@ from oauthclientbridge.oauth._outcome import (
     OAuthResponse,  # pyright: ignore[reportPrivateUsage] # Direct implementation test.
 )
 from oauthclientbridge.settings import current_settings
+from oauthclientbridge.utils.bucket import SharedBucket
 
 
 @dataclass
@@ -359,3 +361,65 @@ def test_oauth_fetch_uses_remaining_budget_for_retry_timeout(
     assert result["access_token"] == "mock_token"
     assert observed_timeouts[0] == pytest.approx(1.0)
     assert observed_timeouts[1] == pytest.approx(0.575)
+
+
+def test_retry_limiter_is_shared_with_directory(tmp_path: Path) -> None:
+    first = oauth_retry.get_retry_limiter(2, 0.5, "spotify", tmp_path)
+    oauth_retry.get_retry_limiter.cache_clear()
+    second = oauth_retry.get_retry_limiter(2, 0.5, "spotify", tmp_path)
+
+    assert isinstance(first, SharedBucket)
+    assert first is not second
+    assert first.consume() is True
+    assert second.consume() is True
+    assert first.consume() is False
+    assert (tmp_path / "retry-budget-spotify").exists()
+
+
+def test_oauth_fetch_defers_long_retry_to_caller(
+    app_context: flask.ctx.AppContext,
+    requests_mock: RequestsMocker,
+) -> None:
+    current_settings.fetch.deferred_retry_delay = 1
+    mock = requests_mock.post(
+        current_settings.oauth.token_uri,
+        status_code=503,
+        headers={"Retry-After": "10"},
+        json={"error": "server_error"},
+    )
+
+    with (
+        unittest.mock.patch("random.uniform", return_value=1.0),
+        unittest.mock.patch("time.sleep") as mock_sleep,
+    ):
+        result = oauth.fetch(current_settings.oauth.token_uri, "refresh")
+
+    mock_sleep.assert_not_called()
+    assert mock.call_count == 1
+    assert result["error"] == OAuthError.TEMPORARILY_UNAVAILABLE
+    assert result["retry_after"] == 10
+
+
+@pytest.mark.parametrize(
+    ("endpoint", "retry_after"), [("token", "10"), ("refresh", "0")]
+)
+def test_oauth_fetch_sleeps_retries_that_are_not_deferred(
+    app_context: flask.ctx.AppContext,
+    requests_mock: RequestsMocker,
+    endpoint: str,
+    retry_after: str,
+) -> None:
+    current_settings.fetch.deferred_retry_delay = 1
+    _ = requests_mock.post(
+        current_settings.oauth.token_uri,
+        [
+            {"status_code": 503, "headers": {"Retry-After": retry_after}},
+            {"json": {"access_token": "abc", "token_type": "Bearer"}},
+        ],
+    )
+
+    with unittest.mock.patch("time.sleep") as mock_sleep:
+        result = oauth.fetch(current_settings.oauth.token_uri, endpoint)
+
+    mock_sleep.assert_called_once()
+    assert result["access_token"] == "abc"
@@ -9,6 +9,9 @@ from oauthclientbridge import oauth
 from oauthclientbridge.oauth import (
     _core as oauth_core,  # pyright: ignore[reportPrivateUsage] # Direct implementation test.
 )
+from oauthclientbridge.oauth import (
+    _transport as oauth_transport,  # pyright: ignore[reportPrivateUsage] # Direct implementation test.
+)
 from oauthclientbridge.settings import current_settings
 
 
@@ -19,7 +22,7 @@ def test_oauth_fetch_does_not_call_requests_with_expired_deadline(
     current_settings.fetch.total_retries = 1
 
     with unittest.mock.patch(
-        "oauthclientbridge.oauth._core.get_session"
+        "oauthclientbridge.oauth._transport.get_session"
     ) as mock_get_session:
         result = oauth.fetch(current_settings.oauth.token_uri, "test_endpoint")
 
@@ -314,10 +317,10 @@ def test_oauth_fetch_does_not_retry_on_success(
         mock_sleep.assert_not_called()
 
 
-def test_oauth_fetch_closes_session_before_retrying_retryable_status(
+def test_oauth_fetch_keeps_session_open_on_retryable_status(
     app_context: flask.ctx.AppContext,
 ) -> None:
-    """Verify that retryable HTTP responses reset the pooled session."""
+    """Verify that retryable HTTP responses leave other pooled connections."""
 
     first_response = unittest.mock.Mock(spec=requests.Response)
     first_response.json.return_value = {"error": "temporarily_unavailable"}
@@ -339,14 +342,15 @@ def test_oauth_fetch_closes_session_before_retrying_retryable_status(
 
     with (
         unittest.mock.patch(
-            "oauthclientbridge.oauth._core.get_session", return_value=session
+            "oauthclientbridge.oauth._transport.get_session", return_value=session
         ),
         unittest.mock.patch("time.sleep"),
     ):
         result = oauth.fetch(current_settings.oauth.token_uri, "test_endpoint")
 
     assert result["access_token"] == "mock_token"
-    session.close.assert_called_once_with()
+    session.close.assert_not_called()
+    assert all(call.kwargs["stream"] for call in session.send.call_args_list)
 
 
 def test_parse_retry_with_seconds() -> None:
@@ -390,7 +394,7 @@ def test_oauth_session_sets_user_agent(
 
     requests_mock.get("http://example.com/", status_code=200)
 
-    oauth_core.get_session().get("http://example.com/")
+    oauth_transport.get_session().get("http://example.com/")
 
     history = requests_mock.request_history
     assert len(history) == 1
@@ -0,0 +1,186 @@
+import asyncio
+import ssl
+import unittest.mock
+from collections.abc import Callable, Generator
+
+import flask.ctx
+import httpx
+import pytest
+import requests
+
+from oauthclientbridge import oauth
+from oauthclientbridge.oauth import (
+    _httpx as oauth_httpx,  # pyright: ignore[reportPrivateUsage] # Direct implementation test.
+)
+from oauthclientbridge.oauth import (
+    _transport as oauth_transport,  # pyright: ignore[reportPrivateUsage] # Direct implementation test.
+)
+from oauthclientbridge.settings import FetchTransport, current_settings
+
+Handler = Callable[[httpx.Request], httpx.Response]
+
+
+@pytest.fixture(autouse=True)
+def reset_http2_transport() -> Generator[None, None, None]:
+    oauth_transport._get_http2_transport.cache_clear()  # pyright: ignore[reportPrivateUsage]
+    yield
+    oauth_transport._get_http2_transport.cache_clear()  # pyright: ignore[reportPrivateUsage]
+
+
+def _mock_http2(handler: Handler) -> oauth_httpx.HTTP2Transport:
+    transport = oauth_httpx.HTTP2Transport(max_connections=1)
+    transport._client = httpx.Client(transport=httpx.MockTransport(handler))  # pyright: ignore[reportPrivateUsage]
+    return transport
+
+
+def test_requests_transport_is_default(app_context: flask.ctx.AppContext) -> None:
+    assert isinstance(
+        oauth_transport.get_transport(), oauth_transport.RequestsTransport
+    )
+
+
+def test_http2_transport_is_selected(app_context: flask.ctx.AppContext) -> None:
+    current_settings.fetch.transport = FetchTransport.HTTP2
+
+    transport = oauth_transport.get_transport()
+
+    assert isinstance(transport, oauth_httpx.HTTP2Transport)
+    assert transport is oauth_transport.get_transport()
+
+
+def test_http2_transport_falls_back_without_httpx(
+    app_context: flask.ctx.AppContext,
+) -> None:
+    current_settings.fetch.transport = FetchTransport.HTTP2
+
+    with unittest.mock.patch("importlib.util.find_spec", return_value=None):
+        transport = oauth_transport.get_transport()
+
+    assert isinstance(transport, oauth_transport.RequestsTransport)
+
+
+def test_http2_fetch_retries_like_requests(app_context: flask.ctx.AppContext) -> None:
+    seen: list[httpx.Request] = []
+    responses = [
+        httpx.Response(503, json={"error": "temporarily_unavailable"}),
+        httpx.Response(200, json={"access_token": "abc", "token_type": "Bearer"}),
+    ]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request)
+        return responses.pop(0)
+
+    current_settings.fetch.transport = FetchTransport.HTTP2
+    with (
+        unittest.mock.patch(
+            "oauthclientbridge.oauth._transport._get_http2_transport",
+            return_value=_mock_http2(handler),
+        ),
+        unittest.mock.patch("time.sleep"),
+    ):
+        result = oauth.fetch(
+            current_settings.oauth.token_uri, "token", grant_type="client_credentials"
+        )
+
+    assert result == {"access_token": "abc", "token_type": "Bearer"}
+    assert len(seen) == 2
+    assert seen[0].content == b"grant_type=client_credentials"
+    assert seen[0].headers["Content-Type"] == "application/x-www-form-urlencoded"
+
+
+def test_http2_response_keeps_headers_and_body() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(429, headers={"Retry-After": "3"}, text="busy")
+
+    prepared = requests.Request("POST", "https://provider.example.com/token").prepare()
+    resp = _mock_http2(handler).send(unittest.mock.Mock(), prepared, 1.0)
+
+    assert resp.status_code == 429
+    assert resp.headers["retry-after"] == "3"
+    assert resp.content == b"busy"
+    assert resp.request is prepared
+
+
+@pytest.mark.parametrize(
+    ("error", "expected"),
+    [
+        (httpx.ConnectTimeout("timeout"), requests.exceptions.ConnectTimeout),
+        (httpx.PoolTimeout("timeout"), requests.exceptions.ConnectTimeout),
+        (httpx.ReadTimeout("timeout"), requests.exceptions.ReadTimeout),
+        (httpx.ProxyError("proxy"), requests.exceptions.ProxyError),
+        (httpx.ConnectError("refused"), requests.exceptions.ConnectionError),
+        (httpx.RemoteProtocolError("goaway"), requests.exceptions.ConnectionError),
+        (httpx.DecodingError("bad"), requests.exceptions.RequestException),
+    ],
+)
+def test_http2_errors_map_to_requests_errors(
+    error: httpx.HTTPError, expected: type[requests.exceptions.RequestException]
+) -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise error
+
+    prepared = requests.Request("POST", "https://provider.example.com/token").prepare()
+    with pytest.raises(expected) as excinfo:
+        _ = _mock_http2(handler).send(unittest.mock.Mock(), prepared, 1.0)
+
+    assert type(excinfo.value) is expected
+
+
+def test_http2_ssl_errors_map_to_requests_ssl_error() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        error = ssl.SSLError("certificate verify failed")
+        raise httpx.ConnectError("handshake failed") from error
+
+    prepared = requests.Request("POST", "https://provider.example.com/token").prepare()
+    with pytest.raises(requests.exceptions.SSLError):
+        _ = _mock_http2(handler).send(unittest.mock.Mock(), prepared, 1.0)
+
+
+def test_async_transport_is_per_loop(app_context: flask.ctx.AppContext) -> None:
+    async def get() -> oauth_transport.AsyncTransport:
+        first = oauth_transport.get_async_transport()
+        assert first is oauth_transport.get_async_transport()
+        return first
+
+    first, second = asyncio.run(get()), asyncio.run(get())
+
+    assert isinstance(first, oauth_httpx.AsyncHTTPXTransport)
+    assert first is not second
+
+
+def test_async_transport_falls_back_to_threads(
+    app_context: flask.ctx.AppContext,
+) -> None:
+    async def get() -> oauth_transport.AsyncTransport:
+        return oauth_transport.get_async_transport()
+
+    with unittest.mock.patch("importlib.util.find_spec", return_value=None):
+        transport = asyncio.run(get())
+
+    assert isinstance(transport, oauth_transport.ThreadedTransport)
+
+
+def test_async_fetch_retries_like_sync(app_context: flask.ctx.AppContext) -> None:
+    responses = [
+        httpx.Response(503, json={"error": "temporarily_unavailable"}),
+        httpx.Response(200, json={"access_token": "abc", "token_type": "Bearer"}),
+    ]
+    transport = oauth_httpx.AsyncHTTPXTransport(http2=False, max_connections=1)
+    transport._client = httpx.AsyncClient(  # pyright: ignore[reportPrivateUsage]
+        transport=httpx.MockTransport(lambda request: responses.pop(0))
+    )
+
+    with (
+        unittest.mock.patch(
+            "oauthclientbridge.oauth._core.get_async_transport",
+            return_value=transport,
+        ),
+        unittest.mock.patch("asyncio.sleep") as mock_sleep,
+    ):
+        result = asyncio.run(
+            oauth.fetch_async(current_settings.oauth.token_uri, "token")
+        )
+
+    assert result == {"access_token": "abc", "token_type": "Bearer"}
+    assert responses == []
+    mock_sleep.assert_called_once()
@@ -0,0 +1,156 @@
+import os
+from pathlib import Path
+
+import pytest
+from flask import Flask
+from werkzeug.test import Client
+
+from oauthclientbridge import crypto, db, providers, types
+from oauthclientbridge.oauth import (
+    _retry as oauth_retry,  # pyright: ignore[reportPrivateUsage]
+)
+from oauthclientbridge.settings import ProvidersSettings, current_settings
+
+
+def _env_file(tmp_path: Path, name: str, **extra: str) -> Path:
+    values = {
+        "FLASK_SECRET_KEY": f"{name}-secret",
+        "FLASK_SESSION_COOKIE_PATH": f"/{name}",
+        "DB_DATABASE": str(tmp_path / f"{name}.db"),
+        "OAUTH_CLIENT_ID": f"{name}-client",
+        "OAUTH_CLIENT_SECRET": "s3cret",
+        "OAUTH_AUTHORIZATION_URI": f"https://{name}.example.com/auth",
+        "OAUTH_TOKEN_URI": f"https://{name}.example.com/token",
+        **extra,
+    }
+    path = tmp_path / f"{name}.env"
+    _ = path.write_text("".join(f"{key}={value}\n" for key, value in values.items()))
+    return path
+
+
+@pytest.fixture
+def apps(tmp_path: Path) -> dict[str, Flask]:
+    apps = providers.create_apps(
+        {
+            "/spotify": _env_file(tmp_path, "spotify"),
+            "soundcloud.example.com": _env_file(
+                tmp_path, "soundcloud", TELEMETRY_OAUTH_PROVIDER="soundcloud"
+            ),
+        }
+    )
+    for app in apps.values():
+        with app.app_context():
+            db.initialize()
+    return apps
+
+
+@pytest.fixture
+def dispatcher(apps: dict[str, Flask]) -> Client:
+    return Client(providers.ProviderDispatcher(apps))
+
+
+def _insert_token(app: Flask, **token: str) -> tuple[types.ClientId, str]:
+    client_secret = crypto.generate_key()
+    client_id = db.generate_id()
+    with app.app_context():
+        db.insert(client_id, crypto.dumps(client_secret, token))
+    return client_id, client_secret
+
+
+def _token_form(client_id: types.ClientId, client_secret: str) -> dict[str, str]:
+    return {
+        "client_id": str(client_id),
+        "client_secret": client_secret,
+        "grant_type": "client_credentials",
+    }
+
+
+def test_each_provider_gets_its_own_settings(apps: dict[str, Flask]) -> None:
+    spotify, soundcloud = apps["/spotify"], apps["soundcloud.example.com"]
+
+    with spotify.app_context():
+        assert current_settings.oauth.client_id == "spotify-client"
+        assert current_settings.otel.oauth_provider == "spotify"
+    with soundcloud.app_context():
+        assert current_settings.oauth.client_id == "soundcloud-client"
+        assert current_settings.otel.oauth_provider == "soundcloud"
+    assert spotify.config["SESSION_COOKIE_PATH"] == "/spotify"
+    assert soundcloud.config["SECRET_KEY"] == "soundcloud-secret"
+
+
+def test_provider_env_files_do_not_leak(apps: dict[str, Flask]) -> None:
+    assert "OAUTH_CLIENT_ID" not in os.environ
+    assert "DB_DATABASE" not in os.environ
+
+
+def test_dispatch_by_path_prefix(apps: dict[str, Flask], dispatcher: Client) -> None:
+    client_id, client_secret = _insert_token(apps["/spotify"], access_token="123")
+
+    resp = dispatcher.post("/spotify/token", data=_token_form(client_id, client_secret))
+
+    assert resp.status_code == 200
+    assert resp.json == {"access_token": "123"}
+
+
+def test_dispatch_by_host(apps: dict[str, Flask], dispatcher: Client) -> None:
+    app = apps["soundcloud.example.com"]
+    client_id, client_secret = _insert_token(app, access_token="456")
+
+    resp = dispatcher.post(
+        "/token",
+        data=_token_form(client_id, client_secret),
+        headers={"Host": "SoundCloud.example.com:443"},
+    )
+
+    assert resp.status_code == 200
+    assert resp.json == {"access_token": "456"}
+
+
+def test_providers_have_separate_token_stores(
+    apps: dict[str, Flask], dispatcher: Client
+) -> None:
+    client_id, client_secret = _insert_token(apps["/spotify"], access_token="123")
+
+    resp = dispatcher.post(
+        "/token",
+        data=_token_form(client_id, client_secret),
+        headers={"Host": "soundcloud.example.com"},
+    )
+
+    assert resp.status_code == 401
+
+
+def test_unknown_mount_is_not_found(dispatcher: Client) -> None:
+    assert dispatcher.get("/other/metrics").status_code == 404
+
+
+def test_resolve_moves_mount_to_script_name(apps: dict[str, Flask]) -> None:
+    dispatcher = providers.ProviderDispatcher(apps)
+    environ = {"SERVER_NAME": "localhost", "SCRIPT_NAME": "", "PATH_INFO": ""}
+
+    environ["PATH_INFO"] = "/spotify/token"
+    assert dispatcher.resolve(environ) is apps["/spotify"]
+    assert (environ["SCRIPT_NAME"], environ["PATH_INFO"]) == ("/spotify", "/token")
+
+    environ.update(HTTP_HOST="SoundCloud.example.com:443", PATH_INFO="/token")
+    assert dispatcher.resolve(environ) is apps["soundcloud.example.com"]
+    assert dispatcher.resolve({"PATH_INFO": "/other/token"}) is None
+
+
+def test_retry_budget_is_per_provider() -> None:
+    spotify = oauth_retry.get_retry_limiter(8, 0.25, "spotify")
+    soundcloud = oauth_retry.get_retry_limiter(8, 0.25, "soundcloud")
+
+    assert spotify is not soundcloud
+    assert spotify is oauth_retry.get_retry_limiter(8, 0.25, "spotify")
+
+
+def test_missing_env_file_is_rejected(tmp_path: Path) -> None:
+    with pytest.raises(FileNotFoundError):
+        _ = providers.create_apps({"/spotify": tmp_path / "missing.env"})
+
+
+@pytest.mark.parametrize("mount", ["/", "/spotify/", "example.com/spotify", ""])
+def test_settings_reject_invalid_mounts(mount: str, tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="PROVIDERS_MOUNTS"):
+        _ = ProvidersSettings(mounts={mount: tmp_path / "spotify.env"})
@@ -0,0 +1,275 @@
+import re
+from collections.abc import Generator
+from datetime import timedelta
+from pathlib import Path
+from typing import Any
+
+import pytest
+import requests
+import requests_mock as requests_mock_module
+from flask import Flask
+from flask.ctx import AppContext
+from flask.testing import FlaskClient
+from pydantic import SecretStr
+from requests_mock import Mocker
+
+from oauthclientbridge import create_app, crypto, db, replication, types
+from oauthclientbridge.errors import OAuthError
+from oauthclientbridge.settings import DatabaseSettings, ReplicationSettings, Settings
+from oauthclientbridge.utils import time as time_utils
+
+from .conftest import GetClient, PostClient
+
+PRIMARY_URL = "http://primary.example.com"
+REPLICATION_TOKEN = SecretStr("replication-secret")
+
+
+@pytest.fixture
+def settings(settings: Settings, tmp_path: Path) -> Settings:
+    settings.database = DatabaseSettings(database=str(tmp_path / "replica.db"))
+    settings.replication = ReplicationSettings(
+        primary_url=PRIMARY_URL, token=REPLICATION_TOKEN
+    )
+    return settings
+
+
+@pytest.fixture
+def primary(settings: Settings, tmp_path: Path) -> Flask:
+    app = create_app(
+        settings.model_copy(
+            update={
+                "database": DatabaseSettings(database=str(tmp_path / "primary.db")),
+                "replication": ReplicationSettings(
+                    change_log=True, token=REPLICATION_TOKEN
+                ),
+            }
+        )
+    )
+    with app.app_context():
+        db.initialize()
+    return app
+
+
+@pytest.fixture
+def primary_context(primary: Flask) -> Generator[AppContext, None, None]:
+    with primary.app_context() as ctx:
+        yield ctx
+
+
+@pytest.fixture(autouse=True)
+def route_to_primary(requests_mock: Mocker, primary: Flask) -> None:
+    """Serve requests for the primary from its app, as a second host would."""
+    test_client = primary.test_client()
+
+    def handle(request: requests.PreparedRequest, context: Any) -> bytes:
+        resp = test_client.open(
+            request.path_url,
+            method=request.method,
+            headers=dict(request.headers),
+            data=request.body,
+        )
+        context.status_code = resp.status_code
+        context.headers = dict(resp.headers)
+        return resp.get_data()
+
+    _ = requests_mock.register_uri(
+        requests_mock_module.ANY, re.compile(re.escape(PRIMARY_URL)), content=handle
+    )
+
+
+def _write_on_primary(primary: Flask, **token: str) -> tuple[types.ClientId, str]:
+    client_secret = crypto.generate_key()
+    client_id = db.generate_id()
+    with primary.app_context():
+        db.insert(client_id, crypto.dumps(client_secret, token))
+    return client_id, client_secret
+
+
+def _stored_token(client_id: types.ClientId, client_secret: str) -> object:
+    record = db.lookup(client_id)
+    assert record.encrypted_token is not None
+    return crypto.loads(client_secret, record.encrypted_token)
+
+
+def test_change_log_is_not_served_without_change_log(client: FlaskClient) -> None:
+    resp = client.get("/replication/changes")
+
+    assert resp.status_code == 404
+
+
+def test_change_log_requires_token(primary: Flask) -> None:
+    resp = primary.test_client().get(
+        "/replication/changes", headers={"Authorization": "Bearer wrong"}
+    )
+
+    assert resp.status_code == 401
+
+
+def test_follow_applies_changes_from_primary(
+    primary: Flask, app_context: AppContext
+) -> None:
+    client_id, client_secret = _write_on_primary(primary, refresh_token="abc")
+    with primary.app_context():
+        db.update(client_id, crypto.dumps(client_secret, {"refresh_token": "def"}))
+
+    assert replication.follow_once(batch_size=10) == 2
+    assert replication.follow_once(batch_size=10) == 0
+    assert _stored_token(client_id, client_secret) == {"refresh_token": "def"}
+    assert db.last_change_seq() == 2
+
+
+def test_follow_fetches_in_batches(primary: Flask, app_context: AppContext) -> None:
+    for _ in range(3):
+        _ = _write_on_primary(primary, access_token="123")
+
+    assert [replication.follow_once(batch_size=2) for _ in range(3)] == [2, 1, 0]
+
+
+def test_follow_rejects_pruned_changes(primary: Flask, app_context: AppContext) -> None:
+    for _ in range(2):
+        _ = _write_on_primary(primary, access_token="123")
+    with primary.app_context():
+        assert db.prune_changes(time_utils.utcnow() + timedelta(days=1)) == 1
+
+    with pytest.raises(replication.ReplicaTooFarBehind):
+        _ = replication.follow_once(batch_size=10)
+
+
+def test_prune_changes_keeps_position(primary_context: AppContext) -> None:
+    for _ in range(3):
+        _ = _write_on_primary(primary_context.app, access_token="123")
+
+    assert db.prune_changes(time_utils.utcnow() + timedelta(days=1)) == 2
+    assert db.last_change_seq() == 3
+    assert db.iter_changes(after=3) == []
+
+
+def test_replica_serves_reads_locally(
+    primary: Flask, app_context: AppContext, post: PostClient, requests_mock: Mocker
+) -> None:
+    client_id, client_secret = _write_on_primary(primary, access_token="123")
+    _ = replication.follow_once(batch_size=10)
+    requests_mock.reset_mock()
+
+    resp = post(
+        "/token",
+        {
+            "client_id": client_id,
+            "client_secret": client_secret,
+            "grant_type": "client_credentials",
+        },
+    )
+
+    assert resp.status == 200
+    assert resp.data == {"access_token": "123"}
+    assert not requests_mock.called
+
+
+def test_replica_forwards_rotated_refresh_token(
+    primary: Flask,
+    app_context: AppContext,
+    post: PostClient,
+    requests_mock: Mocker,
+    settings: Settings,
+) -> None:
+    client_id, client_secret = _write_on_primary(primary, refresh_token="abc")
+    _ = replication.follow_once(batch_size=10)
+    _ = requests_mock.post(
+        settings.oauth.token_uri,
+        json={"access_token": "456", "token_type": "Bearer", "refresh_token": "def"},
+    )
+
+    resp = post(
+        "/token",
+        {
+            "client_id": client_id,
+            "client_secret": client_secret,
+            "grant_type": "client_credentials",
+        },
+    )
+
+    assert resp.status == 200
+    assert _stored_token(client_id, client_secret) == {"refresh_token": "def"}
+    with primary.app_context():
+        assert _stored_token(client_id, client_secret) == {"refresh_token": "def"}
+
+    # Catching up with the forwarded write leaves the replica unchanged.
+    assert replication.follow_once(batch_size=10) == 1
+    assert _stored_token(client_id, client_secret) == {"refresh_token": "def"}
+
+
+def test_replica_callback_inserts_on_primary(
+    primary: Flask,
+    get: GetClient,
+    state: str,
+    requests_mock: Mocker,
+    settings: Settings,
+) -> None:
+    _ = requests_mock.post(
+        settings.oauth.token_uri,
+        json={"token_type": "Bearer", "access_token": "123"},
+    )
+
+    resp = get("/callback?code=1234&state=" + state)
+
+    client_id = db.validate_client_id(resp.data["client_id"])
+    client_secret = resp.data["client_secret"]
+    assert _stored_token(client_id, client_secret) == {
+        "token_type": "Bearer",
+        "access_token": "123",
+    }
+    with primary.app_context():
+        assert _stored_token(client_id, client_secret) == {
+            "token_type": "Bearer",
+            "access_token": "123",
+        }
+
+
+def test_replica_write_fails_when_primary_is_unavailable(
+    primary: Flask,
+    app_context: AppContext,
+    post: PostClient,
+    requests_mock: Mocker,
+    settings: Settings,
+) -> None:
+    client_id, client_secret = _write_on_primary(primary, refresh_token="abc")
+    _ = replication.follow_once(batch_size=10)
+    _ = requests_mock.post(
+        settings.oauth.token_uri,
+        json={"access_token": "456", "token_type": "Bearer", "refresh_token": "def"},
+    )
+    _ = requests_mock.put(
+        re.compile(re.escape(PRIMARY_URL)), exc=requests.exceptions.ConnectionError
+    )
+
+    resp = post(
+        "/token",
+        {
+            "client_id": client_id,
+            "client_secret": client_secret,
+            "grant_type": "client_credentials",
+        },
+    )
+
+    assert resp.status == 503
+    assert resp.data["error"] == OAuthError.TEMPORARILY_UNAVAILABLE
+    assert _stored_token(client_id, client_secret) == {"refresh_token": "abc"}
+
+
+def test_followdb_requires_primary_url(primary: Flask) -> None:
+    result = primary.test_cli_runner().invoke(args=["followdb", "--once"])
+
+    assert result.exit_code == 2
+    assert "REPLICATION_PRIMARY_URL" in result.stderr
+
+
+def test_settings_require_replication_token() -> None:
+    with pytest.raises(ValueError, match="REPLICATION_TOKEN"):
+        _ = ReplicationSettings(change_log=True)
+
+
+def test_settings_reject_change_log_on_replica() -> None:
+    with pytest.raises(ValueError, match="REPLICATION_CHANGE_LOG"):
+        _ = ReplicationSettings(
+            change_log=True, primary_url=PRIMARY_URL, token=REPLICATION_TOKEN
+        )
@@ -0,0 +1,42 @@
+import dataclasses
+
+import pytest
+from flask import Flask
+from flask.testing import FlaskClient
+
+from oauthclientbridge import runtime
+from oauthclientbridge.settings import Settings
+
+
+def test_runtime_is_built_from_settings(app: Flask, settings: Settings) -> None:
+    with app.app_context():
+        app_runtime = runtime.get()
+
+    assert app_runtime.callback_template.render(variables={}) == "{}"
+    assert app_runtime.authorization_uri.parts.netloc == "provider.example.com"
+    assert app_runtime.allowed_scopes is None
+    assert app_runtime.www_authenticate == f'Basic realm="{settings.auth_realm}"'
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        app_runtime.default_scope = "foo"  # pyright: ignore[reportAttributeAccessIssue]
+
+
+def test_runtime_ignores_later_settings_changes(
+    app: Flask, client: FlaskClient, settings: Settings
+) -> None:
+    settings.callback_template = "changed"
+
+    assert client.get("/callback").data != b"changed"
+
+    runtime.init_app(app, settings)
+    assert client.get("/callback").data == b"changed"
+
+
+def test_callback_template_is_compiled_once(
+    app: Flask, client: FlaskClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def from_string(*args: object, **kwargs: object) -> None:
+        raise AssertionError("Template compiled per request")
+
+    monkeypatch.setattr(app.jinja_env, "from_string", from_string)
+
+    assert client.get("/callback").status_code == 400
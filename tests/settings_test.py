@@ -4,6 +4,7 @@ import pytest
 from pydantic import ValidationError
 
 from oauthclientbridge.settings import (
+    FetchSettings,
     PrometheusSettings,
     TelemetryExporter,
     TelemetrySettings,
@@ -73,3 +74,9 @@ def test_prometheus_settings_defaults() -> None:
 def test_prometheus_settings_multiproc_dir() -> None:
     settings = PrometheusSettings(multiproc_dir=Path("/prom"))
     assert settings.multiproc_dir == Path("/prom")
+
+
+def test_fetch_settings_rejects_hedged_refresh() -> None:
+    with pytest.raises(ValidationError) as excinfo:
+        FetchSettings(hedge_endpoints={"token", "refresh"})
+    assert "FETCH_HEDGE_ENDPOINTS can not include refresh" in str(excinfo.value)
@@ -0,0 +1,61 @@
+from oauthclientbridge.utils.sketch import SpaceSaving
+
+
+def test_space_saving_counts_exactly_within_capacity() -> None:
+    sketch = SpaceSaving(capacity=3)
+    for item in "aabacb":
+        sketch.add(item)
+
+    assert sketch.top(3) == [("a", 3), ("b", 2), ("c", 1)]
+    assert sketch.error("a") == 0
+
+
+def test_space_saving_keeps_heavy_hitters() -> None:
+    sketch = SpaceSaving(capacity=4)
+    for i in range(1000):
+        sketch.add("heavy" if i % 3 == 0 else f"noise-{i}")
+
+    assert len(sketch) == 4
+    assert sketch.top(1)[0][0] == "heavy"
+
+
+def test_space_saving_replacement_inherits_count_as_error() -> None:
+    sketch = SpaceSaving(capacity=1)
+    sketch.add("a", 5)
+    sketch.add("b")
+
+    assert sketch.top(1) == [("b", 6)]
+    assert sketch.error("b") == 5
+
+
+def test_space_saving_merge_adds_counts() -> None:
+    first, second = SpaceSaving(capacity=2), SpaceSaving(capacity=2)
+    first.add("a", 3)
+    first.add("b", 1)
+    second.add("a", 2)
+    second.add("c", 4)
+
+    first.merge(second)
+
+    assert first.top(2) == [("a", 5), ("c", 4)]
+    assert len(first) == 2
+
+
+def test_space_saving_scale() -> None:
+    sketch = SpaceSaving(capacity=2)
+    sketch.add("a", 4)
+
+    sketch.scale(0.5)
+
+    assert sketch.top(1) == [("a", 2)]
+
+
+def test_space_saving_load_round_trips() -> None:
+    sketch = SpaceSaving(capacity=1)
+    sketch.add("a", 2)
+    sketch.add("b")
+
+    loaded = SpaceSaving.load(1, sketch.dump())
+
+    assert loaded.top(1) == sketch.top(1)
+    assert loaded.error("b") == 2
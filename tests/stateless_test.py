@@ -0,0 +1,202 @@
+import uuid
+from datetime import UTC, datetime
+
+import pytest
+from pydantic import SecretStr
+from requests_mock import Mocker
+
+from oauthclientbridge import client, crypto, db, types
+from oauthclientbridge.errors import OAuthError
+from oauthclientbridge.settings import Settings
+
+from .conftest import GetClient, PostClient, TokenTuple
+
+CLIENT_ID = types.ClientId(uuid.UUID("00000000-0000-0000-0000-000000000001"))
+
+
+@pytest.fixture
+def settings(settings: Settings) -> Settings:
+    settings.stateless_grant_key = SecretStr(crypto.generate_key())
+    return settings
+
+
+@pytest.fixture
+def grant_key(settings: Settings) -> str:
+    assert settings.stateless_grant_key is not None
+    return settings.stateless_grant_key.get_secret_value()
+
+
+def _grant(key: str, generation: int = 0, **token: str) -> types.ClientSecret:
+    return client.dump_grant(
+        key,
+        client.StatelessGrant(
+            client_id=CLIENT_ID,
+            generation=generation,
+            created_at=datetime(2026, 6, 18, tzinfo=UTC),
+            token=dict(token),
+        ),
+    )
+
+
+def _token_request(client_secret: str) -> dict[str, str]:
+    return {
+        "client_id": str(CLIENT_ID),
+        "client_secret": client_secret,
+        "grant_type": "client_credentials",
+    }
+
+
+def test_settings_reject_invalid_stateless_grant_key(settings: Settings) -> None:
+    with pytest.raises(ValueError, match="valid Fernet key"):
+        _ = Settings.model_validate(
+            settings.model_dump() | {"stateless_grant_key": "not-a-key"}
+        )
+
+
+def test_grant_round_trip(grant_key: str) -> None:
+    secret = _grant(grant_key, generation=3, refresh_token="abc")
+
+    grant = client.validate_grant(str(CLIENT_ID), secret, grant_key)
+
+    assert client.is_stateless_secret(secret)
+    assert grant.client_id == CLIENT_ID
+    assert grant.generation == 3
+    assert grant.created_at == datetime(2026, 6, 18, tzinfo=UTC)
+    assert grant.token == {"refresh_token": "abc"}
+
+
+def test_grant_is_bound_to_client_id(grant_key: str) -> None:
+    secret = _grant(grant_key, refresh_token="abc")
+
+    with pytest.raises(client.ClientSecretValidationError):
+        _ = client.validate_grant(
+            "00000000-0000-0000-0000-000000000002", secret, grant_key
+        )
+
+
+def test_grant_rejects_other_key(grant_key: str) -> None:
+    secret = _grant(crypto.generate_key(), refresh_token="abc")
+
+    with pytest.raises(client.ClientSecretValidationError):
+        _ = client.validate_grant(str(CLIENT_ID), secret, grant_key)
+
+
+def test_callback_issues_stateless_grant(
+    get: GetClient,
+    state: str,
+    requests_mock: Mocker,
+    settings: Settings,
+    grant_key: str,
+) -> None:
+    _ = requests_mock.post(
+        settings.oauth.token_uri,
+        json={"token_type": "Bearer", "access_token": "123", "refresh_token": "abc"},
+    )
+
+    resp = get("/callback?code=1234&state=" + state)
+
+    grant = client.validate_grant(
+        resp.data["client_id"], resp.data["client_secret"], grant_key
+    )
+    assert grant.generation == 0
+    assert grant.token == {"refresh_token": "abc"}
+    with pytest.raises(LookupError):
+        _ = db.lookup(grant.client_id)
+
+
+def test_token_without_refresh_token(
+    post: PostClient, requests_mock: Mocker, grant_key: str
+) -> None:
+    secret = _grant(grant_key, token_type="Bearer", access_token="123")
+
+    resp = post("/token", _token_request(secret))
+
+    assert resp.status == 200
+    assert resp.data == {"token_type": "Bearer", "access_token": "123"}
+    assert not requests_mock.called
+
+
+def test_token_refresh_without_rotation_keeps_grant(
+    post: PostClient, requests_mock: Mocker, settings: Settings, grant_key: str
+) -> None:
+    _ = requests_mock.post(
+        settings.oauth.token_uri,
+        json={"access_token": "456", "token_type": "Bearer"},
+    )
+
+    resp = post("/token", _token_request(_grant(grant_key, refresh_token="abc")))
+
+    assert resp.status == 200
+    assert resp.data == {"access_token": "456", "token_type": "Bearer"}
+    assert db.lookup_generation(CLIENT_ID) == 0
+
+
+def test_token_refresh_rotation_returns_new_grant(
+    post: PostClient, requests_mock: Mocker, settings: Settings, grant_key: str
+) -> None:
+    _ = requests_mock.post(
+        settings.oauth.token_uri,
+        json={"access_token": "456", "token_type": "Bearer", "refresh_token": "def"},
+    )
+    original = _grant(grant_key, refresh_token="abc")
+
+    resp = post("/token", _token_request(original))
+
+    assert resp.status == 200
+    assert "refresh_token" not in resp.data
+    rotated = client.validate_grant(
+        str(CLIENT_ID), resp.data["client_secret"], grant_key
+    )
+    assert rotated.generation == 1
+    assert rotated.token == {"refresh_token": "def"}
+    assert db.lookup_generation(CLIENT_ID) == 1
+
+    superseded = post("/token", _token_request(original))
+
+    assert superseded.status == 400
+    assert superseded.data["error"] == OAuthError.INVALID_GRANT
+
+
+def test_token_invalid_grant_revokes_stateless_grant(
+    post: PostClient, requests_mock: Mocker, settings: Settings, grant_key: str
+) -> None:
+    _ = requests_mock.post(
+        settings.oauth.token_uri,
+        status_code=400,
+        json={"error": "invalid_grant"},
+    )
+    secret = _grant(grant_key, refresh_token="abc")
+
+    first = post("/token", _token_request(secret))
+    second = post("/token", _token_request(secret))
+
+    assert first.data["error"] == OAuthError.INVALID_GRANT
+    assert second.data["error"] == OAuthError.INVALID_GRANT
+    assert second.data["error_description"] == "Grant has been revoked."
+    assert requests_mock.call_count == 1
+    assert db.lookup_generation(CLIENT_ID) is None
+
+
+def test_token_rejects_tampered_grant(post: PostClient, grant_key: str) -> None:
+    secret = _grant(grant_key, refresh_token="abc")
+
+    resp = post("/token", _token_request(secret[:-4] + "AAAA"))
+
+    assert resp.status == 401
+    assert resp.data["error"] == OAuthError.INVALID_CLIENT
+
+
+def test_token_keeps_serving_database_grants(
+    post: PostClient, access_token: TokenTuple
+) -> None:
+    resp = post(
+        "/token",
+        {
+            "client_id": access_token.client_id,
+            "client_secret": access_token.client_secret,
+            "grant_type": "client_credentials",
+        },
+    )
+
+    assert resp.status == 200
+    assert resp.data == access_token.value
@@ -8,12 +8,13 @@ import flask
 import pytest
 import requests
 import structlog
+from flask import Flask
 from flask.testing import FlaskClient
 from opentelemetry import metrics, trace
 from opentelemetry.sdk.metrics.export import HistogramDataPoint, NumberDataPoint
 from requests_mock import Mocker
 
-from oauthclientbridge import db, oauth, telemetry
+from oauthclientbridge import db, oauth, runtime, telemetry
 from oauthclientbridge.errors import OAuthError
 from oauthclientbridge.oauth import (
     _core as oauth_core,  # pyright: ignore[reportPrivateUsage] # Direct implementation test.
@@ -562,11 +563,13 @@ def test_token_insert_records_fields(
 
 def test_revoked_grant_workaround_adds_span_event(
     otel_mock: otel.OTelMocker,
+    app: Flask,
     post: PostClient,
     access_token: TokenTuple,
     settings: Settings,
 ) -> None:
     settings.revoked_grant_workaround_user_agents = r"^Mopidy-Spotify/4\.1\.1\b"
+    runtime.init_app(app, settings)
 
     _ = db.update(access_token.client_id, None)
 
@@ -1087,7 +1090,9 @@ def test_oauth_client_retry_metrics_record_deadline_skip(
         raise AssertionError("unexpected retry attempt")
 
     monkeypatch.setattr(
-        oauth_core, "_get_retry_limiter", lambda _capacity, _refill: FakeRetryLimiter()
+        oauth_core,
+        "_get_retry_limiter",
+        lambda _capacity, _refill, _provider, _directory: FakeRetryLimiter(),
     )
     monkeypatch.setattr(oauth_core.time, "time", now)
     monkeypatch.setattr(oauth_core.time, "monotonic", now)
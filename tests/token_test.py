@@ -4,12 +4,13 @@ from typing import Callable, Protocol, cast
 
 import pytest
 import requests
+from flask import Flask
 from flask.testing import FlaskClient
 from requests_mock import Mocker
 
-from oauthclientbridge import crypto, db
+from oauthclientbridge import crypto, db, runtime
 from oauthclientbridge.errors import OAuthError
-from oauthclientbridge.settings import Settings
+from oauthclientbridge.settings import Settings, TrafficClass
 
 from .conftest import PostClient, ResponseTuple, TokenTuple
 
@@ -192,6 +193,42 @@ def test_token_normalizes_dashless_uuid_client_id(
     assert resp.data == access_token.value
 
 
+def test_token_rate_limits_client(
+    post: PostClient, access_token: TokenTuple, settings: Settings
+):
+    settings.client_rate_limit_per_second = 0.1
+    settings.client_rate_limit_burst = 2
+    data = {
+        "client_id": access_token.client_id,
+        "client_secret": access_token.client_secret,
+        "grant_type": "client_credentials",
+    }
+    dashless = {**data, "client_id": str(access_token.client_id).replace("-", "")}
+
+    assert post("/token", data).status == 200
+    assert post("/token", dashless).status == 200
+    resp = post("/token", data)
+
+    assert resp.status == 503
+    assert resp.data["error"] == OAuthError.TEMPORARILY_UNAVAILABLE
+    assert resp.headers["Retry-After"] == "10"
+
+
+def test_token_rate_limit_applies_before_credentials(
+    post: PostClient, access_token: TokenTuple, settings: Settings
+):
+    settings.client_rate_limit_per_second = 0.1
+    settings.client_rate_limit_burst = 1
+    data = {
+        "client_id": access_token.client_id,
+        "client_secret": "wrong",
+        "grant_type": "client_credentials",
+    }
+
+    assert post("/token", data).status == 401
+    assert post("/token", data).status == 503
+
+
 def test_token_normalizes_unpadded_client_secret(
     post: PostClient, access_token: TokenTuple
 ):
@@ -293,11 +330,13 @@ def test_token_revoked(post: PostClient, access_token: TokenTuple):
 
 
 def test_token_revoked_returns_workaround_token_for_matching_user_agent(
+    app: Flask,
     post: PostClient,
     access_token: TokenTuple,
     settings: Settings,
 ):
     settings.revoked_grant_workaround_user_agents = r"^Mopidy-Spotify/4\.1\.1\b"
+    runtime.init_app(app, settings)
     settings.revoked_grant_workaround_access_token = (
         "OAUTHCLIENTBRIDGE_REVOKED_GRANT_WORKAROUND"
     )
@@ -326,11 +365,13 @@ def test_token_revoked_returns_workaround_token_for_matching_user_agent(
 
 
 def test_token_revoked_workaround_does_not_apply_for_non_matching_user_agent(
+    app: Flask,
     post: PostClient,
     access_token: TokenTuple,
     settings: Settings,
 ):
     settings.revoked_grant_workaround_user_agents = r"^Mopidy-Spotify/4\.1\.1\b"
+    runtime.init_app(app, settings)
 
     data = {
         "client_id": access_token.client_id,
@@ -350,6 +391,62 @@ def test_token_revoked_workaround_does_not_apply_for_non_matching_user_agent(
     assert resp.data["error"] == OAuthError.INVALID_GRANT
 
 
+def test_token_revoked_workaround_for_traffic_class(
+    app: Flask, post: PostClient, access_token: TokenTuple, settings: Settings
+):
+    settings.traffic_classes = [
+        TrafficClass(
+            name="legacy",
+            user_agents=r"^OldApp/1\.",
+            revoked_grant_workaround=True,
+            workaround_expires_in=3600,
+        )
+    ]
+    runtime.init_app(app, settings)
+    data = {
+        "client_id": access_token.client_id,
+        "client_secret": access_token.client_secret,
+        "grant_type": "client_credentials",
+    }
+    _ = db.update(access_token.client_id, None)
+
+    resp = post("/token", data, headers={"User-Agent": "OldApp/1.0"})
+
+    assert resp.status == 200
+    assert resp.data["access_token"] == settings.revoked_grant_workaround_access_token
+    assert resp.data["expires_in"] == 3600
+
+
+def test_token_rate_limits_traffic_class(
+    app: Flask, post: PostClient, access_token: TokenTuple, settings: Settings
+):
+    settings.traffic_classes = [
+        TrafficClass(
+            name="legacy",
+            user_agents=r"^OldApp/1\.",
+            rate_limit_per_second=0.01,
+            rate_limit_burst=1,
+        )
+    ]
+    runtime.init_app(app, settings)
+    data = {
+        "client_id": access_token.client_id,
+        "client_secret": access_token.client_secret,
+        "grant_type": "client_credentials",
+    }
+    legacy = {"User-Agent": "OldApp/1.0"}
+
+    assert post("/token", data, headers=legacy).status == 200
+    resp = post("/token", data, headers=legacy)
+    assert resp.status == 503
+    assert resp.headers["Retry-After"] == "100"
+
+    # Other clients are not limited by the class, and without a global limit
+    # not at all.
+    assert post("/token", data).status == 200
+    assert post("/token", data).status == 200
+
+
 def test_token_wrong_secret_and_not_found_identical(
     post: PostClient, access_token: TokenTuple
 ):
@@ -765,6 +862,31 @@ def test_token_provider_unavailable(
     assert resp.data["error_description"]
 
 
+def test_token_refresh_on_refresh_executor(
+    post: PostClient,
+    refresh_token: TokenTuple,
+    requests_mock: Mocker,
+    settings: Settings,
+):
+    settings.fetch.refresh_workers = 2
+    mock = requests_mock.post(
+        settings.oauth.token_uri,
+        json={"access_token": "abc", "token_type": "Bearer"},
+    )
+
+    data = {
+        "client_id": refresh_token.client_id,
+        "client_secret": refresh_token.client_secret,
+        "grant_type": "client_credentials",
+    }
+
+    resp = post("/token", data)
+
+    assert resp.status == 200
+    assert resp.data["access_token"] == "abc"
+    assert mock.call_count == 1
+
+
 def test_token_invalid_grant_revokes_stored_refresh_token(
     post: PostClient,
     client: FlaskClient,
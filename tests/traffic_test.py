@@ -0,0 +1,67 @@
+import pytest
+from pydantic import ValidationError
+
+from oauthclientbridge import traffic
+from oauthclientbridge.settings import TrafficClass
+
+LEGACY = TrafficClass(name="legacy", user_agents=r"^OldApp/1\.")
+BROKEN = TrafficClass(name="broken", user_agents=r"Broken")
+
+
+@pytest.mark.parametrize(
+    ("user_agent", "expected"),
+    [
+        ("OldApp/1.2", "legacy"),
+        ("OldApp/1.2 Broken", "legacy"),
+        ("NewApp/2.0 Broken", "broken"),
+        ("NewApp/2.0 (OldApp/1.2)", None),
+        ("", None),
+    ],
+)
+def test_classify_first_matching_class(user_agent: str, expected: str | None) -> None:
+    classifier = traffic.get_classifier((LEGACY, BROKEN))
+
+    result = classifier.classify(user_agent)
+
+    assert (result.name if result else None) == expected
+
+
+def test_classify_without_classes() -> None:
+    assert traffic.get_classifier(()).classify("OldApp/1.2") is None
+
+
+def test_classify_workaround_user_agents_come_last() -> None:
+    classifier = traffic.get_classifier((BROKEN,), r"^Mopidy-Spotify/4\.1\.1\b")
+
+    workaround = classifier.classify("Mopidy-Spotify/4.1.1 Mopidy/3")
+    assert workaround is not None
+    assert workaround.revoked_grant_workaround
+    result = classifier.classify("Mopidy-Spotify/4.1.1 Broken")
+    assert result is not None and result.name == "broken"
+
+
+def test_classify_patterns_with_inline_flags_and_groups() -> None:
+    classifier = traffic.get_classifier(
+        (TrafficClass(name="repeated", user_agents=r"(\w)\1"),),
+        r"(?i)^Mopidy-Spotify/",
+    )
+
+    workaround = classifier.classify("mopidy-spotify/4.1.1")
+    assert workaround is not None and workaround.revoked_grant_workaround
+    repeated = classifier.classify("Mopidy-Spotify/4.1.1 Boot/1")
+    assert repeated is not None and repeated.name == "repeated"
+    assert classifier.classify("Other/1.0") is None
+
+
+def test_classify_caches_per_user_agent() -> None:
+    classifier = traffic.Classifier((LEGACY,))
+
+    _ = classifier.classify("OldApp/1.2")
+    _ = classifier.classify("OldApp/1.2")
+
+    assert classifier.classify.cache_info().hits == 1
+
+
+def test_traffic_class_rejects_invalid_pattern() -> None:
+    with pytest.raises(ValidationError):
+        _ = TrafficClass(name="bad", user_agents="(")
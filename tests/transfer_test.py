@@ -0,0 +1,124 @@
+import io
+import json
+import uuid
+from datetime import UTC, datetime
+
+import pytest
+from flask import Flask
+from flask.ctx import AppContext
+
+from oauthclientbridge import db, transfer, types
+
+CLIENT_ID = types.ClientId(uuid.UUID("00000000-0000-0000-0000-000000000001"))
+REVOKED_CLIENT_ID = types.ClientId(uuid.UUID("00000000-0000-0000-0000-000000000002"))
+CREATED_AT = datetime(2026, 6, 18, 12, 0, tzinfo=UTC)
+
+
+@pytest.fixture
+def records(app_context: AppContext) -> list[db.TokenRecord]:
+    records = [
+        db.TokenRecord(
+            client_id=CLIENT_ID,
+            encrypted_token=types.EncryptedToken(b"token"),
+            created_at=CREATED_AT,
+            last_updated_at=CREATED_AT,
+        ),
+        db.TokenRecord(
+            client_id=REVOKED_CLIENT_ID,
+            encrypted_token=None,
+            created_at=None,
+            last_updated_at=None,
+        ),
+    ]
+    assert db.insert_records(records) == 2
+    return records
+
+
+def test_iter_records_streams_in_batches(records: list[db.TokenRecord]) -> None:
+    assert sorted(db.iter_records(batch_size=1), key=lambda r: r.client_id) == records
+
+
+def test_insert_records_keeps_existing_unless_replacing(
+    records: list[db.TokenRecord],
+) -> None:
+    updated = db.TokenRecord(
+        client_id=CLIENT_ID,
+        encrypted_token=types.EncryptedToken(b"other"),
+        created_at=None,
+        last_updated_at=None,
+    )
+
+    assert db.insert_records([updated]) == 0
+    assert db.lookup(CLIENT_ID).encrypted_token == b"token"
+
+    assert db.insert_records([updated], replace=True) == 1
+    assert db.lookup(CLIENT_ID).encrypted_token == b"other"
+
+
+def test_export_import_round_trip(records: list[db.TokenRecord]) -> None:
+    db.update_generation(CLIENT_ID, 2)
+    output = io.StringIO()
+
+    assert transfer.export_ndjson(output, batch_size=1) == 3
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert {line["type"] for line in lines} == {"token", "grant_generation"}
+
+    for record in records:
+        _ = db.update(record.client_id, None)
+
+    progress: list[int] = []
+    count = transfer.import_ndjson(
+        io.StringIO(output.getvalue()),
+        batch_size=2,
+        replace=True,
+        progress=progress.append,
+    )
+
+    assert count == 3
+    assert progress == [2, 3]
+    assert sorted(db.iter_records(), key=lambda r: r.client_id) == records
+    assert db.lookup_generation(CLIENT_ID) == 2
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        {"type": "token", "client_id": "not-a-uuid", "token": None},
+        {"type": "token", "client_id": str(CLIENT_ID), "token": 1},
+        {"type": "token", "client_id": 1, "token": None},
+        {"type": "token", "client_id": str(CLIENT_ID)},
+        {"type": "grant_generation", "client_id": str(CLIENT_ID), "generation": []},
+        {"type": "other", "client_id": str(CLIENT_ID)},
+        [],
+    ],
+)
+def test_import_rejects_invalid_lines(app_context: AppContext, line: object) -> None:
+    source = io.StringIO(json.dumps(line) + "\n")
+
+    with pytest.raises(ValueError, match="line 1"):
+        _ = transfer.import_ndjson(source)
+
+
+def test_exportdb_and_importdb_commands(
+    app: Flask, records: list[db.TokenRecord]
+) -> None:
+    runner = app.test_cli_runner()
+
+    exported = runner.invoke(args=["exportdb"])
+    assert exported.exit_code == 0
+    assert "Exported 2 records" in exported.stderr
+
+    for record in records:
+        _ = db.update(record.client_id, None)
+
+    imported = runner.invoke(args=["importdb", "--replace"], input=exported.stdout)
+    assert imported.exit_code == 0
+    assert "Imported 2 records" in imported.stderr
+    assert db.lookup(CLIENT_ID).encrypted_token == b"token"
+
+
+def test_importdb_reports_invalid_input(app: Flask, app_context: AppContext) -> None:
+    result = app.test_cli_runner().invoke(args=["importdb"], input="not json\n")
+
+    assert result.exit_code == 1
+    assert "Invalid record on line 1" in result.stderr
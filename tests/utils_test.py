@@ -1,3 +1,11 @@
+import dataclasses
+import datetime
+
+import pytest
+from flask import Flask
+
+from oauthclientbridge.errors import OAuthError
+from oauthclientbridge.utils import json as json_utils
 from oauthclientbridge.utils import uri
 
 
@@ -13,3 +21,77 @@ def test_rewrite_uri() -> None:
 
     result = uri.rewrite_uri("http://example.com/path?a=1#fragment", {"b": "3"})
     assert result == "http://example.com/path?a=1&b=3#fragment"
+
+
+def test_rewrite_parsed_uri() -> None:
+    parsed = uri.parse_uri("http://example.com/path?a=1&a=2&b=2#fragment")
+
+    result = uri.rewrite_uri(parsed, {"b": "3", "c": "4"})
+    assert result == "http://example.com/path?a=1&a=2&b=3&c=4#fragment"
+
+    # Reusable, nothing from the first rewrite sticks.
+    result = uri.rewrite_uri(parsed, {"d": "5"})
+    assert result == "http://example.com/path?a=1&a=2&b=2&d=5#fragment"
+
+
+@pytest.fixture(params=["json", "orjson"])
+def json_backend(
+    request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    if request.param == "json":
+        monkeypatch.setattr(json_utils, "orjson", None)
+    elif json_utils.orjson is None:
+        pytest.skip("orjson is not installed")
+
+
+def test_json_dumps_compact_bytes(json_backend: None) -> None:
+    assert json_utils.dumps({"b": 1, "a": [True, None]}) == b'{"b":1,"a":[true,null]}'
+    assert json_utils.dumps({"b": 1, "a": 2}, sort_keys=True) == b'{"a":2,"b":1}'
+    assert json_utils.dumps("blåbær").decode("utf-8") in (
+        '"blåbær"',
+        r'"bl\u00e5b\u00e6r"',
+    )
+
+
+def test_json_dumps_passes_dates_and_dataclasses_to_default(
+    json_backend: None,
+) -> None:
+    @dataclasses.dataclass
+    class Point:
+        x: int
+
+    seen: list[object] = []
+
+    def default(obj: object) -> str:
+        seen.append(obj)
+        return "x"
+
+    date = datetime.datetime(2024, 1, 1, tzinfo=datetime.UTC)
+    assert json_utils.dumps([date, Point(1)], default=default) == b'["x","x"]'
+    assert seen == [date, Point(1)]
+
+
+def test_json_loads_bytes_and_str(json_backend: None) -> None:
+    assert json_utils.loads(b'{"a": [1, 2.5]}') == {"a": [1, 2.5]}
+    assert json_utils.loads('"blåbær"') == "blåbær"
+
+
+def test_json_provider_response(json_backend: None, app: Flask) -> None:
+    assert isinstance(app.json, json_utils.JSONProvider)
+
+    with app.app_context():
+        response = app.json.response({"b": 1, "a": 2})
+
+    assert response.get_data() == b'{"a":2,"b":1}\n'
+    assert response.mimetype == "application/json"
+
+
+def test_error_body_is_serialized_once() -> None:
+    body = OAuthError.INVALID_GRANT.body()
+
+    assert json_utils.loads(body) == OAuthError.INVALID_GRANT.json()
+    assert OAuthError.INVALID_GRANT.body(OAuthError.INVALID_GRANT.description) is body
+    assert json_utils.loads(OAuthError.INVALID_GRANT.body("Custom.")) == {
+        "error": "invalid_grant",
+        "error_description": "Custom.",
+    }
@@ -4,6 +4,8 @@ from typing import Any
 from flask import Flask
 from opentelemetry.trace import Span, TracerProvider
 
+__version__: str
+
 type RequestHook = Callable[[Span, dict[str, Any]], None]
 type ResponseHook = Callable[[Span, str, Mapping[str, str] | list[tuple[str, str]]], None]
 
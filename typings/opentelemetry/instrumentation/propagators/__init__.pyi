@@ -1,3 +1,7 @@
-class TraceResponsePropagator: ...
+class ResponsePropagator:
+    def inject(self, carrier: object, setter: object = ...) -> None: ...
 
-def set_global_response_propagator(propagator: TraceResponsePropagator) -> None: ...
+class TraceResponsePropagator(ResponsePropagator): ...
+
+def get_global_response_propagator() -> ResponsePropagator | None: ...
+def set_global_response_propagator(propagator: ResponsePropagator) -> None: ...